@@ -2,85 +2,375 @@
 
 import asyncio
 import json
+import threading
+import time
+from typing import Callable, Optional
+
 import openai
-from config import API_KEY, SYSTEM_PROMPT, OPENAI_MODEL, MAX_CONVERSATION_HISTORY
+from config import (
+    API_KEY,
+    SYSTEM_PROMPT,
+    OPENAI_MODEL,
+    OPENAI_TIMEOUT,
+    OPENAI_MAX_RETRIES,
+    MAX_CONVERSATION_TOKENS,
+    TOOL_RESULT_ELIDE_TOKENS,
+    MAX_PARALLEL_TOOL_CALLS,
+    STREAM_RESPONSES,
+    TOOL_RESULT_FORMAT,
+    TOOL_RESULT_MAX_TOKENS,
+    TOOL_RESULT_SAMPLE_ROWS,
+    TRACE_FILE,
+)
+from conversation import ConversationHistory
+from result_shaping import RESULT_TOOL_NAME, ResultShaper
 from mcp_client import get_mcp_client, call_mcp_tool, format_tool_result, cleanup_mcp_client
+import tracing
+
+# Spans for each turn (model calls, tool calls) when TRACE_FILE is set
+_tracer = tracing.Tracer("agent-console", TRACE_FILE)
+
+# Tool execution
+
+async def run_tool_call(
+    call_id: str,
+    func_name: str,
+    raw_arguments: str,
+    limiter: asyncio.Semaphore,
+    shaper: ResultShaper,
+    announce: Callable[[str], None] = print,
+) -> dict:
+    """Execute one model tool call and build its ``tool`` message.
+
+    ``get_tool_result`` is answered locally from the shaper's archive; every
+    other tool goes to the MCP server and its result is shaped for the context.
+    """
+    with tracing.span(f"tool {func_name}", attributes={"tool.call_id": call_id}) as span:
+        async with limiter:
+            try:
+                arguments = json.loads(raw_arguments or "{}")
+                announce(f"▪ Executing {func_name}({arguments})")
+                if func_name == RESULT_TOOL_NAME:
+                    result = content = shaper.retrieve(arguments)
+                else:
+                    result = await call_mcp_tool(func_name, arguments)
+                    with tracing.span("shape result"):
+                        content = shaper.render(func_name, result)
+                error = None
+            except Exception as e:
+                result, error = None, e
+                content = json.dumps({"error": str(e)})
+                span.record_error(e)
+        span.set_attribute("tool.result_chars", len(content))
+    return {
+        "message": {
+            "role": "tool",
+            "tool_call_id": call_id,
+            "name": func_name,
+            "content": content
+        },
+        "result": result,
+        "error": error,
+    }
+
+
+class StreamPrinter:
+    """Prints streamed answer tokens after an ``Assistant >`` prefix.
+
+    Tool status lines go through :meth:`status`, which first ends a partly
+    printed answer, so tools started mid-stream don't print into its line.
+    """
+
+    def __init__(self):
+        self.started = False
+
+    def __call__(self, text: str) -> None:
+        if not self.started:
+            print("Assistant > ", end="", flush=True)
+            self.started = True
+        print(text, end="", flush=True)
+
+    def status(self, line: str) -> None:
+        if self.started:
+            print()
+            self.started = False  # answer text after the tools gets a new prefix
+        print(line, flush=True)
+
+    def finish(self) -> None:
+        if self.started:
+            print("\n")
+            self.started = False
+
+
+# Conversation handling
+
+def create_openai_client() -> openai.AsyncOpenAI:
+    """Async OpenAI client so model calls never block the event loop."""
+    return openai.AsyncOpenAI(
+        api_key=API_KEY,
+        timeout=OPENAI_TIMEOUT,
+        max_retries=OPENAI_MAX_RETRIES,
+    )
+
+
+class ChatSession:
+    """One conversation with the model; many can share a client and event loop."""
+
+    def __init__(self, openai_client: openai.AsyncOpenAI, functions_spec: list[dict]):
+        self.openai_client = openai_client
+        self.shaper = ResultShaper(
+            style=TOOL_RESULT_FORMAT,
+            max_tokens=TOOL_RESULT_MAX_TOKENS,
+            sample_rows=TOOL_RESULT_SAMPLE_ROWS,
+            model=OPENAI_MODEL,
+        )
+        self.functions_spec = functions_spec
+        if self.shaper.enabled:
+            self.functions_spec = functions_spec + [self.shaper.tool_spec()]
+        self.tool_limiter = asyncio.Semaphore(MAX_PARALLEL_TOOL_CALLS)
+        # where tool status lines go during the current turn
+        self._status: Callable[[str], None] = print
+        self.last_trace_id: Optional[str] = None
+        self.history = ConversationHistory(
+            SYSTEM_PROMPT,
+            token_budget=MAX_CONVERSATION_TOKENS,
+            elide_threshold=TOOL_RESULT_ELIDE_TOKENS,
+            model=OPENAI_MODEL,
+        )
+
+    def _start_tool(self, call: dict) -> asyncio.Task:
+        function = call["function"]
+        return asyncio.create_task(run_tool_call(
+            call["id"], function["name"], function["arguments"], self.tool_limiter, self.shaper,
+            self._status,
+        ))
+
+    def _start_model_span(self):
+        # started but not made current, so tool calls begun mid-stream stay
+        # children of the turn rather than of the model call
+        return _tracer.start_span("model", kind=tracing.CLIENT, attributes={
+            "gen_ai.request.model": OPENAI_MODEL,
+            "gen_ai.request.messages": len(self.history.messages),
+        })
+
+    async def _complete(self) -> tuple[Optional[str], list[dict], list[asyncio.Task]]:
+        """One non-streamed model call; tool calls start once it returns."""
+        span = self._start_model_span()
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=self.history.messages,
+                tools=self.functions_spec,
+            )
+            if response.usage is not None:
+                span.set_attribute("gen_ai.usage.input_tokens", response.usage.prompt_tokens)
+                span.set_attribute("gen_ai.usage.output_tokens", response.usage.completion_tokens)
+        except Exception as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end()
+        msg_obj = response.choices[0].message  # ChatCompletionMessage
+        tool_calls = [
+            call.model_dump(exclude_none=True) for call in msg_obj.tool_calls or []
+        ]
+        return msg_obj.content, tool_calls, [self._start_tool(call) for call in tool_calls]
+
+    async def _stream(
+        self, on_token: Callable[[str], None]
+    ) -> tuple[Optional[str], list[dict], list[asyncio.Task]]:
+        """One streamed model call.
+
+        Answer tokens go to ``on_token`` as they arrive. Tool call deltas are
+        assembled by index, and each tool call starts executing as soon as
+        the next one begins (its arguments are then complete).
+        """
+        span = self._start_model_span()
+        started = time.perf_counter()
+        content: list[str] = []
+        tool_calls: list[dict] = []
+        tasks: list[asyncio.Task] = []
+        try:
+            stream = await self.openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=self.history.messages,
+                tools=self.functions_spec,
+                stream=True,
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                if not content and not tool_calls:
+                    span.set_attribute("gen_ai.first_chunk_ms", round((time.perf_counter() - started) * 1000, 1))
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content.append(delta.content)
+                    on_token(delta.content)
+                for part in delta.tool_calls or []:
+                    while len(tool_calls) <= part.index:
+                        if tool_calls:
+                            tasks.append(self._start_tool(tool_calls[-1]))
+                        tool_calls.append({
+                            "id": "",
+                            "type": "function",
+                            "function": {"name": "", "arguments": ""},
+                        })
+                    call = tool_calls[part.index]
+                    if part.id:
+                        call["id"] = part.id
+                    if part.function and part.function.name:
+                        call["function"]["name"] += part.function.name
+                    if part.function and part.function.arguments:
+                        call["function"]["arguments"] += part.function.arguments
+        except BaseException as e:
+            # tools already started for this response must not outlive it
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            span.record_error(e)
+            raise
+        finally:
+            span.set_attribute("gen_ai.tool_calls", len(tool_calls))
+            span.end()
+        if tool_calls:
+            tasks.append(self._start_tool(tool_calls[-1]))
+        return "".join(content) or None, tool_calls, tasks
+
+    async def ask(
+        self,
+        user_input: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_status: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Run one user turn, executing tool calls until the model answers.
+
+        Pass ``on_token`` to stream the answer as it is generated, and
+        ``on_status`` to receive tool status lines (printed by default).
+        """
+        self.history.append({"role": "user", "content": user_input})
+        self._status = on_status or print
+
+        with _tracer.span("turn", attributes={"turn.input_chars": len(user_input)}) as turn:
+            # the trace /trace shows; None when tracing is off
+            self.last_trace_id = getattr(turn, "trace_id", None)
+            rounds = 0
+            while True:  # loop until we have a final assistant message
+                rounds += 1
+                # Keep the conversation under its token budget
+                self.history.compact()
+
+                # Ask the model – function-calling aware request
+                if on_token is not None:
+                    content, tool_calls, tasks = await self._stream(on_token)
+                else:
+                    content, tool_calls, tasks = await self._complete()
+
+                # Tool calls already run concurrently; collect their results in
+                # the order the model asked for them
+                if tool_calls:
+                    outcomes = await asyncio.gather(*tasks)
+
+                    tool_results = []
+                    for outcome in outcomes:
+                        func_name = outcome["message"]["name"]
+                        if outcome["error"] is not None:
+                            self._status(f"  ❌ {func_name} error: {outcome['error']}")
+                        else:
+                            format_tool_result(func_name, outcome["result"])
+                        tool_results.append(outcome["message"])
+
+                    # Add assistant message with tool calls
+                    assistant_msg: dict = {"role": "assistant", "tool_calls": tool_calls}
+                    if content:
+                        assistant_msg["content"] = content
+                    self.history.append(assistant_msg)
+                    # Add all tool results
+                    self.history.extend(tool_results)
+                    continue  # ask model to produce a final answer
+
+                # Final response
+                self.history.append({"role": "assistant", "content": content})
+                turn.set_attribute("turn.model_calls", rounds)
+                return content
+
 
 # Main chat loop
 
+def print_last_trace(session: ChatSession) -> None:
+    """Waterfall of the last turn: model, tool, transport and database spans."""
+    if not TRACE_FILE:
+        print("Tracing is off – set TRACE_FILE to record turns.\n")
+        return
+    if session.last_trace_id is None:
+        print("No turn traced yet.\n")
+        return
+    _tracer.flush()
+    print(tracing.waterfall(tracing.load_trace(TRACE_FILE, session.last_trace_id)) + "\n")
+
+
+async def read_input(prompt: str) -> str:
+    """``input()`` without blocking the event loop.
+
+    The read runs on a daemon thread rather than the default executor:
+    ``asyncio.run`` joins executor threads on shutdown, so a thread stuck in
+    ``input()`` would keep Ctrl-C at the prompt from exiting.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(line: Optional[str], error: Optional[Exception]) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(line)
+
+    def read() -> None:
+        try:
+            line, error = input(prompt), None
+        except Exception as e:  # EOFError on Ctrl-D
+            line, error = None, e
+        try:
+            loop.call_soon_threadsafe(settle, line, error)
+        except RuntimeError:
+            pass  # the loop already closed
+
+    threading.Thread(target=read, name="stdin-reader", daemon=True).start()
+    return await future
+
+
 async def chat_loop() -> None:
-    openai_client = openai.OpenAI(api_key=API_KEY)
-    
+    openai_client = create_openai_client()
+
     # Initialize MCP client and get available tools
     mcp_client = await get_mcp_client()
-    functions_spec = mcp_client.get_available_tools()
-    
-    conversation: list[dict[str, str]] = [
-        {"role": "system", "content": SYSTEM_PROMPT}
-    ]
-
-    print("💬 SQL Assistant Ready! Ask me anything about the database (Ctrl-C to quit)\n")
-
-    while True:
-        user_input = input("User > ")
-        if not user_input.strip():
-            continue
-        
-        conversation.append({"role": "user", "content": user_input})
-
-        while True:  # loop until we have a final assistant message
-            # Trim conversation history if too long
-            if len(conversation) > MAX_CONVERSATION_HISTORY:
-                conversation = [conversation[0]] + conversation[-(MAX_CONVERSATION_HISTORY-1):]
-            
-            # Ask the model – function-calling aware request
-            response = openai_client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=conversation,
-                tools=functions_spec,
-            )
+    session = ChatSession(openai_client, mcp_client.get_available_tools())
 
-            msg_obj = response.choices[0].message  # ChatCompletionMessage
-
-            # Handle multiple tool calls in one response
-            if msg_obj.tool_calls:
-                tool_results = []
-                
-                for tool_call in msg_obj.tool_calls:
-                    func_name = tool_call.function.name
-                    arguments = json.loads(tool_call.function.arguments)
-                    
-                    print(f"▪ Executing {func_name}({arguments})")
-                    
-                    try:
-                        result = await call_mcp_tool(func_name, arguments)
-                        format_tool_result(func_name, result)
-
-                        tool_results.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": func_name,
-                            "content": json.dumps(result)
-                        })
-                    except Exception as e:
-                        print(f"  ❌ Error: {e}")
-                        tool_results.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": func_name,
-                            "content": json.dumps({"error": str(e)})
-                        })
+    print("💬 SQL Assistant Ready! Ask me anything about the database (Ctrl-C to quit)")
+    if TRACE_FILE:
+        print(f"Tracing turns to {TRACE_FILE} – type /trace for the last turn's timeline")
+    print()
 
-                # Add assistant message with tool calls
-                conversation.append(msg_obj.model_dump(exclude_none=True))
-                # Add all tool results
-                conversation.extend(tool_results)
-                continue  # ask model to produce a final answer
+    try:
+        while True:
+            # read stdin off the event loop so MCP and model I/O keep flowing
+            user_input = await read_input("User > ")
+            if not user_input.strip():
+                continue
+            if user_input.strip() == "/trace":
+                print_last_trace(session)
+                continue
 
-            # Final response
-            conversation.append({"role": "assistant", "content": msg_obj.content})
-            print(f"Assistant > {msg_obj.content}\n")
-            break
+            if STREAM_RESPONSES:
+                printer = StreamPrinter()
+                await session.ask(user_input, on_token=printer, on_status=printer.status)
+                printer.finish()
+            else:
+                answer = await session.ask(user_input)
+                print(f"Assistant > {answer}\n")
+    finally:
+        await openai_client.close()
 
 
 if __name__ == "__main__":
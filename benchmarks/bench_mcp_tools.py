@@ -0,0 +1,188 @@
+"""End-to-end benchmark of the MCP tools over the real stdio transport.
+
+Starts sql_mcp_server (via bench_server.py) on its SQLite backend against a
+seeded SalesAnalytics fixture and drives list_tables, describe_table and execute_sql
+with the official MCP client, reporting latency percentiles, throughput,
+response size and the server's peak RSS during each scenario:
+
+    python benchmarks/bench_mcp_tools.py --calls 200 --concurrency 4
+    python benchmarks/bench_mcp_tools.py --sizes 10,1000,20000 --json results.json
+
+Result caching is off unless --result-cache is given, so every execute_sql
+call really runs its query.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import fixture  # noqa: E402
+
+ORDERS_QUERY = """
+SELECT o.OrderID, o.OrderDate, o.Status, o.TotalAmount, c.CustomerName, c.Region
+FROM Orders o JOIN Customers c ON c.CustomerID = o.CustomerID
+WHERE o.OrderID <= {rows}
+ORDER BY o.OrderID
+"""
+
+
+def scenarios(sizes: List[int], result_format: str) -> List[Dict[str, Any]]:
+    found = [
+        {"name": "list_tables", "tool": "list_tables", "args": {}},
+        {"name": "describe_table", "tool": "describe_table", "args": {"table_name": "Orders"}},
+    ]
+    for size in sizes:
+        found.append({
+            "name": f"execute_sql {size} rows",
+            "tool": "execute_sql",
+            "args": {"query": ORDERS_QUERY.format(rows=size), "result_format": result_format},
+            "rows": size,
+        })
+    return found
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def structured(result: Any) -> Any:
+    """A tool's structured result (FastMCP wraps non-object returns in "result")."""
+    content = result.structuredContent or {}
+    return content.get("result", content)
+
+
+def response_bytes(result: Any) -> int:
+    if result.structuredContent is not None:
+        return len(json.dumps(result.structuredContent))
+    return sum(len(getattr(block, "text", "")) for block in result.content)
+
+
+async def run_scenario(
+    session: ClientSession, scenario: Dict[str, Any], calls: int, concurrency: int, warmup: int
+) -> Dict[str, Any]:
+    tool, args = scenario["tool"], scenario["args"]
+    await session.call_tool("bench_process_stats", arguments={"reset_peak": True})
+    for _ in range(warmup):
+        await session.call_tool(tool, arguments=args)
+
+    latencies: List[float] = []
+    sizes: List[int] = []
+    errors = 0
+    remaining = iter(range(calls))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            result = await session.call_tool(tool, arguments=args)
+            latencies.append(time.perf_counter() - started)
+            if result.isError:
+                errors += 1
+            sizes.append(response_bytes(result))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stats = structured(await session.call_tool("bench_process_stats", arguments={}))
+    latencies.sort()
+    return {
+        "scenario": scenario["name"],
+        "calls": calls,
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "calls_per_sec": calls / elapsed,
+        "rows_per_sec": scenario.get("rows", 0) * calls / elapsed,
+        "response_bytes": int(statistics.fmean(sizes)),
+        "server_peak_rss_mb": stats["peak_rss_bytes"] / 2**20,
+        # "reset": peak during this scenario; "process": peak since the server started
+        "peak_rss_scope": stats["peak_scope"],
+    }
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = (
+        f"{'scenario':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'calls/s':>8} {'rows/s':>10} {'resp KB':>9} {'peak RSS MB':>11} {'errors':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<26} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['calls_per_sec']:>8.1f} {r['rows_per_sec']:>10,.0f} {r['response_bytes'] / 1024:>9.1f} "
+            f"{r['server_peak_rss_mb']:>11.1f} {r['errors']:>6}"
+        )
+    if any(r["peak_rss_scope"] == "process" for r in results):
+        print("\npeak RSS is the server's peak since it started; per-scenario peaks need Linux")
+
+
+async def main(args: argparse.Namespace) -> Optional[List[Dict[str, Any]]]:
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    db_path = fixture.build(args.db or os.path.join(tempfile.gettempdir(), f"sales_bench_{args.scale}.db"), args.scale)
+
+    env = {
+        **os.environ,
+        "DB_BACKEND": "sqlite",
+        "SQLITE_PATH": db_path,
+        "MSSQL_MAX_ROWS": str(max(sizes + [1000])),
+        "MSSQL_MAX_RESULT_BYTES": str(1 << 30),
+        "MSSQL_RESULT_CACHE": "true" if args.result_cache else "false",
+        "MSSQL_POOL_MAX_SIZE": str(max(args.concurrency, 1)),
+    }
+    params = StdioServerParameters(
+        command=sys.executable, args=[os.path.join(HERE, "bench_server.py")], env=env
+    )
+    results = []
+    errlog = sys.stderr if args.server_log else open(os.devnull, "w")
+    async with stdio_client(params, errlog=errlog) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for scenario in scenarios(sizes, args.result_format):
+                calls = args.calls if "rows" not in scenario else max(5, args.calls * 100 // max(scenario["rows"], 100))
+                results.append(await run_scenario(session, scenario, calls, args.concurrency, args.warmup))
+                print(f"  done: {scenario['name']}", file=sys.stderr)
+
+    print(f"\nfixture scale {args.scale}, concurrency {args.concurrency}, result_format={args.result_format}")
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200, help="calls per metadata scenario; fewer for large results")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="execute_sql result sizes in rows")
+    parser.add_argument("--result-format", default="rows", choices=("rows", "arrays", "columns"))
+    parser.add_argument("--result-cache", action="store_true", help="leave the server's result cache on")
+    parser.add_argument("--scale", type=int, default=1, help="fixture size multiplier")
+    parser.add_argument("--db", help="fixture path (default: a file in the temp directory)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--server-log", action="store_true", help="show the server's log output")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
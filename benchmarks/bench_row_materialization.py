@@ -0,0 +1,171 @@
+"""Micro-benchmark for turning driver rows into execute_sql result rows.
+
+Drives the server's real read path – ``_ResultReader.read`` plus ``shape``,
+exactly as execute_sql calls them – over synthetic rows shaped like a
+SalesAnalytics orders query, served from memory by a minimal DB-API
+cursor reporting SQL Server type codes. Each format is compared with the
+per-row reader it replaced (convert one row, size every value, append),
+and the original untyped string loop is shown for reference:
+
+    python benchmarks/bench_row_materialization.py --rows 100000
+
+Only the server module is needed, not a database; it is imported with the
+``sqlite`` backend, which connects lazily.
+"""
+
+import argparse
+import datetime
+import decimal
+import gc
+import os
+import random
+import sys
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# config.py insists on these; nothing here talks to a database or OpenAI
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import sql_mcp_server  # noqa: E402
+from row_serialization import json_size, make_row_converter  # noqa: E402
+
+# (name, type_code, display_size, internal_size, precision, scale, null_ok)
+DESCRIPTION = [
+    ("OrderID", int, None, 10, 10, 0, False),
+    ("CustomerName", str, None, 100, 100, 0, False),
+    ("OrderDate", datetime.datetime, None, 23, 23, 3, False),
+    ("Quantity", int, None, 10, 10, 0, False),
+    ("UnitPrice", decimal.Decimal, None, 10, 10, 2, False),
+    ("Discount", decimal.Decimal, None, 5, 5, 4, True),
+    ("Notes", str, None, 200, 200, 0, True),
+    ("IsShipped", bool, None, 1, 1, 0, False),
+]
+COLUMNS = [d[0] for d in DESCRIPTION]
+
+
+def make_rows(count: int, seed: int = 7) -> List[tuple]:
+    rnd = random.Random(seed)
+    start = datetime.datetime(2023, 1, 1)
+    return [
+        (
+            i,
+            f"Customer {rnd.randint(1, 5000)}",
+            start + datetime.timedelta(minutes=rnd.randint(0, 500_000)),
+            rnd.randint(1, 50),
+            decimal.Decimal(rnd.randint(100, 99_999)) / 100,
+            None if i % 3 else decimal.Decimal(rnd.randint(0, 2500)) / 10_000,
+            None if i % 4 else f"note {i}",
+            bool(i % 2),
+        )
+        for i in range(count)
+    ]
+
+
+class ListCursor:
+    """The part of a DB-API cursor _ResultReader uses, over in-memory rows."""
+
+    description = DESCRIPTION
+
+    def __init__(self, rows: Sequence[tuple]) -> None:
+        self._rows = rows
+        self._pos = 0
+
+    def fetchmany(self, size: int) -> List[tuple]:
+        batch = self._rows[self._pos:self._pos + size]
+        self._pos += size
+        return list(batch)
+
+
+def original_loop(rows: Sequence[tuple]) -> List[Dict[str, Any]]:
+    """execute_sql before typed values and byte caps: one dict of strings per row."""
+    cursor, out = ListCursor(rows), []
+    while True:
+        batch = cursor.fetchmany(sql_mcp_server.FETCH_BATCH_SIZE)
+        if not batch:
+            return out
+        out.extend(dict(zip(COLUMNS, [str(v) if v is not None else None for v in row])) for row in batch)
+
+
+def per_row_reader(result_format: str, typed: bool) -> Callable[[Sequence[tuple]], Any]:
+    """The read loop _ResultReader used before batching: one row at a time."""
+    convert = make_row_converter(DESCRIPTION, typed=typed)
+    overhead = len(COLUMNS) + 2
+    if result_format == "rows":
+        overhead += sum(len(c) + 3 for c in COLUMNS)
+
+    def run(rows: Sequence[tuple]) -> Any:
+        cursor, buffer, out, size = ListCursor(rows), deque(), [], 2
+        while True:
+            if not buffer:
+                batch = cursor.fetchmany(sql_mcp_server.FETCH_BATCH_SIZE)
+                if not batch:
+                    break
+                buffer.extend(batch)
+            values = convert(buffer[0])
+            size += overhead + sum(json_size(v) for v in values)
+            buffer.popleft()
+            out.append(values)
+        if result_format == "rows":
+            return [dict(zip(COLUMNS, values)) for values in out]
+        return out
+
+    return run
+
+
+def result_reader(result_format: str, typed: bool) -> Callable[[Sequence[tuple]], Any]:
+    """execute_sql's read path: _ResultReader.read, then shape."""
+
+    def run(rows: Sequence[tuple]) -> Any:
+        os.environ["MSSQL_TYPED_ROWS"] = "true" if typed else "false"
+        reader = sql_mcp_server._ResultReader(ListCursor(rows), result_format)
+        return reader.shape(reader.read(len(rows), float("inf")))
+
+    return run
+
+
+# (result format, reader before batching, current reader)
+VARIANTS: List[tuple] = [
+    ("rows", per_row_reader("rows", True), result_reader("rows", True)),
+    ("rows, MSSQL_TYPED_ROWS=false", per_row_reader("rows", False), result_reader("rows", False)),
+    ("arrays", per_row_reader("arrays", True), result_reader("arrays", True)),
+]
+
+
+def best_times(fns: Sequence[Callable[[Sequence[tuple]], Any]], rows: Sequence[tuple], repeat: int) -> List[float]:
+    """Best wall time of each function; runs are interleaved and GC is paused,
+    as timeit does, so machine noise hits every variant alike."""
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for idx, fn in enumerate(fns):
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                fn(rows)
+                best[idx] = min(best[idx], time.perf_counter() - started)
+            finally:
+                gc.enable()
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{args.rows} rows x {len(COLUMNS)} columns, best of {args.repeat}")
+    print(f"{'format':<30} {'per-row rows/s':>15} {'_ResultReader rows/s':>21} {'speedup':>8}")
+    for label, before, after in VARIANTS:
+        old, new = best_times([before, after], rows, args.repeat)
+        print(f"{label:<30} {args.rows / old:>15,.0f} {args.rows / new:>21,.0f} {old / new:>7.2f}x")
+    (reference,) = best_times([original_loop], rows, args.repeat)
+    print(f"\nreference: untyped str loop without byte accounting {args.rows / reference:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Launch sql_mcp_server on stdio against the SQLite benchmark fixture.
+
+Started by bench_mcp_tools.py (which sets DB_BACKEND=sqlite and
+SQLITE_PATH); not meant to be run by hand. One extra tool reports the
+process's peak RSS, per scenario where the OS lets it be reset.
+"""
+
+import os
+import resource
+import sys
+from typing import Any, Dict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# config.py insists on an API key even though the server never uses it
+os.environ.setdefault("OPENAI_API_KEY", "unused-by-the-server")
+
+import sql_mcp_server as server  # noqa: E402
+
+
+def _reset_peak_rss() -> bool:
+    """Restart the kernel's peak RSS (VmHWM) count; Linux only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_since_reset() -> int:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    raise OSError("no VmHWM in /proc/self/status")
+
+
+_peak_scope = "process"
+
+
+@server.mcp.tool(structured_output=True)
+def bench_process_stats(reset_peak: bool = False) -> Dict[str, Any]:
+    """Peak resident set size of this server process.
+
+    ``reset_peak`` starts a new peak; ``peak_scope`` is "reset" when the peak
+    covers the time since then, "process" when only the lifetime peak is
+    available (anything but Linux).
+    """
+    global _peak_scope
+    if reset_peak:
+        _peak_scope = "reset" if _reset_peak_rss() else "process"
+    if _peak_scope == "reset":
+        return {"peak_rss_bytes": _peak_rss_since_reset(), "peak_scope": _peak_scope}
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return {"peak_rss_bytes": peak if sys.platform == "darwin" else peak * 1024, "peak_scope": _peak_scope}
+
+
+if __name__ == "__main__":
+    try:
+        server.mcp.run()
+    finally:
+        server._shutdown()
@@ -0,0 +1,103 @@
+"""Seeded SalesAnalytics-like SQLite database for benchmarks."""
+
+import datetime
+import os
+import random
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE Customers (
+    CustomerID INTEGER PRIMARY KEY,
+    CustomerName TEXT NOT NULL,
+    Region TEXT NOT NULL,
+    Segment TEXT NOT NULL,
+    CreatedAt TEXT NOT NULL
+);
+CREATE TABLE Products (
+    ProductID INTEGER PRIMARY KEY,
+    ProductName TEXT NOT NULL,
+    Category TEXT NOT NULL,
+    UnitPrice REAL NOT NULL
+);
+CREATE TABLE Orders (
+    OrderID INTEGER PRIMARY KEY,
+    CustomerID INTEGER NOT NULL REFERENCES Customers(CustomerID),
+    OrderDate TEXT NOT NULL,
+    Status TEXT NOT NULL,
+    TotalAmount REAL NOT NULL
+);
+CREATE TABLE OrderItems (
+    OrderItemID INTEGER PRIMARY KEY,
+    OrderID INTEGER NOT NULL REFERENCES Orders(OrderID),
+    ProductID INTEGER NOT NULL REFERENCES Products(ProductID),
+    Quantity INTEGER NOT NULL,
+    UnitPrice REAL NOT NULL,
+    Discount REAL
+);
+CREATE INDEX IX_Orders_CustomerID ON Orders(CustomerID);
+CREATE INDEX IX_OrderItems_OrderID ON OrderItems(OrderID);
+"""
+
+REGIONS = ("North", "South", "East", "West", "Central")
+SEGMENTS = ("Consumer", "Corporate", "Home Office")
+CATEGORIES = ("Furniture", "Office Supplies", "Technology", "Appliances")
+STATUSES = ("Pending", "Shipped", "Delivered", "Cancelled")
+
+
+def build(path: str, scale: int = 1, seed: int = 42) -> str:
+    """Create (or reuse) the fixture at ``path``.
+
+    ``scale=1`` is 5,000 customers, 500 products, 50,000 orders and about
+    150,000 order items; the other tables grow linearly with it.
+    """
+    if os.path.exists(path):
+        db = sqlite3.connect(path)
+        try:
+            # the scale is kept in user_version so the schema stays clean
+            if db.execute("PRAGMA user_version").fetchone() == (scale,):
+                return path
+        finally:
+            db.close()
+        os.remove(path)
+
+    rnd = random.Random(seed)
+    start = datetime.datetime(2022, 1, 1)
+    customers, products, orders = 5_000 * scale, 500, 50_000 * scale
+
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    db.executemany(
+        "INSERT INTO Customers VALUES (?, ?, ?, ?, ?)",
+        (
+            (i, f"Customer {i:06d}", rnd.choice(REGIONS), rnd.choice(SEGMENTS),
+             (start - datetime.timedelta(days=rnd.randint(0, 1500))).isoformat(sep=" "))
+            for i in range(1, customers + 1)
+        ),
+    )
+    prices = {i: round(rnd.uniform(2, 2000), 2) for i in range(1, products + 1)}
+    db.executemany(
+        "INSERT INTO Products VALUES (?, ?, ?, ?)",
+        ((i, f"Product {i:04d}", rnd.choice(CATEGORIES), price) for i, price in prices.items()),
+    )
+    order_rows, item_rows = [], []
+    for order_id in range(1, orders + 1):
+        total = 0.0
+        for _ in range(rnd.randint(1, 5)):
+            product = rnd.randint(1, products)
+            quantity = rnd.randint(1, 20)
+            discount = rnd.choice((None, 0.05, 0.1, 0.2))
+            total += quantity * prices[product] * (1 - (discount or 0))
+            item_rows.append((len(item_rows) + 1, order_id, product, quantity, prices[product], discount))
+        order_rows.append((
+            order_id,
+            rnd.randint(1, customers),
+            (start + datetime.timedelta(minutes=rnd.randint(0, 1_000_000))).isoformat(sep=" "),
+            rnd.choice(STATUSES),
+            round(total, 2),
+        ))
+    db.executemany("INSERT INTO Orders VALUES (?, ?, ?, ?, ?)", order_rows)
+    db.executemany("INSERT INTO OrderItems VALUES (?, ?, ?, ?, ?, ?)", item_rows)
+    db.execute(f"PRAGMA user_version = {int(scale)}")
+    db.commit()
+    db.close()
+    return path
@@ -19,10 +19,42 @@ if not API_KEY:
 
 # Performance settings
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-MAX_CONVERSATION_HISTORY = int(os.getenv("MAX_CONVERSATION_HISTORY", "50"))
+# Seconds before a model request is abandoned, and how often it is retried
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+# Print answer tokens as they arrive instead of after the full completion
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").strip().lower() in ("1", "true", "yes")
+# Token budget for the conversation sent to the model; tool results larger
+# than TOOL_RESULT_ELIDE_TOKENS from earlier turns are summarized first
+MAX_CONVERSATION_TOKENS = int(os.getenv("MAX_CONVERSATION_TOKENS", "32000"))
+TOOL_RESULT_ELIDE_TOKENS = int(os.getenv("TOOL_RESULT_ELIDE_TOKENS", "1000"))
+
+# How tool results are written into the conversation: "csv" or "table" render
+# tabular results compactly and cap them at TOOL_RESULT_MAX_TOKENS (showing
+# the first/last TOOL_RESULT_SAMPLE_ROWS rows plus column statistics);
+# "json" passes the raw result through unchanged
+TOOL_RESULT_FORMAT = os.getenv("TOOL_RESULT_FORMAT", "csv").strip().lower()
+TOOL_RESULT_MAX_TOKENS = int(os.getenv("TOOL_RESULT_MAX_TOKENS", "2000"))
+TOOL_RESULT_SAMPLE_ROWS = int(os.getenv("TOOL_RESULT_SAMPLE_ROWS", "10"))
+# How many tool calls from one model response may run at the same time
+MAX_PARALLEL_TOOL_CALLS = max(1, int(os.getenv("MAX_PARALLEL_TOOL_CALLS", "4")))
+# URL of a running sql_mcp_server started with --transport streamable-http
+# (http://127.0.0.1:8000/mcp) or sse (.../sse); empty spawns a private
+# server over stdio for this agent process
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "").strip() or None
+# Append OpenTelemetry (OTLP/JSON) trace spans for each turn to this file;
+# the MCP server writes its spans to the same file. Unset disables tracing.
+TRACE_FILE = os.getenv("TRACE_FILE", "").strip() or None
 
 # Database Configuration
+# DB_BACKEND picks the engine: "mssql" (SQL Server over pyodbc) or "sqlite"
+# (the file at SQLITE_PATH – no server or password needed)
+DB_BACKEND = os.getenv("DB_BACKEND", "mssql").strip().lower()
+DB_DIALECTS = {"mssql": "SQL Server", "sqlite": "SQLite"}
+
 DB_CONFIG = {
+    "backend": DB_BACKEND,
+    "sqlite_path": os.getenv("SQLITE_PATH", "SalesAnalytics.db"),
     "server": os.getenv("DB_SERVER", "localhost"),
     "database": os.getenv("DB_NAME", "SalesAnalytics"),
     "username": os.getenv("DB_USER", "sa"),
@@ -31,7 +63,12 @@ DB_CONFIG = {
     "driver": os.getenv("DB_DRIVER", "ODBC Driver 17 for SQL Server")
 }
 
-if not DB_CONFIG["password"]:
+if DB_BACKEND not in DB_DIALECTS:
+    raise SystemExit(
+        f"Unknown DB_BACKEND {DB_BACKEND!r} – use one of: {', '.join(DB_DIALECTS)}."
+    )
+
+if DB_BACKEND == "mssql" and not DB_CONFIG["password"]:
     raise SystemExit(
         "Database password missing – please set the DB_PASSWORD environment "
         "variable in your .env file or system environment."
@@ -41,18 +78,34 @@ if not DB_CONFIG["password"]:
 # This will be populated at runtime by the MCP client
 FUNCTIONS_SPEC = []
 
-SYSTEM_PROMPT = """You are an expert data assistant with access to a SQL Server database.
+SYSTEM_PROMPT = """You are an expert data assistant with access to a {dialect} database.
 
 Available tools:
 1. list_tables() - See all tables in the database
 2. describe_table(table_name) - Examine table schema and columns
-3. execute_sql(query) - Run any SQL query
+3. describe_tables(table_names, include_keys) - Examine several tables in one call, optionally with keys and indexes
+4. execute_sql(query, page_size, result_format, timeout_seconds, store) - Run any SQL query; pass page_size to page through large SELECTs, or store=True to keep a large result on the server behind a handle
+5. fetch_more(continuation_token, page_size) - Fetch the next page of a paged execute_sql result
+6. read_result(handle, offset, limit, columns, filters, order_by) - Page, filter and sort a result stored with execute_sql(store=True)
+7. aggregate_result(handle, aggregates, group_by, filters) - count/sum/avg/min/max over a stored result
+8. export_result(handle, file_name, format) - Write a stored result to a CSV or JSONL file on the server
+9. export_query(query, file_name, format) - Stream a full SELECT result to a Parquet, Arrow or CSV file on the server
+10. drop_result(handle) - Discard a stored result you no longer need
+11. refresh_schema_cache() - Re-read table and column metadata after the schema changed outside this conversation
+12. slow_queries(top_n, sort_by, include_plans) - See the most expensive query shapes, optionally with their execution plans
 
 Best practices:
 - Always explore the database structure first if unsure about table names or columns
 - Use describe_table before writing complex queries to understand the schema
+- When a query joins several tables, describe them together with describe_tables
 - Write efficient queries with appropriate JOINs and WHERE clauses
 - For analysis tasks, break down complex requirements into multiple queries
+- Prefer result_format="arrays" for SELECTs returning many rows – column names are sent once
+- Use page_size for SELECTs that may return many rows, and only call fetch_more when you need more data
+- When the user wants data extracted or saved rather than analysed, use export_query – the rows never enter the conversation
+- For large results you will want to explore in several ways, run execute_sql once with store=True and work on the handle instead of re-running the query
 - Present results clearly with explanations of what the data shows
 
-The database name is 'SalesAnalytics'. You can execute both read and write operations.""" 
\ No newline at end of file
+The database name is 'SalesAnalytics'. You can execute both read and write operations.""".format(
+    dialect=DB_DIALECTS[DB_BACKEND]
+) 
\ No newline at end of file
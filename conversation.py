@@ -0,0 +1,174 @@
+"""Token-budgeted conversation history for the SQL AI agent."""
+
+import json
+import logging
+from typing import Any, Optional
+
+try:
+    import tiktoken  # type: ignore
+except ImportError:  # optional – fall back to a character-based estimate
+    tiktoken = None
+
+# Rough per-message framing cost the chat API adds on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def make_token_counter(model: str):
+    """Return a text -> token count function for ``model``."""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    # ~4 characters per token for English text and JSON
+    return lambda text: (len(text) + 3) // 4
+
+
+def _summarize_tool_content(content: str, tokens: int) -> str:
+    """Short stand-in for a tool result that no longer fits the budget."""
+    summary: dict[str, Any] = {"elided": True, "original_tokens": tokens}
+    try:
+        parsed = json.loads(content)
+    except (TypeError, ValueError):
+        parsed = None
+    if isinstance(parsed, dict):
+        # keep small scalar facts (row_count, type, table_name, …) and sizes
+        for key, value in parsed.items():
+            if key == "columns" and isinstance(value, list):
+                summary[key] = value[:50]
+            elif isinstance(value, (list, dict)):
+                summary[f"{key}_count"] = len(value)
+            elif value is None or isinstance(value, (bool, int, float)) or len(str(value)) <= 80:
+                summary[key] = value
+    elif isinstance(parsed, list):
+        summary["items"] = len(parsed)
+        summary["preview"] = content[:200]
+    else:
+        summary["preview"] = content[:200]
+    summary["note"] = "Result removed to save context; re-run the tool if you need it."
+    return json.dumps(summary, default=str)
+
+
+class ConversationHistory:
+    """Chat messages kept under a token budget.
+
+    Messages are grouped so an assistant message with ``tool_calls`` and the
+    ``tool`` messages answering it are always kept or dropped together. When
+    the budget is exceeded, large tool results from earlier turns are first
+    replaced by short summaries, then the oldest groups are dropped, then
+    large results from earlier tool rounds of the current turn are
+    summarized too. The system prompt, the current turn's messages and its
+    latest tool round are always kept whole.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        *,
+        token_budget: int,
+        elide_threshold: int,
+        model: str,
+    ):
+        self.token_budget = token_budget
+        self.elide_threshold = elide_threshold
+        self._count = make_token_counter(model)
+        self.messages: list[dict] = []
+        self._tokens: list[int] = []
+        self.append({"role": "system", "content": system_prompt})
+
+    def _message_tokens(self, message: dict) -> int:
+        text = message.get("content") or ""
+        if not isinstance(text, str):
+            text = json.dumps(text, default=str)
+        tokens = MESSAGE_OVERHEAD_TOKENS + self._count(text)
+        for call in message.get("tool_calls") or []:
+            function = call.get("function", {})
+            tokens += self._count(function.get("name", "") + function.get("arguments", ""))
+        return tokens
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self._tokens)
+
+    def append(self, message: dict) -> None:
+        self.messages.append(message)
+        self._tokens.append(self._message_tokens(message))
+
+    def extend(self, messages: list[dict]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def _groups(self) -> list[tuple[int, int]]:
+        """``(start, end)`` index ranges of droppable units after the system prompt."""
+        groups = []
+        i = 1
+        while i < len(self.messages):
+            end = i + 1
+            if self.messages[i].get("tool_calls"):
+                while end < len(self.messages) and self.messages[end].get("role") == "tool":
+                    end += 1
+            groups.append((i, end))
+            i = end
+        return groups
+
+    def _current_turn_start(self) -> int:
+        """Index of the latest user message (everything after it is in flight)."""
+        for i in range(len(self.messages) - 1, 0, -1):
+            if self.messages[i].get("role") == "user":
+                return i
+        return len(self.messages)
+
+    def _latest_round_start(self, turn_start: int) -> int:
+        """Index of the current turn's last assistant message with tool calls."""
+        for i in range(len(self.messages) - 1, turn_start, -1):
+            if self.messages[i].get("tool_calls"):
+                return i
+        return len(self.messages)
+
+    def _elide(self, start: int, end: int, total: int) -> int:
+        """Summarize large tool results in ``[start, end)``, oldest first, until
+        ``total`` fits the budget; returns the new total."""
+        for i in range(start, end):
+            if total <= self.token_budget:
+                break
+            message = self.messages[i]
+            if message.get("role") != "tool" or self._tokens[i] <= self.elide_threshold:
+                continue
+            summarized = {**message, "content": _summarize_tool_content(message["content"], self._tokens[i])}
+            new_tokens = self._message_tokens(summarized)
+            total += new_tokens - self._tokens[i]
+            self.messages[i], self._tokens[i] = summarized, new_tokens
+        return total
+
+    def compact(self) -> None:
+        """Bring the history back under ``token_budget`` if it has grown past it."""
+        total = self.total_tokens
+        if total <= self.token_budget:
+            return
+        turn_start = self._current_turn_start()
+
+        # 1. Summarize large tool results from earlier turns, oldest first
+        total = self._elide(1, turn_start, total)
+
+        # 2. Drop whole groups from the oldest end, never touching the current turn
+        drop_until: Optional[int] = None
+        for start, end in self._groups():
+            if total <= self.token_budget or end > turn_start:
+                break
+            total -= sum(self._tokens[start:end])
+            drop_until = end
+        if drop_until is not None:
+            del self.messages[1:drop_until]
+            del self._tokens[1:drop_until]
+            turn_start -= drop_until - 1
+
+        # 3. Summarize large results of the current turn's earlier tool rounds;
+        # the latest round is what the model is about to act on
+        total = self._elide(turn_start, self._latest_round_start(turn_start), total)
+        if total > self.token_budget:
+            logging.warning(
+                "Conversation is %d tokens, over its %d token budget, after compaction; "
+                "the current turn's latest tool results are kept whole",
+                total, self.token_budget,
+            )
@@ -0,0 +1,655 @@
+"""Database backends for the SQL MCP server.
+
+A backend owns everything that differs between database engines: opening a
+DB-API connection, statement timeouts, row-limit rewriting and the catalog
+queries behind list_tables/describe_table(s). Executing statements and
+streaming rows go through the plain DB-API cursor the backend hands out, so
+the server's result readers, cursors and exports work unchanged on every
+backend.
+
+Pick one with ``DB_BACKEND``: ``mssql`` (SQL Server over pyodbc, the
+default) or ``sqlite`` (a local file, handy for development and benchmarks).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import os
+import re
+import sqlite3
+import time
+import urllib.parse
+
+try:
+    import pyodbc  # type: ignore
+except ImportError:  # only the mssql backend needs it
+    pyodbc = None
+
+
+def schema_key(schema: Optional[str], table: str) -> Tuple[str, str]:
+    # SQL Server identifiers are case-insensitive under the default collations
+    return ((schema or "").lower(), table.lower())
+
+
+def requested_keys(schema: str, table: str) -> Tuple[Tuple[str, str], Tuple[str, str]]:
+    """Cache keys a metadata row for ``schema.table`` can satisfy."""
+    key = schema_key(schema, table)
+    return key, ("", key[1])
+
+
+def _empty_constraints(keys: List[Tuple[str, str]]) -> Dict[Any, Any]:
+    return {("constraints",) + key: {"keys": [], "indexes": []} for key in keys}
+
+
+class DatabaseBackend:
+    """Engine-specific connection and catalog access for the server."""
+
+    #: value of ``DB_BACKEND`` that selects this backend
+    name = ""
+    #: SQL dialect shown to the model
+    dialect = ""
+    #: base class of the driver's errors
+    Error: Any = Exception
+
+    def connect(self):
+        """Open a brand-new DB-API connection."""
+        raise NotImplementedError
+
+    def set_timeout(self, conn, seconds: int) -> None:
+        """Limit statements run on ``conn`` to ``seconds`` (0 = no limit)."""
+        raise NotImplementedError
+
+    def is_timeout(self, exc: Exception) -> bool:
+        """Whether a driver error means the statement timeout fired."""
+        return False
+
+    def limit_query(self, query: str, limit: int) -> Tuple[str, bool]:
+        """Rewrite a SELECT so the database stops after ``limit`` rows.
+
+        Returns the (possibly unchanged) query and whether it was rewritten.
+        """
+        return query, False
+
+    def explain(self, conn, query: str) -> Optional[str]:
+        """The estimated plan for ``query``, without running it (None if unsupported)."""
+        return None
+
+    def schema_version(self, conn) -> Tuple[Any, ...]:
+        """A cheap value that changes whenever tables or views change."""
+        raise NotImplementedError
+
+    def list_tables(self, conn) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    def describe_columns(self, conn, keys: List[Tuple[str, str]]) -> Dict[Any, Any]:
+        """Columns for every ``(schema, table)`` key (empty list if unknown)."""
+        raise NotImplementedError
+
+    def describe_constraints(self, conn, keys: List[Tuple[str, str]]) -> Dict[Any, Any]:
+        """Keys and indexes, keyed by ``("constraints", schema, table)``."""
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        """Backend details for server_stats (no credentials)."""
+        return {"name": self.name}
+
+
+# ---------------------------------------------------------------------------
+# SQL Server (pyodbc)
+# ---------------------------------------------------------------------------
+
+_SELECT_HEAD = re.compile(r"^\s*SELECT\s+(?:(?:ALL|DISTINCT)\s+)?", re.IGNORECASE)
+# Constructs where a leading TOP would change the meaning or be rejected
+_NO_TOP = re.compile(
+    r"^\s*SELECT\s+(?:(?:ALL|DISTINCT)\s+)?TOP\b|\b(?:UNION|INTERSECT|EXCEPT|INTO|OFFSET)\b|;\s*\S",
+    re.IGNORECASE,
+)
+
+# Object count plus newest modify_date changes whenever a table or view is
+# created, dropped or altered (adding a column bumps the table's modify_date)
+_SCHEMA_VERSION_SQL = """
+    SELECT COUNT(*), MAX(modify_date)
+    FROM sys.objects
+    WHERE type IN ('U', 'V')
+"""
+
+
+def _name_filter(
+    names: List[Tuple[str, str]], schema_col: str, table_col: str
+) -> Tuple[str, List[str]]:
+    """``(schema = ? AND table = ?) OR ...`` for schema keys; '' schema matches any."""
+    clauses, params = [], []
+    for schema, table in names:
+        if schema:
+            clauses.append(f"({table_col} = ? AND {schema_col} = ?)")
+            params.extend([table, schema])
+        else:
+            clauses.append(f"{table_col} = ?")
+            params.append(table)
+    return " OR ".join(clauses), params
+
+
+class SqlServerBackend(DatabaseBackend):
+    """SQL Server through pyodbc and the configured ODBC driver."""
+
+    name = "mssql"
+    dialect = "SQL Server"
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        if pyodbc is None:
+            raise RuntimeError("DB_BACKEND=mssql needs pyodbc – pip install pyodbc")
+        self.config = config
+        self.Error = pyodbc.Error
+
+    def _connect_timeout(self) -> int:
+        return int(
+            os.getenv("MSSQL_CONNECT_TIMEOUT", str(self.config["connect_timeout_ms"] // 1000))
+        )
+
+    def connection_string(self) -> str:
+        """Assemble an ODBC connection string from env vars."""
+
+        encrypt = bool(
+            os.getenv("MSSQL_ENCRYPT")
+            or ("true" if self.config["encrypt"] else "false")
+        ).__str__().lower() == "true"
+
+        trust_cert = bool(
+            os.getenv("MSSQL_TRUST_SERVER_CERTIFICATE")
+            or ("true" if self.config["trust_cert"] else "false")
+        ).__str__().lower() == "true"
+
+        parts = [
+            f"Driver={{{os.getenv('DB_DRIVER', self.config['driver'])}}}",
+            # host,port
+            f"Server={os.getenv('DB_SERVER', self.config['server'])},"
+            f"{os.getenv('DB_PORT', self.config['port'])}",
+            f"Database={os.getenv('DB_NAME', self.config['database'])}",
+            f"UID={os.getenv('DB_USER', self.config['user'])}",
+            f"PWD={os.getenv('DB_PASSWORD', self.config['password'])}",
+        ]
+
+        if encrypt:
+            parts.append("Encrypt=yes")
+            parts.append(f"TrustServerCertificate={'yes' if trust_cert else 'no'}")
+        else:
+            parts.append("Encrypt=no")
+
+        parts.append(f"Connection Timeout={self._connect_timeout()}")
+
+        return ";".join(parts)
+
+    def connect(self):
+        """Open a brand-new pyodbc connection (full TCP/TLS/login handshake)."""
+        return pyodbc.connect(self.connection_string(), ansi=True, timeout=self._connect_timeout())
+
+    def set_timeout(self, conn, seconds: int) -> None:
+        # applies to cursors created from here on (SQL_ATTR_QUERY_TIMEOUT)
+        conn.timeout = seconds
+
+    def is_timeout(self, exc: Exception) -> bool:
+        return bool(exc.args) and exc.args[0] == "HYT00"  # ODBC "timeout expired"
+
+    def limit_query(self, query: str, limit: int) -> Tuple[str, bool]:
+        """Rewrite a plain SELECT as ``SELECT TOP (limit)``.
+
+        Queries that already use TOP, OFFSET/FETCH, set operators, SELECT INTO
+        or several statements are left alone; the fetchmany cap still applies.
+        """
+        head = _SELECT_HEAD.match(query)
+        if head is None or _NO_TOP.search(query):
+            return query, False
+        return f"{query[:head.end()]}TOP ({limit}) {query[head.end():]}", True
+
+    def explain(self, conn, query: str) -> Optional[str]:
+        """Showplan XML: with SHOWPLAN_XML on, statements are compiled, not run."""
+        cur = conn.cursor()
+        # SET SHOWPLAN_XML must be alone in its batch
+        cur.execute("SET SHOWPLAN_XML ON")
+        try:
+            cur.execute(query)
+            plans = []
+            while True:  # one plan per statement in the batch
+                plans.extend(row[0] for row in cur.fetchall())
+                if not cur.nextset():
+                    break
+            return "\n".join(plans) or None
+        finally:
+            cur.execute("SET SHOWPLAN_XML OFF")
+            cur.close()
+
+    def schema_version(self, conn) -> Tuple[Any, ...]:
+        cur = conn.cursor()
+        cur.execute(_SCHEMA_VERSION_SQL)
+        return tuple(cur.fetchone())
+
+    def list_tables(self, conn) -> List[Dict[str, str]]:
+        logging.info("Listing all tables in database")
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT TABLE_SCHEMA, TABLE_NAME, TABLE_TYPE
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_SCHEMA, TABLE_NAME
+        """)
+
+        rows = cur.fetchall()
+        return [
+            {
+                "schema": row[0],    # TABLE_SCHEMA
+                "table": row[1],     # TABLE_NAME
+                "type": row[2]       # TABLE_TYPE
+            }
+            for row in rows
+        ]
+
+    def describe_columns(self, conn, keys: List[Tuple[str, str]]) -> Dict[Any, Any]:
+        """Fetch columns for every ``(schema, table)`` key in one query."""
+        logging.info("Describing tables: %s", ", ".join(f"{s}.{t}" if s else t for s, t in keys))
+        where, params = _name_filter(keys, "c.TABLE_SCHEMA", "c.TABLE_NAME")
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT
+                c.COLUMN_NAME,
+                c.DATA_TYPE,
+                c.CHARACTER_MAXIMUM_LENGTH,
+                c.NUMERIC_PRECISION,
+                c.NUMERIC_SCALE,
+                c.IS_NULLABLE,
+                c.COLUMN_DEFAULT,
+                c.ORDINAL_POSITION,
+                c.TABLE_SCHEMA,
+                c.TABLE_NAME
+            FROM INFORMATION_SCHEMA.COLUMNS c
+            WHERE {where}
+            ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+        """, *params)
+
+        wanted = set(keys)
+        result: Dict[Any, Any] = {key: [] for key in keys}
+        for row in cur.fetchall():
+            col_info = {
+                "name": row[0],
+                "type": row[1],
+                "max_length": row[2],
+                "precision": row[3],
+                "scale": row[4],
+                "nullable": row[5] == "YES",
+                "default": row[6],
+                "position": row[7]
+            }
+            for key in requested_keys(row[8], row[9]):
+                if key in wanted:
+                    result[key].append(col_info)
+        return result
+
+    def describe_constraints(self, conn, keys: List[Tuple[str, str]]) -> Dict[Any, Any]:
+        """Fetch keys and indexes for every ``(schema, table)`` key in one batch."""
+        key_where, key_params = _name_filter(keys, "tc.TABLE_SCHEMA", "tc.TABLE_NAME")
+        idx_where, idx_params = _name_filter(keys, "s.name", "t.name")
+        cur = conn.cursor()
+        # Two result sets, one round trip
+        cur.execute(f"""
+            SELECT tc.TABLE_SCHEMA, tc.TABLE_NAME, tc.CONSTRAINT_NAME, tc.CONSTRAINT_TYPE,
+                   kcu.COLUMN_NAME, rkcu.TABLE_SCHEMA, rkcu.TABLE_NAME, rkcu.COLUMN_NAME
+            FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+            JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+              ON kcu.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+             AND kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+            LEFT JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+              ON rc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+             AND rc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+            LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE rkcu
+              ON rkcu.CONSTRAINT_SCHEMA = rc.UNIQUE_CONSTRAINT_SCHEMA
+             AND rkcu.CONSTRAINT_NAME = rc.UNIQUE_CONSTRAINT_NAME
+             AND rkcu.ORDINAL_POSITION = kcu.ORDINAL_POSITION
+            WHERE tc.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'FOREIGN KEY', 'UNIQUE')
+              AND ({key_where})
+            ORDER BY tc.TABLE_SCHEMA, tc.TABLE_NAME, tc.CONSTRAINT_NAME, kcu.ORDINAL_POSITION;
+
+            SELECT s.name, t.name, i.name, i.type_desc, i.is_unique, i.is_primary_key,
+                   c.name, ic.is_included_column
+            FROM sys.indexes i
+            JOIN sys.tables t ON t.object_id = i.object_id
+            JOIN sys.schemas s ON s.schema_id = t.schema_id
+            JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+            JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+            WHERE i.type > 0 AND ({idx_where})
+            ORDER BY s.name, t.name, i.name, ic.is_included_column, ic.key_ordinal;
+        """, *key_params, *idx_params)
+
+        wanted = set(keys)
+        result = _empty_constraints(keys)
+
+        def _entries(row, section: str, make: Callable[[], Dict]) -> List[Dict]:
+            """The constraint/index dicts this row contributes a column to."""
+            entries = []
+            table = f"{row[0]}.{row[1]}"
+            for key in requested_keys(row[0], row[1]):
+                if key in wanted:
+                    items = result[("constraints",) + key][section]
+                    # rows arrive ordered, so a new name means a new constraint/index
+                    if not items or items[-1]["name"] != row[2] or items[-1]["table"] != table:
+                        items.append(make())
+                    entries.append(items[-1])
+            return entries
+
+        for row in cur.fetchall():
+            for key_info in _entries(row, "keys", lambda: {
+                "name": row[2],
+                "table": f"{row[0]}.{row[1]}",
+                "type": row[3],
+                "columns": [],
+                **({"references": {"table": f"{row[5]}.{row[6]}", "columns": []}} if row[6] else {}),
+            }):
+                key_info["columns"].append(row[4])
+                if row[6]:
+                    key_info["references"]["columns"].append(row[7])
+
+        cur.nextset()
+        for row in cur.fetchall():
+            for index_info in _entries(row, "indexes", lambda: {
+                "name": row[2],
+                "table": f"{row[0]}.{row[1]}",
+                "type": row[3],
+                "unique": bool(row[4]),
+                "primary_key": bool(row[5]),
+                "columns": [],
+                "included_columns": [],
+            }):
+                index_info["included_columns" if row[7] else "columns"].append(row[6])
+        return result
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "driver": os.getenv("DB_DRIVER", self.config["driver"]),
+            "server": os.getenv("DB_SERVER", self.config["server"]),
+            "database": os.getenv("DB_NAME", self.config["database"]),
+        }
+
+
+# ---------------------------------------------------------------------------
+# SQLite (standard library)
+# ---------------------------------------------------------------------------
+
+class SqliteTimeout(sqlite3.OperationalError):
+    """A statement ran past the connection's timeout and was interrupted."""
+
+
+# SQLite VM instructions between deadline checks
+_PROGRESS_STEPS = 10_000
+_LIMIT_HEAD = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+_NO_LIMIT = re.compile(r"\bLIMIT\b|;\s*\S", re.IGNORECASE)
+_DECLARED_TYPE = re.compile(r"^\s*([A-Za-z][\w ]*?)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*$")
+_SIZED_TYPES = ("char", "text", "clob", "binary", "blob")
+
+
+class _SqliteCursor:
+    """pyodbc-flavoured cursor over sqlite3.
+
+    Accepts ``execute(sql, *params)`` like pyodbc and turns an interrupt
+    caused by the connection's deadline into :class:`SqliteTimeout`. Every
+    column reports a ``type_code`` of ``None``: SQLite types values, not
+    columns, so one column can hold text, integers and blobs.
+    """
+
+    def __init__(self, connection: "_SqliteConnection") -> None:
+        self.connection = connection
+        self._cur = connection._db.cursor()
+        self.description: Optional[List[tuple]] = None
+        self.rowcount = -1
+
+    def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return fn(*args)
+        except sqlite3.OperationalError as exc:
+            if self.connection.deadline_passed():
+                raise SqliteTimeout(f"statement exceeded {self.connection.timeout}s") from exc
+            raise
+
+    def execute(self, sql: str, *params: Any) -> "_SqliteCursor":
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = tuple(params[0])
+        self.connection.start_statement()
+        self._call(self._cur.execute, sql, params)
+        self.rowcount = self._cur.rowcount
+        if self._cur.description is None:
+            self.description = None
+        else:
+            self.description = [(d[0], None, None, None, None, None, True) for d in self._cur.description]
+        return self
+
+    def fetchmany(self, size: int = 1) -> List[tuple]:
+        return self._call(self._cur.fetchmany, size)
+
+    def fetchall(self) -> List[tuple]:
+        return self._call(self._cur.fetchall)
+
+    def fetchone(self) -> Optional[tuple]:
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def nextset(self) -> bool:
+        return False
+
+    def cancel(self) -> None:
+        self.connection._db.interrupt()
+
+    def close(self) -> None:
+        self._cur.close()
+
+
+class _SqliteConnection:
+    """sqlite3 connection with a pyodbc-style ``timeout`` attribute (seconds)."""
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+        self.timeout = 0
+        self._deadline = float("inf")
+        db.set_progress_handler(self._progress, _PROGRESS_STEPS)
+
+    def _progress(self) -> int:
+        # non-zero aborts the running statement with "interrupted"
+        return 1 if time.monotonic() > self._deadline else 0
+
+    def start_statement(self) -> None:
+        self._deadline = time.monotonic() + self.timeout if self.timeout else float("inf")
+
+    def deadline_passed(self) -> bool:
+        return time.monotonic() > self._deadline
+
+    def cursor(self) -> _SqliteCursor:
+        return _SqliteCursor(self)
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def rollback(self) -> None:
+        self._db.rollback()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class SqliteBackend(DatabaseBackend):
+    """A SQLite database file through the standard library's sqlite3.
+
+    Tables live in the ``main`` schema; names compare case-insensitively as
+    SQLite itself does.
+    """
+
+    name = "sqlite"
+    dialect = "SQLite"
+    Error = sqlite3.Error
+
+    def __init__(self, path: str, connect_timeout: float = 30.0) -> None:
+        self.path = path
+        self.connect_timeout = connect_timeout
+
+    def connect(self):
+        # mode=rw: a mistyped path fails instead of creating an empty database
+        uri = self.path if self.path.startswith("file:") else (
+            f"file:{urllib.parse.quote(os.path.abspath(self.path))}?mode=rw"
+        )
+        try:
+            db = sqlite3.connect(
+                uri,
+                timeout=self.connect_timeout,  # how long to wait on a locked database
+                check_same_thread=False,       # pooled connections move between threads
+                uri=True,
+            )
+        except sqlite3.OperationalError as exc:
+            raise sqlite3.OperationalError(f"Cannot open SQLite database {self.path!r}: {exc}") from exc
+        return _SqliteConnection(db)
+
+    def set_timeout(self, conn, seconds: int) -> None:
+        conn.timeout = seconds
+
+    def is_timeout(self, exc: Exception) -> bool:
+        return isinstance(exc, SqliteTimeout)
+
+    def limit_query(self, query: str, limit: int) -> Tuple[str, bool]:
+        """Append ``LIMIT`` to a single SELECT/WITH statement that has none."""
+        if _LIMIT_HEAD.match(query) is None or _NO_LIMIT.search(query):
+            return query, False
+        # newline so a trailing -- comment cannot swallow the clause
+        return f"{query.rstrip().rstrip(';')}\nLIMIT {limit}", True
+
+    def explain(self, conn, query: str) -> Optional[str]:
+        """``EXPLAIN QUERY PLAN`` as an indented tree of plan steps."""
+        cur = conn.cursor()
+        cur.execute(f"EXPLAIN QUERY PLAN {query.rstrip().rstrip(';')}")
+        depth: Dict[int, int] = {0: -1}
+        lines = []
+        for node, parent, _, detail in cur.fetchall():
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node] + detail)
+        cur.close()
+        return "\n".join(lines) or None
+
+    def schema_version(self, conn) -> Tuple[Any, ...]:
+        # bumped by SQLite on every schema change
+        cur = conn.cursor()
+        cur.execute("PRAGMA schema_version")
+        return tuple(cur.fetchone())
+
+    def _tables(self, conn, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Actual table/view names for the requested keys, by key."""
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        )
+        by_name = {row[0].lower(): row[0] for row in cur.fetchall()}
+        found = {}
+        for key in keys:
+            schema, table = key
+            if schema in ("", "main") and table in by_name:
+                found[key] = by_name[table]
+        return found
+
+    def list_tables(self, conn) -> List[Dict[str, str]]:
+        logging.info("Listing all tables in database")
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+        """)
+        return [{"schema": "main", "table": row[0], "type": "BASE TABLE"} for row in cur.fetchall()]
+
+    def describe_columns(self, conn, keys: List[Tuple[str, str]]) -> Dict[Any, Any]:
+        logging.info("Describing tables: %s", ", ".join(f"{s}.{t}" if s else t for s, t in keys))
+        result: Dict[Any, Any] = {key: [] for key in keys}
+        cur = conn.cursor()
+        for key, table in self._tables(conn, keys).items():
+            cur.execute(
+                'SELECT name, type, "notnull", dflt_value, cid FROM pragma_table_info(?) ORDER BY cid',
+                table,
+            )
+            for name, declared, notnull, default, cid in cur.fetchall():
+                match = _DECLARED_TYPE.match(declared or "")
+                data_type = match.group(1).lower() if match else (declared or "").lower()
+                size = int(match.group(2)) if match and match.group(2) else None
+                scale = int(match.group(3)) if match and match.group(3) else None
+                sized = any(word in data_type for word in _SIZED_TYPES)
+                result[key].append({
+                    "name": name,
+                    "type": data_type,
+                    "max_length": size if sized else None,
+                    "precision": None if sized else size,
+                    "scale": None if sized else scale,
+                    "nullable": not notnull,
+                    "default": default,
+                    "position": cid + 1,
+                })
+        return result
+
+    def describe_constraints(self, conn, keys: List[Tuple[str, str]]) -> Dict[Any, Any]:
+        result = _empty_constraints(keys)
+        cur = conn.cursor()
+        for key, table in self._tables(conn, keys).items():
+            qualified = f"main.{table}"
+            info = result[("constraints",) + key]
+
+            cur.execute("SELECT name FROM pragma_table_info(?) WHERE pk > 0 ORDER BY pk", table)
+            primary = [row[0] for row in cur.fetchall()]
+            if primary:
+                info["keys"].append({
+                    "name": f"PK_{table}", "table": qualified, "type": "PRIMARY KEY", "columns": primary,
+                })
+
+            cur.execute(
+                'SELECT id, "table", "from", "to" FROM pragma_foreign_key_list(?) ORDER BY id, seq', table
+            )
+            for fk_id, ref_table, column, ref_column in cur.fetchall():
+                name = f"FK_{table}_{fk_id}"
+                if not info["keys"] or info["keys"][-1]["name"] != name:
+                    info["keys"].append({
+                        "name": name,
+                        "table": qualified,
+                        "type": "FOREIGN KEY",
+                        "columns": [],
+                        "references": {"table": f"main.{ref_table}", "columns": []},
+                    })
+                info["keys"][-1]["columns"].append(column)
+                # NULL "to" means the referenced table's primary key
+                info["keys"][-1]["references"]["columns"].append(ref_column)
+
+            cur.execute("SELECT name, \"unique\", origin FROM pragma_index_list(?) ORDER BY name", table)
+            for index_name, unique, origin in cur.fetchall():
+                cur.execute(
+                    "SELECT name FROM pragma_index_info(?) ORDER BY seqno", index_name
+                )
+                columns = [row[0] for row in cur.fetchall()]
+                if origin == "u":
+                    info["keys"].append({
+                        "name": index_name, "table": qualified, "type": "UNIQUE", "columns": columns,
+                    })
+                info["indexes"].append({
+                    "name": index_name,
+                    "table": qualified,
+                    "type": "BTREE",
+                    "unique": bool(unique),
+                    "primary_key": origin == "pk",
+                    "columns": columns,
+                    "included_columns": [],
+                })
+        return result
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "path": self.path}
+
+
+BACKENDS = ("mssql", "sqlite")
+
+
+def create_backend(config: Dict[str, Any]) -> DatabaseBackend:
+    """The backend named by ``config["backend"]`` (``DB_BACKEND``)."""
+    name = (config.get("backend") or "mssql").strip().lower()
+    if name == "mssql":
+        return SqlServerBackend(config)
+    if name == "sqlite":
+        return SqliteBackend(
+            config["sqlite_path"], connect_timeout=config["connect_timeout_ms"] / 1000
+        )
+    raise ValueError(f"unknown DB_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
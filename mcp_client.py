@@ -1,10 +1,15 @@
 """MCP client for database tool interactions."""
 
+import asyncio
 import json
 from typing import Any, Optional
 from contextlib import AsyncExitStack
 from mcp import ClientSession
+from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client, StdioServerParameters
+from mcp.client.streamable_http import streamable_http_client
+from config import MCP_SERVER_URL, TRACE_FILE
+import tracing
 
 class MCPClient:
     """MCP Client following official documentation patterns."""
@@ -15,22 +20,37 @@ class MCPClient:
         self.exit_stack = AsyncExitStack()
         self.available_tools = []
     
-    async def connect_to_server(self, server_script_path: str = "sql_mcp_server.py"):
+    async def connect_to_server(
+        self, server_script_path: str = "sql_mcp_server.py", server_url: Optional[str] = None
+    ):
         """Connect to an MCP server and maintain persistent connection.
         
         Args:
-            server_script_path: Path to the server script
+            server_script_path: Path to the server script, spawned over stdio
+            server_url: URL of an already running server (``.../mcp`` for
+                streamable HTTP, ``.../sse`` for SSE); overrides the script
         """
-        server_params = StdioServerParameters(
-            command="python",
-            args=[server_script_path],
-            env=None
-        )
+        if server_url:
+            if server_url.rstrip("/").endswith("/sse"):
+                transport = await self.exit_stack.enter_async_context(sse_client(server_url))
+            else:
+                transport = await self.exit_stack.enter_async_context(
+                    streamable_http_client(server_url)
+                )
+            # streamable HTTP also yields a session-id getter
+            self.stdio, self.write = transport[0], transport[1]
+        else:
+            server_params = StdioServerParameters(
+                command="python",
+                args=[server_script_path],
+                # the server traces into the same file, so turns show its spans
+                env={"TRACE_FILE": TRACE_FILE} if TRACE_FILE else None
+            )
 
-        stdio_transport = await self.exit_stack.enter_async_context(
-            stdio_client(server_params)
-        )
-        self.stdio, self.write = stdio_transport
+            stdio_transport = await self.exit_stack.enter_async_context(
+                stdio_client(server_params)
+            )
+            self.stdio, self.write = stdio_transport
         self.session = await self.exit_stack.enter_async_context(
             ClientSession(self.stdio, self.write)
         )
@@ -64,11 +84,18 @@ class MCPClient:
         if not self.session:
             raise ValueError("MCP session not initialized. Call connect_to_server() first.")
         
-        try:
-            raw_result = await self.session.call_tool(tool_name, arguments=arguments)
-            
-        except Exception as e:
-            raise RuntimeError(f"MCP tool '{tool_name}' execution failure: {e}")
+        with tracing.span(
+            f"mcp.call_tool {tool_name}", kind=tracing.CLIENT, attributes={"mcp.tool": tool_name}
+        ) as span:
+            # the server continues the trace from the traceparent in _meta
+            meta = tracing.inject()
+            try:
+                raw_result = await self.session.call_tool(
+                    tool_name, arguments=arguments, **({"meta": meta} if meta else {})
+                )
+            except Exception as e:
+                raise RuntimeError(f"MCP tool '{tool_name}' execution failure: {e}")
+            span.set_attribute("mcp.is_error", bool(getattr(raw_result, "isError", False)))
 
         # Extract result from different MCP response formats
         result = getattr(raw_result, "result", getattr(raw_result, "data", raw_result))
@@ -135,13 +162,19 @@ class MCPClient:
 
 # Global MCP client instance
 _mcp_client: Optional[MCPClient] = None
+_mcp_client_lock = asyncio.Lock()
 
 async def get_mcp_client() -> MCPClient:
-    """Get or create the global MCP client instance."""
+    """Get or create the global MCP client instance.
+
+    Safe to call from concurrent tool calls – only one server is started.
+    """
     global _mcp_client
-    if _mcp_client is None:
-        _mcp_client = MCPClient()
-        await _mcp_client.connect_to_server()
+    async with _mcp_client_lock:
+        if _mcp_client is None:
+            client = MCPClient()
+            await client.connect_to_server(server_url=MCP_SERVER_URL)
+            _mcp_client = client
     return _mcp_client
 
 async def call_mcp_tool(tool_name: str, arguments: dict[str, Any]) -> Any:
@@ -156,6 +189,19 @@ async def cleanup_mcp_client():
         await _mcp_client.cleanup()
         _mcp_client = None
 
+def _first_row(result: dict) -> dict:
+    """First row of an execute_sql result as a dict, whatever its format."""
+    columns = result.get("columns", [])
+    if result.get("format") == "columns":
+        values = result.get("values") or []
+        return {col: vals[0] for col, vals in zip(columns, values) if vals}
+    rows = result.get("rows") or []
+    if not rows:
+        return {}
+    if isinstance(rows[0], dict):
+        return rows[0]
+    return dict(zip(columns, rows[0]))
+
 def format_tool_result(func_name: str, result: Any) -> None:
     """Format and display tool execution results."""
     if func_name == "list_tables" and isinstance(result, list):
@@ -174,23 +220,42 @@ def format_tool_result(func_name: str, result: Any) -> None:
             print(f"    • {col.get('name')} ({col.get('type')}) {nullable}")
         if len(columns) > 3:
             print(f"    ... and {len(columns) - 3} more columns")
-    elif func_name == "execute_sql" and isinstance(result, dict):
+    elif func_name == "describe_tables" and isinstance(result, dict):
+        tables = result.get('tables', [])
+        print(f"  → Described {len(tables)} tables:")
+        for table in tables[:5]:
+            print(f"    • {table.get('table_name')} ({len(table.get('columns', []))} columns)")
+        if len(tables) > 5:
+            print(f"    ... and {len(tables) - 5} more tables")
+        if result.get('not_found'):
+            print(f"    Not found: {', '.join(result['not_found'])}")
+    elif func_name == "execute_sql" and isinstance(result, dict) and result.get("type") == "stored":
+        print(f"  → Stored {result.get('row_count', 0)} rows as {result.get('handle')}")
+        if result.get("truncated"):
+            print("    Result truncated by the store's row limit")
+    elif func_name in ("execute_sql", "fetch_more", "read_result", "aggregate_result") and isinstance(result, dict):
         if result.get("type") == "select":
             row_count = result.get('row_count', 0)
             print(f"  → Query returned {row_count} rows")
+            if result.get("truncated"):
+                print("    Result truncated by server limits")
+            if result.get("has_more") and func_name == "read_result":
+                print(f"    {result.get('matched_row_count')} rows match – continue at offset {result.get('next_offset')}")
+            elif result.get("has_more"):
+                print(f"    More rows available ({result.get('rows_sent')} sent so far) – use fetch_more")
             if row_count > 0:
-                rows = result.get('rows', [])
-                if rows:
-                    print(f"    Sample data: {list(rows[0].keys()) if rows else 'No columns'}")
+                first_row = _first_row(result)
+                if first_row:
+                    print(f"    Sample data: {list(first_row.keys())}")
                     # Show first row as example
-                    if len(rows) > 0:
-                        first_row = rows[0]
-                        for k, v in list(first_row.items())[:3]:  # First 3 columns
-                            print(f"      {k}: {v}")
+                    for k, v in list(first_row.items())[:3]:  # First 3 columns
+                        print(f"      {k}: {v}")
         else:
             print(f"  → {result.get('message', 'Query executed')}")
             if 'rows_affected' in result:
                 print(f"    Rows affected: {result['rows_affected']}")
+    elif func_name in ("export_result", "export_query") and isinstance(result, dict):
+        print(f"  → Wrote {result.get('row_count')} rows ({result.get('bytes')} bytes) to {result.get('path')}")
     else:
         # Generic result logging for other cases
         print(f"  → Result: {str(result)[:100]}{'...' if len(str(result)) > 100 else ''}") 
\ No newline at end of file
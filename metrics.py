@@ -0,0 +1,198 @@
+"""Prometheus-style metrics for the SQL MCP server, without dependencies.
+
+Counters and histograms are updated inline; values that already live in
+the server's components (pool, caches, result store) are read at scrape
+time by collector callbacks. :meth:`Registry.collect` returns plain,
+JSON-friendly metric families so worker processes can hand theirs to the
+one answering a scrape, and :func:`render` writes the Prometheus text
+exposition format (version 0.0.4).
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import bisect
+import contextlib
+import math
+import threading
+import time
+
+# Metric family: {"name", "type", "help", "samples": [[name, {label: value}, number]]}
+Family = Dict[str, Any]
+
+# Seconds; spans sub-millisecond metadata calls to multi-minute queries
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def family(self) -> Family:
+        return {"name": self.name, "type": self.kind, "help": self.help, "samples": self.samples()}
+
+    def samples(self) -> List[list]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[list]:
+        with self._lock:
+            return [
+                [self.name, dict(zip(self.labelnames, key)), value]
+                for key, value in self._values.items()
+            ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels: Any):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[list]:
+        out = []
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        for key, counts, total, count in items:
+            labels = dict(zip(self.labelnames, key))
+            running = 0
+            for bound, hits in zip(self.buckets + (math.inf,), counts):
+                running += hits
+                out.append([f"{self.name}_bucket", {**labels, "le": _format_bound(bound)}, running])
+            out.append([f"{self.name}_sum", labels, total])
+            out.append([f"{self.name}_count", labels, count])
+        return out
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+
+class Registry:
+    """The server's metrics plus scrape-time collectors."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], Iterable[Family]]) -> None:
+        """Register ``collect()``, called on every scrape for current values."""
+        self._collectors.append(collect)
+
+    def collect(self) -> List[Family]:
+        families = [metric.family() for metric in self._metrics]
+        for collect in self._collectors:
+            families.extend(collect())
+        return families
+
+
+def gauge(name: str, help_text: str, value: Optional[float], **labels: Any) -> Family:
+    """A one-sample gauge family for collectors."""
+    samples = [] if value is None else [[name, labels, value]]
+    return {"name": name, "type": "gauge", "help": help_text, "samples": samples}
+
+
+def counter(name: str, help_text: str, value: Optional[float], **labels: Any) -> Family:
+    """A one-sample counter family for collectors reading a running total."""
+    return {**gauge(name, help_text, value, **labels), "type": "counter"}
+
+
+def merge(by_source: Dict[str, List[Family]], label: str) -> List[Family]:
+    """Combine the families of several processes, tagging samples with ``label``."""
+    merged: Dict[str, Family] = {}
+    for source, families in by_source.items():
+        for family in families:
+            target = merged.setdefault(family["name"], {**family, "samples": []})
+            target["samples"].extend(
+                [name, {label: source, **labels}, value] for name, labels, value in family["samples"]
+            )
+    return list(merged.values())
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value: str) -> str:
+    # label values additionally escape double quotes; HELP text does not
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def render(families: Iterable[Family]) -> str:
+    """Prometheus text exposition of ``families``."""
+    # one block per metric name, however many families carried samples for it
+    grouped: Dict[str, Family] = {}
+    for family in families:
+        target = grouped.setdefault(family["name"], {**family, "samples": []})
+        target["samples"].extend(family["samples"])
+    lines = []
+    for family in grouped.values():
+        lines.append(f"# HELP {family['name']} {_escape_help(family['help'])}")
+        lines.append(f"# TYPE {family['name']} {family['type']}")
+        for name, labels, value in family["samples"]:
+            if labels:
+                pairs = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+                lines.append(f"{name}{{{pairs}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
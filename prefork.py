@@ -0,0 +1,124 @@
+"""Pre-fork supervisor: N worker processes serving one listening socket.
+
+The parent binds the socket once and forks the workers, each running its
+own uvicorn server (and event loop, GIL and connection pool) on the
+inherited socket; the kernel spreads incoming connections between them.
+Workers that die are restarted; SIGINT/SIGTERM stop them all. POSIX only.
+"""
+
+from typing import Any, Callable, Dict, Optional
+import logging
+import os
+import signal
+import socket
+import time
+
+# Pause before restarting a worker that exited, so a crash loop stays slow
+RESTART_DELAY_SEC = 1.0
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.create_server((host, port), family=family, backlog=2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _stop_worker(signum: int, frame: Any) -> None:
+    # uvicorn re-raises the signal that stopped it once it has shut down; the
+    # default action would kill the worker before its cleanup runs
+    raise SystemExit(0)
+
+
+def _run_worker(
+    index: int,
+    sock: socket.socket,
+    make_app: Callable[[], Any],
+    log_level: str,
+    on_start: Optional[Callable[[int], None]],
+    on_stop: Optional[Callable[[], None]],
+) -> None:
+    import uvicorn  # installed with mcp's HTTP transports
+
+    code = 0
+    try:
+        signal.signal(signal.SIGINT, _stop_worker)
+        signal.signal(signal.SIGTERM, _stop_worker)
+        if on_start is not None:
+            on_start(index)
+        config = uvicorn.Config(make_app(), log_level=log_level.lower())
+        uvicorn.Server(config).run(sockets=[sock])
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else 0
+    except BaseException:  # noqa: BLE001 – a worker must never return into the parent's code
+        logging.exception("Worker %d failed", index)
+        code = 1
+    finally:
+        if on_stop is not None:
+            try:
+                on_stop()
+            except Exception:  # noqa: BLE001
+                logging.exception("Worker %d cleanup failed", index)
+        os._exit(code)
+
+
+def serve(
+    make_app: Callable[[], Any],
+    *,
+    host: str,
+    port: int,
+    workers: int,
+    log_level: str = "INFO",
+    on_worker_start: Optional[Callable[[int], None]] = None,
+    on_worker_stop: Optional[Callable[[], None]] = None,
+) -> None:
+    """Serve ``make_app()`` (an ASGI app built in each worker) until stopped.
+
+    ``on_worker_start(index)`` runs in every new worker before its app is
+    built – the place to open per-process resources such as connections.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("multi-worker mode needs a POSIX system (os.fork)")
+    sock = _bind(host, port)
+    children: Dict[int, int] = {}  # pid -> worker index
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(index, sock, make_app, log_level, on_worker_start, on_worker_stop)
+        children[pid] = index
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for index in range(workers):
+            spawn(index)
+        logging.info("Started %d workers on %s:%d", workers, host, port)
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = children.pop(pid, None)
+            if index is None or stopping:
+                continue
+            logging.warning(
+                "Worker %d (pid %d) exited with status %d; restarting",
+                index, pid, os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status),
+            )
+            time.sleep(RESTART_DELAY_SEC)
+            if not stopping:
+                spawn(index)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        sock.close()
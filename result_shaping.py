@@ -0,0 +1,245 @@
+"""Compact rendering of MCP tool results before they enter the model's context."""
+
+import csv
+import io
+import json
+from collections import OrderedDict
+from typing import Any, Optional
+
+from conversation import make_token_counter
+
+# Local (client-side) tool the model can call to read archived full results
+RESULT_TOOL_NAME = "get_tool_result"
+
+RESULT_STYLES = ("csv", "table", "json")
+
+
+def tabulate(result: Any) -> Optional[tuple[list[str], list[list[Any]]]]:
+    """Column names and row arrays for tabular results, else ``None``.
+
+    Understands every execute_sql ``result_format`` as well as plain lists of
+    dicts such as ``list_tables`` output.
+    """
+    if isinstance(result, list) and result and all(isinstance(r, dict) for r in result):
+        columns = list(result[0].keys())
+        return columns, [[row.get(c) for c in columns] for row in result]
+    if not isinstance(result, dict) or result.get("type") != "select":
+        return None
+    columns = list(result.get("columns") or [])
+    if result.get("format") == "columns":
+        return columns, [list(row) for row in zip(*(result.get("values") or []))]
+    rows = result.get("rows") or []
+    if rows and isinstance(rows[0], dict):
+        columns = columns or list(rows[0].keys())
+        rows = [[row.get(c) for c in columns] for row in rows]
+    return columns, rows
+
+
+def _cell(value: Any) -> str:
+    return "NULL" if value is None else str(value)
+
+
+def render_rows(
+    columns: list[str], rows: list[list[Any]], style: str, header: bool = True
+) -> str:
+    """Render rows as CSV or a pipe-separated table."""
+    if style == "table":
+        lines = [" | ".join(columns), " | ".join("---" for _ in columns)] if header else []
+        lines += [" | ".join(_cell(v) for v in row) for row in rows]
+        return "\n".join(lines)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    if header:
+        writer.writerow(columns)
+    writer.writerows([_cell(v) for v in row] for row in rows)
+    return buf.getvalue().rstrip("\n")
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)  # wide decimals (and MSSQL_TYPED_ROWS=false) arrive as strings
+    except (TypeError, ValueError):
+        return None
+
+
+def column_stats(columns: list[str], rows: list[list[Any]]) -> list[dict]:
+    """Per-column null counts plus min/max/mean (numeric) or distinct count."""
+    stats = []
+    for idx, name in enumerate(columns):
+        values = [row[idx] for row in rows if row[idx] is not None]
+        stat: dict[str, Any] = {"column": name, "nulls": len(rows) - len(values)}
+        numbers = [_as_number(v) for v in values]
+        if values and all(n is not None for n in numbers):
+            stat.update(
+                min=min(numbers),
+                max=max(numbers),
+                mean=round(sum(numbers) / len(numbers), 4),
+            )
+        else:
+            stat["distinct"] = len({str(v) for v in values})
+        stats.append(stat)
+    return stats
+
+
+def _describe(func_name: str, result: Any, row_count: int) -> str:
+    """One-line header with the result's paging/truncation facts."""
+    parts = [f"{func_name}: {row_count} rows"]
+    if isinstance(result, dict):
+        if result.get("truncated"):
+            parts.append("truncated by server limits")
+        if result.get("has_more") and result.get("continuation_token"):
+            parts.append(f"more rows via fetch_more(continuation_token={result['continuation_token']!r})")
+        elif result.get("has_more"):
+            parts.append(
+                f"{result.get('matched_row_count')} rows match; more via "
+                f"read_result(handle={result.get('handle')!r}, offset={result.get('next_offset')})"
+            )
+        if result.get("cached"):
+            parts.append("cached")
+        if result.get("message"):
+            parts.append(str(result["message"]))
+    return "; ".join(parts)
+
+
+class ResultShaper:
+    """Turns tool results into compact text capped at ``max_tokens``.
+
+    Tabular results become CSV (or a pipe table); when too large, only the
+    first and last ``sample_rows`` rows are shown with per-column summary
+    statistics. Oversized results are archived client-side under an id the
+    model can pass to the ``get_tool_result`` tool to read more.
+    """
+
+    def __init__(
+        self,
+        *,
+        style: str,
+        max_tokens: int,
+        sample_rows: int,
+        model: str,
+        archive_size: int = 20,
+    ):
+        if style not in RESULT_STYLES:
+            raise ValueError(f"Unknown tool result style {style!r}; expected one of {RESULT_STYLES}")
+        self.style = style
+        self.max_tokens = max_tokens
+        self.sample_rows = sample_rows
+        self.archive_size = archive_size
+        self._count = make_token_counter(model)
+        self._archive: "OrderedDict[str, Any]" = OrderedDict()
+        self._next_id = 1
+
+    @property
+    def enabled(self) -> bool:
+        return self.style != "json"
+
+    def _store(self, result: Any) -> str:
+        result_id = f"r{self._next_id}"
+        self._next_id += 1
+        self._archive[result_id] = result
+        while len(self._archive) > self.archive_size:
+            self._archive.popitem(last=False)
+        return result_id
+
+    def _fits(self, text: str) -> bool:
+        return self._count(text) <= self.max_tokens
+
+    def render(self, func_name: str, result: Any) -> str:
+        """Text to put in the conversation for ``result``."""
+        if not self.enabled:
+            return json.dumps(result)
+
+        table = tabulate(result)
+        if table is None:
+            text = json.dumps(result, separators=(",", ":"), default=str)
+            if self._fits(text):
+                return text
+            result_id = self._store(result)
+            # ~4 characters per token keeps the cut close to the cap
+            return (
+                f"{text[:self.max_tokens * 4]}\n"
+                f"[output cut at ~{self.max_tokens} tokens; full result stored as "
+                f"{result_id} – call {RESULT_TOOL_NAME}(result_id={result_id!r}, offset=...)]"
+            )
+
+        columns, rows = table
+        header = _describe(func_name, result, len(rows))
+        text = f"{header}\n{render_rows(columns, rows, self.style)}"
+        if self._fits(text):
+            return text
+
+        result_id = self._store(result)
+        stats = json.dumps(column_stats(columns, rows), separators=(",", ":"), default=str)
+        sample = self.sample_rows
+        while True:
+            head, tail = rows[:sample], rows[-sample:] if len(rows) > 2 * sample else []
+            shown = render_rows(columns, head, self.style)
+            if tail:
+                shown += (
+                    f"\n... {len(rows) - len(head) - len(tail)} rows omitted ...\n"
+                    f"{render_rows(columns, tail, self.style, header=False)}"
+                )
+            text = (
+                f"{header}\n"
+                f"Showing first {len(head)} and last {len(tail)} of {len(rows)} rows; "
+                f"full result stored as {result_id} – call {RESULT_TOOL_NAME}"
+                f"(result_id={result_id!r}, offset=..., limit=...) for other rows.\n"
+                f"{shown}\n"
+                f"Column summary: {stats}"
+            )
+            if self._fits(text) or sample <= 1:
+                return text
+            sample //= 2
+
+    def retrieve(self, arguments: dict[str, Any]) -> str:
+        """Handle a ``get_tool_result`` call from the model."""
+        result_id = arguments.get("result_id")
+        if result_id not in self._archive:
+            raise ValueError(f"Unknown or expired result id {result_id!r}")
+        result = self._archive[result_id]
+        self._archive.move_to_end(result_id)
+        offset = max(0, int(arguments.get("offset", 0)))
+        limit = max(1, int(arguments.get("limit", 50)))
+
+        table = tabulate(result)
+        if table is None:
+            text = json.dumps(result, separators=(",", ":"), default=str)
+            chunk = text[offset:offset + self.max_tokens * 4]
+            return f"{result_id} characters {offset}-{offset + len(chunk)} of {len(text)}:\n{chunk}"
+
+        columns, rows = table
+        while True:
+            page = rows[offset:offset + limit]
+            text = (
+                f"{result_id} rows {offset}-{offset + len(page)} of {len(rows)}:\n"
+                f"{render_rows(columns, page, self.style)}"
+            )
+            if self._fits(text) or limit <= 1:
+                return text
+            limit //= 2
+
+    def tool_spec(self) -> dict:
+        """OpenAI function spec for the local ``get_tool_result`` tool."""
+        return {
+            "type": "function",
+            "function": {
+                "name": RESULT_TOOL_NAME,
+                "description": (
+                    "Read more of a large tool result that was shortened in the conversation. "
+                    "For tabular results offset/limit count rows; otherwise offset counts characters."
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "result_id": {"type": "string", "description": "Id such as 'r3' from the shortened result"},
+                        "offset": {"type": "integer", "default": 0},
+                        "limit": {"type": "integer", "default": 50},
+                    },
+                    "required": ["result_id"],
+                },
+            },
+        }
@@ -0,0 +1,192 @@
+"""JSON-native serialization of database rows.
+
+Converters are resolved once per result set from ``cursor.description``
+(DB-API ``type_code``, precision and scale) instead of dispatching on the
+type of every value.
+"""
+
+import base64
+import datetime
+import decimal
+import uuid
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Converter for one column; ``None`` means values are already JSON-native
+Converter = Optional[Callable[[Any], Any]]
+
+# Significant digits a float reproduces exactly when printed back
+FLOAT_EXACT_DIGITS = 15
+
+
+def json_value(val: Any) -> Any:
+    """Map a single value of unknown type onto the closest JSON-native value."""
+    if val is None or isinstance(val, (str, bool, int, float)):
+        return val
+    if isinstance(val, decimal.Decimal):
+        # integral decimals become ints; keep the exact text otherwise
+        return int(val) if val == val.to_integral_value() else str(val)
+    if isinstance(val, (datetime.datetime, datetime.date, datetime.time)):
+        return val.isoformat()
+    if isinstance(val, (bytes, bytearray)):
+        return base64.b64encode(val).decode("ascii")
+    if isinstance(val, uuid.UUID):
+        return str(val)
+    return str(val)
+
+
+def json_size(val: Any) -> int:
+    """Rough size of one value once JSON encoded."""
+    if val is None:
+        return 4
+    if isinstance(val, str):
+        return len(val) + 2
+    return len(str(val))
+
+
+def _base64(val: bytes) -> str:
+    return base64.b64encode(val).decode("ascii")
+
+
+def _decimal_converter(precision: Optional[int], scale: Optional[int]) -> Callable[[Any], Any]:
+    """Decimals as ints or floats when that is lossless, else as exact strings."""
+    if scale == 0:
+        return int
+    if precision is not None and precision <= FLOAT_EXACT_DIGITS:
+        return float
+    return str
+
+
+def column_converter(description: Sequence[Any]) -> Converter:
+    """Converter for one ``cursor.description`` entry."""
+    type_code, precision, scale = description[1], description[4], description[5]
+    if type_code in (str, int, bool, float):
+        return None
+    if type_code is decimal.Decimal:
+        return _decimal_converter(precision, scale)
+    if type_code in (datetime.datetime, datetime.date, datetime.time):
+        return type_code.isoformat
+    if type_code in (bytes, bytearray):
+        return _base64
+    if type_code is uuid.UUID:
+        return str
+    # drivers that report no (or an unusual) type code: decide per value
+    return json_value
+
+
+def numeric_type(description: Sequence[Any]) -> Optional[type]:
+    """JSON type for sums over a column, matching how its values convert.
+
+    ``int`` or ``float`` for numeric columns, ``str`` (exact text) for
+    decimals too wide for a float, ``None`` for non-numeric columns and
+    drivers that report no type code.
+    """
+    type_code = description[1]
+    if type_code is decimal.Decimal:
+        return _decimal_converter(description[4], description[5])
+    if type_code in (int, bool):
+        return int
+    if type_code is float:
+        return float
+    return None
+
+
+def column_converters(description: Sequence[Sequence[Any]]) -> List[Converter]:
+    return [column_converter(d) for d in description]
+
+
+def _as_text(val: Any) -> str:
+    return str(val)
+
+
+def make_row_converter(
+    description: Sequence[Sequence[Any]], typed: bool = True
+) -> Callable[[Sequence[Any]], List[Any]]:
+    """Build a function turning one driver row into a list of JSON values.
+
+    ``typed=False`` reproduces the legacy behaviour of stringifying every
+    non-null value.
+    """
+    converters = column_converters(description) if typed else [_as_text] * len(description)
+    if all(c is None for c in converters):
+        return list
+    pairs = [(idx, conv) for idx, conv in enumerate(converters) if conv is not None]
+
+    def convert(row: Sequence[Any]) -> List[Any]:
+        values = list(row)
+        for idx, conv in pairs:
+            val = values[idx]
+            if val is not None:
+                values[idx] = conv(val)
+        return values
+
+    return convert
+
+
+# Per-column JSON size estimators for whole columns of converted values
+def _text_sizes(column: Sequence[Any]) -> List[int]:
+    try:
+        return [4 if v is None else len(v) + 2 for v in column]
+    except TypeError:  # a value that is not text despite the column's type
+        return _any_sizes(column)
+
+
+def _any_sizes(column: Sequence[Any]) -> List[int]:
+    return [json_size(v) for v in column]
+
+
+def _column_sizer(type_code: Any, converter: Converter) -> Optional[Callable[[Sequence[Any]], List[int]]]:
+    """Per-row size estimator for a column, or ``None`` for numeric columns.
+
+    Numeric columns are sized in bulk (their average encoded width) since
+    their values vary little in length and per-value ``str`` calls dominate.
+    """
+    if converter is None:
+        return _text_sizes if type_code is str else None
+    if converter in (int, float):
+        return None
+    if converter is json_value:
+        return _any_sizes
+    return _text_sizes  # str, _as_text, isoformat, _base64
+
+
+class RowBatchConverter:
+    """Converts whole ``fetchmany`` batches column by column.
+
+    Each column's converter and size estimator are resolved once; a batch is
+    transposed, every column that needs it is converted in one list
+    comprehension, and the rows are rebuilt with ``zip``. Columns that are
+    already JSON-native are not touched at all.
+    """
+
+    __slots__ = ("_steps",)
+
+    def __init__(self, description: Sequence[Sequence[Any]], typed: bool = True) -> None:
+        steps = []
+        for idx, entry in enumerate(description):
+            converter = column_converter(entry) if typed else _as_text
+            steps.append((idx, converter, _column_sizer(entry[1], converter)))
+        self._steps = tuple(steps)
+
+    def convert(self, batch: Sequence[Sequence[Any]]) -> Tuple[List[List[Any]], List[int]]:
+        """Return the converted rows and each row's estimated JSON size."""
+        if not batch:
+            return [], []
+        columns = list(zip(*batch))
+        count = len(batch)
+        sizes = []
+        numeric_width = 0
+        for idx, converter, sizer in self._steps:
+            column = columns[idx]
+            if converter is not None:
+                column = columns[idx] = [None if v is None else converter(v) for v in column]
+            if sizer is None:
+                # repr of a list of numbers/bools/None is as long as its JSON,
+                # minus the brackets and ", " separators
+                numeric_width += (len(str(column)) - 2 * count) // count + 1
+            else:
+                sizes.append(sizer(column))
+        if sizes:
+            row_sizes = [size + numeric_width for size in map(sum, zip(*sizes))]
+        else:
+            row_sizes = [numeric_width] * count
+        return list(map(list, zip(*columns))), row_sizes
@@ -0,0 +1,173 @@
+"""Cache storage shared by the worker processes of a multi-worker server.
+
+With ``--workers N`` every worker is its own process, so in-process caches
+would be warmed (and held in memory) N times. :class:`SharedCacheStore`
+keeps them in one SQLite file in the server's shared directory instead:
+each namespace (``"schema"``, ``"results"``) is a table of pickled values
+with an optional expiry, a size for byte-bounded LRU eviction and a
+generation counter that every worker sees bump on invalidation.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+import contextlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS generations (
+    namespace TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+
+
+def _key(key: Any) -> str:
+    # cache keys are strings or tuples of str/int, whose repr is stable
+    return repr(key)
+
+
+class SharedCacheStore:
+    """Namespaced key/value store in a SQLite file, safe across processes."""
+
+    def __init__(self, path: str, busy_timeout: float = 5.0) -> None:
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # one connection per thread, reopened after a fork
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        db = self._connection()
+        # take the write lock up front so read-then-write is atomic
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def get_many(self, namespace: str, keys: Iterable[Any], touch: bool = False) -> Dict[Any, Any]:
+        """Unexpired values for ``keys``; ``touch`` marks them recently used."""
+        wanted = {_key(k): k for k in keys}
+        if not wanted:
+            return {}
+        db = self._connection()
+        now = time.time()
+        marks = ",".join("?" * len(wanted))
+        rows = db.execute(
+            f"SELECT key, value FROM entries WHERE namespace = ? AND key IN ({marks})"
+            " AND (expires_at IS NULL OR expires_at >= ?)",
+            (namespace, *wanted, now),
+        ).fetchall()
+        if touch and rows:
+            db.execute(
+                f"UPDATE entries SET used_at = ? WHERE namespace = ? AND key IN ({','.join('?' * len(rows))})",
+                (now, namespace, *(row[0] for row in rows)),
+            )
+        return {wanted[key]: pickle.loads(value) for key, value in rows}
+
+    def get(self, namespace: str, key: Any, touch: bool = False) -> Optional[Any]:
+        return self.get_many(namespace, [key], touch=touch).get(key)
+
+    def put_many(
+        self,
+        namespace: str,
+        items: Dict[Any, Any],
+        *,
+        sizes: Optional[Dict[Any, int]] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        generation: Optional[int] = None,
+    ) -> int:
+        """Store ``items`` and return how many entries were evicted.
+
+        Nothing is stored if ``generation`` is given and the namespace has
+        been invalidated since it was read (-1 is returned).
+        """
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        rows = [
+            (namespace, _key(k), pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL),
+             (sizes or {}).get(k, 0), expires_at, now)
+            for k, v in items.items()
+        ]
+        with self._transaction() as db:
+            if generation is not None and generation != self._generation(db, namespace):
+                return -1
+            db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self._evict(db, namespace, max_bytes, now) if max_bytes is not None else 0
+
+    def put(self, namespace: str, key: Any, value: Any, *, size: int = 0, **kwargs: Any) -> int:
+        return self.put_many(namespace, {key: value}, sizes={key: size}, **kwargs)
+
+    def _evict(self, db: sqlite3.Connection, namespace: str, max_bytes: int, now: float) -> int:
+        expired = db.execute(
+            "DELETE FROM entries WHERE namespace = ? AND expires_at < ?", (namespace, now)
+        ).rowcount
+        total = db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+        victims: List[str] = []
+        if total > max_bytes:
+            for key, size in db.execute(
+                "SELECT key, size FROM entries WHERE namespace = ? ORDER BY used_at", (namespace,)
+            ):
+                if total <= max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+            db.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", ((namespace, k) for k in victims)
+            )
+        return expired + len(victims)
+
+    @staticmethod
+    def _generation(db: sqlite3.Connection, namespace: str) -> int:
+        row = db.execute(
+            "SELECT generation FROM generations WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def generation(self, namespace: str) -> int:
+        return self._generation(self._connection(), namespace)
+
+    def clear(self, namespace: str) -> None:
+        """Drop every entry in ``namespace`` and bump its generation."""
+        with self._transaction() as db:
+            db.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            db.execute(
+                "INSERT INTO generations VALUES (?, 1) ON CONFLICT (namespace)"
+                " DO UPDATE SET generation = generation + 1",
+                (namespace,),
+            )
+
+    def stats(self, namespace: str) -> Dict[str, Any]:
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            " WHERE namespace = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (namespace, time.time()),
+        ).fetchone()
+        return {"entries": entries, "bytes": size}
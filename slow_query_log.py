@@ -0,0 +1,222 @@
+"""Opt-in log of slow statements, with estimated plans for the slowest.
+
+Each statement at or over the log threshold becomes one JSON line –
+duration, rows, bytes, the query and its *shape* (the normalized text with
+literals replaced by ``?``, so queries the model generates with different
+constants group together) – in a size-rotated file. Statements over the
+plan threshold also carry the backend's estimated plan, captured on a
+background thread after the query's result has gone back to the caller.
+:meth:`top` reads the files back and ranks query shapes by cost.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+
+# Plans beyond this many characters are cut (showplan XML can run to MBs)
+MAX_PLAN_CHARS = 200_000
+SORT_KEYS = ("total_ms", "max_ms", "mean_ms", "calls")
+# Plans waiting for the background thread; slow queries past this are logged without one
+MAX_PENDING_PLANS = 8
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'", re.IGNORECASE)
+_NUMBER = re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?(?![\w.])", re.IGNORECASE)
+_VALUE_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def query_shape(normalized: str) -> str:
+    """``normalized`` with string and number literals replaced by ``?``."""
+    shape = _STRING_LITERAL.sub("?", normalized)
+    shape = _NUMBER.sub("?", shape)
+    # IN (1, 2, 3) and IN (4, 5) are the same shape
+    return _VALUE_LIST.sub("?, ...", shape)
+
+
+class SlowQueryLog:
+    """Appends slow statements to ``path`` (rotated at ``max_bytes``)."""
+
+    def __init__(
+        self,
+        path: str,
+        threshold_ms: float,
+        plan_threshold_ms: float,
+        max_bytes: int,
+        backups: int,
+    ) -> None:
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.plan_threshold_ms = plan_threshold_ms
+        self.recorded = 0
+        self.plans = 0
+        self.plans_skipped = 0
+        self._pending_plans = 0
+        self._lock = threading.Lock()
+        # one thread, so plan requests never hold more than one extra connection
+        self._planner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-plans")
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        # a private logger, so slow-query lines never reach the server log
+        self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(handler)
+
+    def wants_plan(self, duration_ms: float) -> bool:
+        return 0 < self.plan_threshold_ms <= duration_ms
+
+    def record(
+        self,
+        query: str,
+        normalized: str,
+        duration_ms: float,
+        *,
+        statement: str,
+        rows: Optional[int] = None,
+        bytes_read: Optional[int] = None,
+        truncated: bool = False,
+        explain: Optional[Callable[[], Optional[str]]] = None,
+        **extra: Any,
+    ) -> None:
+        """Write one entry if ``duration_ms`` reaches the log threshold.
+
+        Past the plan threshold, ``explain`` is called on the background
+        thread and the entry is written once it returns.
+        """
+        if duration_ms < self.threshold_ms:
+            return
+        entry: Dict[str, Any] = {
+            "ts": time.time(),
+            "duration_ms": round(duration_ms, 3),
+            "statement": statement,
+            "rows": rows,
+            "bytes": bytes_read,
+            "truncated": truncated,
+            "shape": query_shape(normalized),
+            "query": query,
+            **extra,
+        }
+        if explain is not None and self.wants_plan(duration_ms):
+            with self._lock:
+                queued = self._pending_plans < MAX_PENDING_PLANS
+                if queued:
+                    self._pending_plans += 1
+                else:
+                    self.plans_skipped += 1
+            if queued:
+                self._planner.submit(self._write_with_plan, entry, explain)
+                return
+            entry["plan_error"] = "skipped: too many plans pending"
+        self._write(entry)
+
+    def _write_with_plan(self, entry: Dict[str, Any], explain: Callable[[], Optional[str]]) -> None:
+        try:
+            plan = explain()
+        except Exception as exc:  # noqa: BLE001 – the entry is still worth writing
+            entry["plan_error"] = f"{type(exc).__name__}: {exc}"
+            logging.warning("Could not capture the plan of a slow query: %s", entry["plan_error"])
+        else:
+            if plan is not None:
+                entry["plan"] = plan[:MAX_PLAN_CHARS]
+                entry["plan_truncated"] = len(plan) > MAX_PLAN_CHARS
+        finally:
+            with self._lock:
+                self._pending_plans -= 1
+        self._write(entry)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._logger.info(json.dumps(entry, default=str))
+        with self._lock:
+            self.recorded += 1
+            if "plan" in entry:
+                self.plans += 1
+
+    def files(self) -> List[str]:
+        """This log's files and rotated backups, plus other workers' logs."""
+        root, ext = os.path.splitext(self.path)
+        # worker logs are <root>.worker<N><ext>; backups add .1, .2, ...
+        base = re.sub(r"\.worker\d+$", "", root)
+        directory, name = os.path.split(base)
+        ours = re.compile(re.escape(name) + r"(?:\.worker\d+)?" + re.escape(ext) + r"(?:\.\d+)?")
+        try:
+            names = os.listdir(directory or ".")
+        except OSError:
+            return []
+        return sorted(os.path.join(directory, n) for n in names if ours.fullmatch(n))
+
+    def top(self, top_n: int, sort_by: str = "total_ms", include_plans: bool = False) -> List[Dict[str, Any]]:
+        """The ``top_n`` most expensive query shapes across the log files."""
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {', '.join(SORT_KEYS)}")
+        shapes: Dict[str, Dict[str, Any]] = {}
+        for path in self.files():
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    lines = fh.readlines()
+            except OSError:
+                continue  # rotated away while we listed the directory
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                group = shapes.setdefault(entry["shape"], {
+                    "shape": entry["shape"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "rows": 0, "bytes": 0, "last_seen": 0.0,
+                })
+                group["calls"] += 1
+                group["total_ms"] += entry["duration_ms"]
+                group["rows"] += entry.get("rows") or 0
+                group["bytes"] += entry.get("bytes") or 0
+                if entry["duration_ms"] >= group["max_ms"]:
+                    group["max_ms"] = entry["duration_ms"]
+                    group["slowest_query"] = entry["query"]
+                if entry["ts"] >= group["last_seen"]:
+                    group["last_seen"] = entry["ts"]
+                    group["statement"] = entry.get("statement")
+                if "plan" in entry and entry["ts"] >= group.get("plan_ts", 0):
+                    group["plan_ts"], group["plan"] = entry["ts"], entry["plan"]
+        ranked = []
+        for group in shapes.values():
+            calls = group["calls"]
+            ranked.append({
+                "shape": group["shape"],
+                "statement": group.get("statement"),
+                "calls": calls,
+                "total_ms": round(group["total_ms"], 3),
+                "mean_ms": round(group["total_ms"] / calls, 3),
+                "max_ms": group["max_ms"],
+                "mean_rows": round(group["rows"] / calls, 1),
+                "mean_bytes": round(group["bytes"] / calls),
+                "last_seen": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(group["last_seen"])),
+                "slowest_query": group.get("slowest_query"),
+                "has_plan": "plan" in group,
+                **({"plan": group["plan"]} if include_plans and "plan" in group else {}),
+            })
+        ranked.sort(key=lambda g: g[sort_by], reverse=True)
+        return ranked[:top_n]
+
+    def close(self) -> None:
+        self._planner.shutdown(wait=False, cancel_futures=True)
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "file": self.path,
+            "threshold_ms": self.threshold_ms,
+            "plan_threshold_ms": self.plan_threshold_ms,
+            "recorded": self.recorded,
+            "plans_captured": self.plans,
+            "plans_pending": self._pending_plans,
+            "plans_skipped": self.plans_skipped,
+        }
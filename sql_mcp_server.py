@@ -1,15 +1,83 @@
 """SQL MCP Server - Database operations via Model Context Protocol."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import bisect
+import datetime
+import decimal
+import functools
+import itertools
 import os
 import contextlib
+import contextvars
+import csv
+import json
 import logging
+import pickle
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
 
-import pyodbc  # type: ignore
+try:
+    import pyarrow  # type: ignore
+    import pyarrow.ipc  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except ImportError:  # optional – only export_query's parquet/arrow formats need it
+    pyarrow = None
 from mcp.server.fastmcp import FastMCP, Context
-from config import DB_CONFIG
+from mcp.server.transport_security import TransportSecuritySettings
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from config import DB_CONFIG, TRACE_FILE
+from db_backends import create_backend, schema_key
+import metrics
+import prefork
+from row_serialization import RowBatchConverter, json_size, json_value, numeric_type
+from shared_cache import SharedCacheStore
+from slow_query_log import SlowQueryLog
+import tracing
 
-mcp = FastMCP("mssql")
+
+
+class _LimitedFastMCP(FastMCP):
+    """FastMCP that admits tool calls through the shared ``_call_limiter``
+    and records per-tool metrics and trace spans."""
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        registered = self._tool_manager.get_tool(name)
+        # client-chosen names must not become metric labels
+        tool = name if registered is not None else "unknown"
+        context = self.get_context()
+        try:
+            meta = context.request_context.meta
+        except ValueError:  # called outside an MCP request (no _meta to read)
+            meta = None
+        started = time.perf_counter()
+        with _tracer.span(
+            f"tools/call {tool}",
+            kind=tracing.SERVER,
+            traceparent=getattr(meta, "traceparent", None),
+            attributes={"mcp.tool": tool, "mcp.worker": _process["worker"]},
+        ) as span:
+            try:
+                async with _call_limiter.slot():
+                    result = await self._tool_manager.call_tool(name, arguments, context=context)
+                    with tracing.span("serialize"):
+                        result = registered.fn_metadata.convert_result(result)
+            except Exception as exc:
+                _record_tool_call(tool, started, error=exc)
+                raise
+            _record_tool_call(tool, started, result=result, span=span)
+        return result
+
+
+mcp = _LimitedFastMCP("mssql")
 
 # Database configuration from config module
 
@@ -19,6 +87,10 @@ DEFAULT_DB_CONFIG = {
     "database": DB_CONFIG["database"],
     "user": DB_CONFIG["username"],
     "password": DB_CONFIG["password"],
+    "driver": DB_CONFIG["driver"],
+    # "mssql" or "sqlite" (DB_BACKEND); the SQLite file comes from SQLITE_PATH
+    "backend": DB_CONFIG["backend"],
+    "sqlite_path": DB_CONFIG["sqlite_path"],
     # TLS-related defaults – flip to True if you use Azure SQL etc.
     "encrypt": False,
     "trust_cert": True,
@@ -26,6 +98,124 @@ DEFAULT_DB_CONFIG = {
     "connect_timeout_ms": 30_000,
 }
 
+# Connection pool defaults – override with the MSSQL_POOL_* env vars
+DEFAULT_POOL_CONFIG = {
+    "min_size": 1,
+    "max_size": 10,
+    # seconds an idle connection may sit in the pool before it is closed
+    "idle_timeout_sec": 300,
+    # seconds after which a connection is recycled regardless of use
+    "max_lifetime_sec": 1800,
+    # seconds a caller waits for a free connection before giving up
+    "acquire_timeout_sec": 30,
+}
+
+# Paged execute_sql defaults – override with the MSSQL_CURSOR_* env vars
+DEFAULT_CURSOR_CONFIG = {
+    "page_size": 500,
+    # seconds a paged result may sit unread before its cursor is closed
+    "ttl_sec": 300,
+    # each open cursor pins a pooled connection, so keep this below pool max
+    "max_open": 4,
+}
+
+# Hard caps on what a single execute_sql/fetch_more response may carry –
+# override with MSSQL_MAX_ROWS / MSSQL_MAX_RESULT_BYTES / MSSQL_INJECT_TOP
+DEFAULT_RESULT_LIMITS = {
+    "max_rows": 1000,
+    "max_bytes": 1_000_000,
+    # cap plain SELECTs at max_rows + 1 in SQL (TOP / LIMIT) so the database stops early
+    "inject_top": True,
+}
+
+# Schema metadata cache – override with MSSQL_SCHEMA_CACHE / MSSQL_SCHEMA_CACHE_INTERVAL
+DEFAULT_SCHEMA_CACHE_CONFIG = {
+    "enabled": True,
+    # seconds between schema-version probes that detect schema changes
+    "check_interval_sec": 60,
+}
+
+# Read-only result cache – override with the MSSQL_RESULT_CACHE* env vars
+DEFAULT_RESULT_CACHE_CONFIG = {
+    "enabled": True,
+    "ttl_sec": 60,
+    "max_bytes": 32 * 1024 * 1024,
+}
+
+# Stored results (execute_sql(store=True)) – override with the MSSQL_RESULT_STORE_* env vars
+DEFAULT_RESULT_STORE_CONFIG = {
+    # seconds a stored result stays available after its last use
+    "ttl_sec": 1800,
+    # rows read into one stored result before it is marked truncated
+    "max_rows": 1_000_000,
+    # in-memory budget; least recently used results beyond it spill to disk
+    "max_memory_bytes": 64 * 1024 * 1024,
+    # rows returned inline with the handle
+    "preview_rows": 20,
+}
+
+# Directory that file-producing tools write into – override with MSSQL_EXPORT_DIR
+DEFAULT_EXPORT_DIR = "exports"
+
+# Rows per fetchmany()/record batch when export_query streams a result to disk
+EXPORT_BATCH_SIZE = 10_000
+
+# Statement timeout in seconds (0 disables) – override with MSSQL_QUERY_TIMEOUT
+# or per call via execute_sql(timeout_seconds=...)
+DEFAULT_QUERY_TIMEOUT_SEC = 60
+
+# Extra seconds the async deadline allows on top of the driver timeout, so
+# the database's own timeout normally fires first and the wall-clock deadline
+# only catches slow fetches
+QUERY_DEADLINE_GRACE_SEC = 1.0
+
+# Rows pulled from the driver per fetchmany() round trip
+FETCH_BATCH_SIZE = 500
+
+# Transport defaults – override with MSSQL_TRANSPORT / MSSQL_HOST / MSSQL_PORT /
+# MSSQL_MAX_CONCURRENT_CALLS or the matching command-line flags
+DEFAULT_TRANSPORT_CONFIG = {
+    # "stdio" (one client, spawned per agent) or a long-lived network server
+    # shared by many agents: "streamable-http" (at /mcp) or "sse" (at /sse)
+    "transport": "stdio",
+    "host": "127.0.0.1",
+    "port": 8000,
+    # tool calls running at once across all clients; the rest wait (0 = no limit)
+    "max_concurrent_calls": 32,
+    # server processes sharing the listener (streamable-http only); caches and
+    # stored results are shared through files in MSSQL_SHARED_DIR
+    "workers": 1,
+    # DNS-rebinding guard for a non-local --host (MSSQL_ALLOWED_HOSTS /
+    # MSSQL_ALLOWED_ORIGINS, comma-separated): Host headers and browser
+    # Origins accepted; "name:*" allows any port. Empty derives them from --host.
+    "allowed_hosts": [],
+    "allowed_origins": [],
+}
+# Listen addresses FastMCP already guards (localhost Host headers only)
+_LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# Metrics are served at /metrics on the HTTP transports; set MSSQL_METRICS_FILE
+# to also write them (Prometheus text format) every MSSQL_METRICS_INTERVAL seconds
+DEFAULT_METRICS_CONFIG = {
+    "file": None,
+    "interval_sec": 15,
+}
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+
+# Slow-query log – off unless MSSQL_SLOW_QUERY_LOG names a file. execute_sql
+# statements taking at least threshold_ms (MSSQL_SLOW_QUERY_MS) are logged;
+# from plan_threshold_ms (MSSQL_SLOW_QUERY_PLAN_MS, 0 = never) with their
+# estimated plan. The file rotates at max_bytes, keeping `backups` old files.
+DEFAULT_SLOW_QUERY_CONFIG = {
+    "file": None,
+    "threshold_ms": 500,
+    "plan_threshold_ms": 2000,
+    "max_bytes": 10 * 1024 * 1024,
+    "backups": 5,
+}
+# Statements whose estimated plan is worth capturing
+_PLANNED_STATEMENTS = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "MERGE"}
+
 # Logging configuration
 
 logging.basicConfig(
@@ -33,176 +223,2743 @@ logging.basicConfig(
     format="[%(asctime)s] %(levelname)s %(message)s",
 )
 
-def _build_connection_string() -> str:
-    """Assemble an ODBC connection string from env vars."""
-
-    encrypt = bool(
-        os.getenv("MSSQL_ENCRYPT")
-        or ("true" if DEFAULT_DB_CONFIG["encrypt"] else "false")
-    ).__str__().lower() == "true"
-
-    trust_cert = bool(
-        os.getenv("MSSQL_TRUST_SERVER_CERTIFICATE")
-        or ("true" if DEFAULT_DB_CONFIG["trust_cert"] else "false")
-    ).__str__().lower() == "true"
-
-    parts = [
-        "Driver={ODBC Driver 17 for SQL Server}",
-        # host,port
-        f"Server={os.getenv('DB_SERVER', DEFAULT_DB_CONFIG['server'])},"
-        f"{os.getenv('DB_PORT', DEFAULT_DB_CONFIG['port'])}",
-        f"Database={os.getenv('DB_NAME', DEFAULT_DB_CONFIG['database'])}",
-        f"UID={os.getenv('DB_USER', DEFAULT_DB_CONFIG['user'])}",
-        f"PWD={os.getenv('DB_PASSWORD', DEFAULT_DB_CONFIG['password'])}",
-    ]
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    return int(os.getenv(name, str(default)))
 
-    if encrypt:
-        parts.append("Encrypt=yes")
-        parts.append(f"TrustServerCertificate={'yes' if trust_cert else 'no'}")
-    else:
-        parts.append("Encrypt=no")
 
-    timeout_sec = int(
-        os.getenv("MSSQL_CONNECT_TIMEOUT", str(DEFAULT_DB_CONFIG["connect_timeout_ms"] // 1000))
+# Metrics updated inline; component gauges are read at scrape time by
+# _component_metrics
+_metrics = metrics.Registry()
+_tool_calls = _metrics.counter(
+    "mcp_tool_calls_total", "Tool calls by tool and outcome (ok or error).", ("tool", "outcome")
+)
+_tool_seconds = _metrics.histogram(
+    "mcp_tool_duration_seconds", "Tool call latency, including time queued for a slot.", ("tool",)
+)
+_tool_errors = _metrics.counter(
+    "mcp_tool_errors_total", "Failed tool calls by exception type.", ("tool", "error")
+)
+_tool_rows = _metrics.counter("mcp_tool_rows_total", "Result rows returned, by tool.", ("tool",))
+_tool_bytes = _metrics.counter(
+    "mcp_tool_response_bytes_total", "Size of tool results as JSON text, by tool.", ("tool",)
+)
+_queue_seconds = _metrics.histogram(
+    "mcp_tool_queue_seconds", "Time tool calls waited for a concurrency slot."
+)
+_connect_seconds = _metrics.histogram(
+    "mcp_db_connect_duration_seconds", "Time to open a new database connection."
+)
+_connect_errors = _metrics.counter(
+    "mcp_db_connect_errors_total", "Failed attempts to open a database connection."
+)
+_statement_seconds = _metrics.histogram(
+    "mcp_db_statement_duration_seconds",
+    "Time until the database accepted a statement and had rows ready, by statement type.",
+    ("statement",),
+)
+# Statement labels; anything else is counted as OTHER
+_STATEMENT_TYPES = {
+    "SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "MERGE",
+    "EXEC", "EXECUTE", "CREATE", "ALTER", "DROP", "TRUNCATE",
+}
+
+
+def _statement_type(query: str) -> str:
+    words = query.split(None, 1)
+    word = words[0].upper() if words else ""
+    return word if word in _STATEMENT_TYPES else "OTHER"
+
+
+_backend = create_backend(DEFAULT_DB_CONFIG)
+
+# Spans go to TRACE_FILE (shared with the agent console) or MSSQL_TRACE_FILE;
+# a client's trace arrives as a traceparent in the tool call's _meta
+_tracer = tracing.Tracer("sql-mcp-server", os.getenv("MSSQL_TRACE_FILE") or TRACE_FILE)
+
+
+def _open_connection():
+    """Open a brand-new connection through the configured backend."""
+
+    started = time.perf_counter()
+    try:
+        with tracing.span("db.connect", attributes={"db.system": _backend.name}):
+            conn = _backend.connect()
+    except Exception as exc:  # noqa: BLE001
+        _connect_errors.inc()
+        logging.exception("Failed to connect to %s: %s", _backend.dialect, exc)
+        raise
+    _connect_seconds.observe(time.perf_counter() - started)
+    return conn
+
+
+def _close_quietly(conn) -> None:
+    """Close a connection, ignoring errors from an already-dead socket."""
+    try:
+        conn.close()
+    except Exception:  # noqa: BLE001
+        pass
+
+
+class _PooledConnection:
+    """A DB-API connection plus the bookkeeping the pool needs."""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of reusable database connections.
+
+    Connections are opened lazily up to ``max_size``.  Idle connections are
+    closed after ``idle_timeout`` seconds (keeping at least ``min_size``) and
+    every connection is recycled once it is older than ``max_lifetime``.
+    Checked-out connections are pinged first; returned connections are
+    rolled back so no transaction state leaks between tool calls.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        min_size: int,
+        max_size: int,
+        idle_timeout: float,
+        max_lifetime: float,
+        acquire_timeout: float,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("Connection pool max_size must be at least 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._idle: deque = deque()  # oldest on the left, warmest on the right
+        self._size = 0  # idle + checked out + being opened
+        self._closed = False
+
+        self._opened = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._failed_pings = 0
+
+    def _expired(self, pooled: _PooledConnection, now: float) -> bool:
+        return now - pooled.created_at > self.max_lifetime
+
+    def _prune_idle_locked(self, now: float) -> List[_PooledConnection]:
+        """Pop expired idle connections; caller closes them outside the lock."""
+        stale = []
+        for pooled in list(self._idle):
+            idle_for = now - pooled.last_used
+            if self._expired(pooled, now) or (
+                idle_for > self.idle_timeout and self._size - len(stale) > self.min_size
+            ):
+                stale.append(pooled)
+        for pooled in stale:
+            self._idle.remove(pooled)
+        self._size -= len(stale)
+        self._discarded += len(stale)
+        return stale
+
+    @staticmethod
+    def _is_alive(pooled: _PooledConnection) -> bool:
+        try:
+            cur = pooled.conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            finally:
+                cur.close()
+            return True
+        except Exception:  # noqa: BLE001
+            return False
+
+    def acquire(self) -> _PooledConnection:
+        """Check a connection out of the pool, opening one if there is room."""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+        stale: List[_PooledConnection] = []
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                stale.extend(self._prune_idle_locked(time.monotonic()))
+                if self._idle:
+                    pooled: Optional[_PooledConnection] = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    pooled = None
+                    self._size += 1  # reserve the slot while we connect
+                    break
+                waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._record_wait(time.monotonic() - start)
+                    raise TimeoutError(
+                        f"Timed out after {self.acquire_timeout}s waiting for a "
+                        f"database connection (pool max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+            self._checkouts += 1
+            if waited:
+                self._record_wait(time.monotonic() - start)
+
+        for old in stale:
+            _close_quietly(old.conn)
+
+        if pooled is not None:
+            if self._is_alive(pooled):
+                return pooled
+            logging.warning("Discarding dead pooled connection")
+            _close_quietly(pooled.conn)
+            with self._cond:
+                self._failed_pings += 1
+                self._discarded += 1
+
+        # Either there was no idle connection or it failed its ping – the
+        # slot is already reserved, so open a fresh connection in its place.
+        try:
+            pooled = _PooledConnection(self._connect())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._opened += 1
+        return pooled
+
+    def _record_wait(self, elapsed: float) -> None:
+        self._waits += 1
+        self._wait_time += elapsed
+        self._max_wait_time = max(self._max_wait_time, elapsed)
+
+    def release(self, pooled: _PooledConnection, discard: bool = False) -> None:
+        """Return a connection, resetting its state or discarding it."""
+        if not discard:
+            try:
+                pooled.conn.rollback()
+            except Exception:  # noqa: BLE001
+                logging.warning("Pooled connection failed to reset; discarding it")
+                discard = True
+        now = time.monotonic()
+        with self._cond:
+            if discard or self._closed or self._expired(pooled, now):
+                self._size -= 1
+                self._discarded += 1
+                discard = True
+            else:
+                pooled.last_used = now
+                self._idle.append(pooled)
+            self._cond.notify()
+        if discard:
+            _close_quietly(pooled.conn)
+
+    def prewarm(self) -> int:
+        """Open connections until the pool holds ``min_size``; returns how many."""
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return opened
+                self._size += 1  # reserve the slot while we connect
+            try:
+                pooled = _PooledConnection(self._connect())
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            opened += 1
+            self.release(pooled)
+            with self._cond:
+                self._opened += 1
+
+    def close(self) -> None:
+        """Close every idle connection and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            _close_quietly(pooled.conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool utilisation for sizing decisions."""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._size - idle,
+                "idle": idle,
+                "checkouts": self._checkouts,
+                "opened": self._opened,
+                "discarded": self._discarded,
+                "failed_pings": self._failed_pings,
+                "waits": self._waits,
+                "wait_time_sec": round(self._wait_time, 6),
+                "max_wait_time_sec": round(self._max_wait_time, 6),
+            }
+
+
+def _create_pool() -> ConnectionPool:
+    """Build the connection pool from MSSQL_POOL_* env vars."""
+    return ConnectionPool(
+        _open_connection,
+        min_size=_env_int("MSSQL_POOL_MIN_SIZE", DEFAULT_POOL_CONFIG["min_size"]),
+        max_size=_env_int("MSSQL_POOL_MAX_SIZE", DEFAULT_POOL_CONFIG["max_size"]),
+        idle_timeout=_env_int("MSSQL_POOL_IDLE_TIMEOUT", DEFAULT_POOL_CONFIG["idle_timeout_sec"]),
+        max_lifetime=_env_int("MSSQL_POOL_MAX_LIFETIME", DEFAULT_POOL_CONFIG["max_lifetime_sec"]),
+        acquire_timeout=_env_int(
+            "MSSQL_POOL_ACQUIRE_TIMEOUT", DEFAULT_POOL_CONFIG["acquire_timeout_sec"]
+        ),
     )
-    parts.append(f"Connection Timeout={timeout_sec}")
 
-    return ";".join(parts)
+
+_pool = _create_pool()
+
+
+def _prewarm_pool() -> None:
+    """Open MSSQL_POOL_MIN_SIZE connections at startup, before the first call."""
+    try:
+        _pool.prewarm()
+    except Exception as exc:  # noqa: BLE001
+        logging.warning("Could not open pooled connections at startup: %s", exc)
+
+
+def _query_timeout(timeout_seconds: Optional[int] = None) -> int:
+    """Statement timeout for a call: the explicit value or MSSQL_QUERY_TIMEOUT."""
+    if timeout_seconds is None:
+        return _env_int("MSSQL_QUERY_TIMEOUT", DEFAULT_QUERY_TIMEOUT_SEC)
+    if timeout_seconds < 0:
+        raise ValueError("timeout_seconds must be zero (no limit) or positive")
+    return timeout_seconds
+
+
+def _checkout(timeout_seconds: Optional[int] = None) -> _PooledConnection:
+    """Acquire a pooled connection with its statement timeout set for this call."""
+    with tracing.span("db.pool.acquire"):
+        pooled = _pool.acquire()
+    try:
+        _backend.set_timeout(pooled.conn, _query_timeout(timeout_seconds))
+    except BaseException as exc:
+        _checkin(pooled, exc)
+        raise
+    return pooled
+
+
+def _checkin(pooled: _PooledConnection, exc: Optional[BaseException] = None) -> None:
+    """Return a connection to the pool, or close it if ``exc`` may have broken it.
+
+    Driver errors, timeouts and cancellations can leave a connection mid-
+    statement or mid-cancel, which the next checkout's ping would not
+    necessarily notice; errors raised by the server's own checks cannot.
+    """
+    _pool.release(pooled, discard=isinstance(exc, (_backend.Error, QueryCancelled, TimeoutError)))
 
 
 @contextlib.contextmanager
-def _get_connection():
-    """Context manager that yields a live pyodbc connection."""
+def _get_connection(timeout_seconds: Optional[int] = None):
+    """Context manager that yields a live database connection from the pool."""
 
+    pooled = _checkout(timeout_seconds)
     try:
-        conn = pyodbc.connect(
-            _build_connection_string(),
-            ansi=True,
-            timeout=int(
-                os.getenv(
-                    "MSSQL_CONNECT_TIMEOUT",
-                    str(DEFAULT_DB_CONFIG["connect_timeout_ms"] // 1000),
-                )
-            ),
+        yield pooled.conn
+    except BaseException as exc:
+        _checkin(pooled, exc)
+        raise
+    _checkin(pooled)
+
+
+class QueryCancelled(Exception):
+    """Raised inside a DB worker once its MCP request has been cancelled."""
+
+
+class _CancelToken:
+    """Cancellation state shared between a tool call and its DB worker thread.
+
+    The worker registers the cursor it is executing on, so cancelling the
+    token can interrupt the running statement with ``cursor.cancel()``.
+    """
+
+    __slots__ = ("_event", "cursor", "query", "started_at")
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.cursor = None
+        self.query: Optional[str] = None
+        self.started_at: Optional[float] = None
+
+    def cancel(self) -> float:
+        """Flag the request and interrupt its statement; returns seconds it ran."""
+        self._event.set()
+        cursor = self.cursor
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except Exception as exc:  # noqa: BLE001
+                logging.warning("cursor.cancel() failed: %s", exc)
+        return self.running_for()
+
+    def running_for(self) -> float:
+        return 0.0 if self.started_at is None else time.monotonic() - self.started_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+# The token of the request a DB worker thread is currently serving
+_request_state = threading.local()
+
+
+def _current_token() -> Optional[_CancelToken]:
+    return getattr(_request_state, "token", None)
+
+
+def _check_cancelled() -> None:
+    """Abort the current DB work if its request was cancelled."""
+    token = _current_token()
+    if token is not None and token.cancelled:
+        raise QueryCancelled(
+            f"Query cancelled by the client after {token.running_for():.2f}s"
         )
-    except Exception as exc:  # noqa: BLE001
-        logging.exception("Failed to connect to SQL Server: %s", exc)
+
+
+def _track_statement(cur, query: str) -> None:
+    """Let cancelling the current request interrupt ``cur`` via ``cursor.cancel()``."""
+    token = _current_token()
+    if token is None:
+        return
+    # publish the cursor before checking the flag so a concurrent cancel() can't miss it
+    token.cursor = cur
+    token.query = query
+    token.started_at = time.monotonic()
+    _check_cancelled()
+
+
+def _translate_interrupt(exc: Exception) -> None:
+    """Re-raise driver errors caused by cancellation or a statement timeout."""
+    token = _current_token()
+    ran_for = token.running_for() if token is not None else 0.0
+    if token is not None and token.cancelled:
+        raise QueryCancelled(f"Query cancelled after {ran_for:.2f}s") from exc
+    if _backend.is_timeout(exc):
+        _db.record_cancellation(token.query if token else None, "timeout", ran_for)
+        raise TimeoutError(f"Query timed out and was cancelled after {ran_for:.2f}s") from exc
+
+
+def _execute_tracked(cur, query: str) -> None:
+    """``cur.execute(query)`` that cancellation and timeouts can interrupt."""
+    _track_statement(cur, query)
+    try:
+        statement = _statement_type(query)
+        with _statement_seconds.time(statement=statement), tracing.span(
+            "db.execute",
+            attributes={"db.system": _backend.name, "db.operation": statement, "db.statement": query[:2000]},
+        ):
+            cur.execute(query)
+    except _backend.Error as exc:
+        _translate_interrupt(exc)
         raise
+
+
+def _create_slow_query_log(worker: Optional[int] = None) -> Optional[SlowQueryLog]:
+    path = os.getenv("MSSQL_SLOW_QUERY_LOG") or DEFAULT_SLOW_QUERY_CONFIG["file"]
+    if not path:
+        return None
+    if worker is not None:
+        # one file per worker process; rotation is not safe across processes
+        root, ext = os.path.splitext(path)
+        path = f"{root}.worker{worker}{ext}"
+    return SlowQueryLog(
+        path,
+        threshold_ms=_env_int("MSSQL_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_CONFIG["threshold_ms"]),
+        plan_threshold_ms=_env_int("MSSQL_SLOW_QUERY_PLAN_MS", DEFAULT_SLOW_QUERY_CONFIG["plan_threshold_ms"]),
+        max_bytes=_env_int("MSSQL_SLOW_QUERY_MAX_BYTES", DEFAULT_SLOW_QUERY_CONFIG["max_bytes"]),
+        backups=_env_int("MSSQL_SLOW_QUERY_BACKUPS", DEFAULT_SLOW_QUERY_CONFIG["backups"]),
+    )
+
+
+_slow_log = _create_slow_query_log()
+
+
+def _explain(query: str) -> Optional[str]:
+    """Estimated plan of ``query`` on a connection of its own."""
+    pooled = _checkout()
     try:
-        yield conn
+        plan = _backend.explain(pooled.conn, query)
+    except BaseException:
+        # whatever failed, the session may still be in plan-only mode
+        # (SHOWPLAN_XML ON) and would return plans instead of running queries
+        _pool.release(pooled, discard=True)
+        raise
+    _checkin(pooled)
+    return plan
+
+
+def _log_if_slow(
+    query: str,
+    started: float,
+    rows: Optional[int] = None,
+    bytes_read: Optional[int] = None,
+    truncated: bool = False,
+) -> None:
+    """Record a finished statement in the slow-query log if it ran long enough.
+
+    Past the plan threshold the log fetches the statement's estimated plan
+    on its own thread and connection, after this request has returned.
+    """
+    if _slow_log is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < _slow_log.threshold_ms:
+        return
+    statement = _statement_type(query)
+    _slow_log.record(
+        query,
+        _normalize_query(query),
+        duration_ms,
+        statement=statement,
+        rows=rows,
+        bytes_read=bytes_read,
+        truncated=truncated,
+        explain=functools.partial(_explain, query) if statement in _PLANNED_STATEMENTS else None,
+        worker=_process["worker"],
+    )
+
+
+def _run_with_token(token: _CancelToken, fn: Callable[..., Any], args) -> Any:
+    _request_state.token = token
+    try:
+        _check_cancelled()  # cancelled while still queued
+        return fn(*args)
     finally:
-        conn.close()
+        _request_state.token = None
+
+
+class DbExecutor:
+    """Bounded thread pool that runs blocking database work for async tools.
+
+    Sized like the connection pool so every worker can hold a connection.
+    When the awaiting tool call is cancelled (client cancel or disconnect)
+    or overruns its deadline, the worker's running statement is cancelled
+    with ``cursor.cancel()`` and the work stops.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._cancelled = 0
+        self._recent: deque = deque(maxlen=20)
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """Run ``fn(*args)`` on a worker; ``timeout`` (seconds, 0 = none) bounds the call."""
+        token = _CancelToken()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending += 1
+        try:
+            # run in a copy of the caller's context so trace spans nest under the tool call
+            future = loop.run_in_executor(
+                self._executor,
+                functools.partial(contextvars.copy_context().run, _run_with_token, token, fn, args),
+            )
+            if not timeout:
+                return await future
+            return await asyncio.wait_for(future, timeout + QUERY_DEADLINE_GRACE_SEC)
+        except asyncio.TimeoutError:
+            if not future.cancelled():
+                raise  # a TimeoutError from the work itself, not our deadline
+            ran_for = token.cancel()
+            self.record_cancellation(token.query, "timeout", ran_for)
+            raise TimeoutError(
+                f"Query exceeded its {timeout}s timeout and was cancelled after {ran_for:.2f}s"
+            ) from None
+        except asyncio.CancelledError:
+            ran_for = token.cancel()
+            self.record_cancellation(token.query, "cancelled", ran_for)
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def record_cancellation(self, query: Optional[str], reason: str, ran_for: float) -> None:
+        logging.info("Query %s after %.2fs: %s", reason, ran_for, query)
+        with self._lock:
+            self._cancelled += 1
+            self._recent.append({
+                "query": (query or "")[:200],
+                "reason": reason,
+                "ran_for_sec": round(ran_for, 3),
+            })
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": self._pending,
+                "cancelled": self._cancelled,
+                "recent_cancellations": list(self._recent),
+            }
+
+
+def _create_executor(pool: ConnectionPool) -> DbExecutor:
+    return DbExecutor(_env_int("MSSQL_WORKER_THREADS", pool.max_size))
+
+
+_db = _create_executor(_pool)
+
+
+class CallLimiter:
+    """Caps the tool calls in flight across every connected client.
+
+    Over the limit, calls queue in arrival order instead of failing, so a
+    burst from many agents cannot pile up unbounded work behind the pool.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._calls = 0
+        self._waited = 0
+        self._wait_time = 0.0
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self.limit <= 0:
+            self._in_flight += 1
+            self._calls += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+            return
+        # created on first use so it belongs to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        started = time.monotonic()
+        if self._semaphore.locked():
+            self._waited += 1
+        self._waiting += 1
+        try:
+            if self._semaphore.locked():
+                with tracing.span("queue"):
+                    await self._semaphore.acquire()
+            else:
+                await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - started
+        self._wait_time += waited
+        _queue_seconds.observe(waited)
+        self._in_flight += 1
+        self._calls += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        # only touched from the event loop thread, so no lock is needed
+        return {
+            "max_concurrent_calls": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "calls": self._calls,
+            "calls_queued": self._waited,
+            "queue_wait_time_sec": round(self._wait_time, 3),
+        }
+
+
+_call_limiter = CallLimiter(
+    _env_int("MSSQL_MAX_CONCURRENT_CALLS", DEFAULT_TRANSPORT_CONFIG["max_concurrent_calls"])
+)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a true/false setting from the environment."""
+    return os.getenv(name, "true" if default else "false").strip().lower() in ("1", "true", "yes")
+
+
+def _result_limits() -> Tuple[int, int]:
+    """Current (max_rows, max_bytes) caps for a single response."""
+    return (
+        _env_int("MSSQL_MAX_ROWS", DEFAULT_RESULT_LIMITS["max_rows"]),
+        _env_int("MSSQL_MAX_RESULT_BYTES", DEFAULT_RESULT_LIMITS["max_bytes"]),
+    )
+
+
+# execute_sql result layouts: "rows" is a list of {column: value} dicts (the
+# original format); "arrays" and "columns" name each column once
+RESULT_FORMATS = ("rows", "arrays", "columns")
+
+
+def _check_result_format(result_format: str) -> None:
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(
+            f"Unknown result_format {result_format!r}; expected one of {', '.join(RESULT_FORMATS)}"
+        )
+
+
+def _typed_rows() -> bool:
+    """Whether "rows" results carry JSON-typed values (MSSQL_TYPED_ROWS, default on).
+
+    Turn it off to get the legacy all-strings values; "arrays" and "columns"
+    are always typed.
+    """
+    return _env_flag("MSSQL_TYPED_ROWS", True)
+
+
+def _row_values(row) -> List[Any]:
+    """Stringify a result row the way execute_sql used to return it."""
+    return [str(val) if val is not None else None for val in row]
+
+
+class _ResultReader:
+    """Reads a cursor in fetchmany batches, stopping at row and byte caps.
+
+    Rows fetched but not returned stay buffered, so the reader can resume
+    (for fetch_more) and can tell whether the result was truncated.
+    """
+
+    __slots__ = (
+        "cursor", "columns", "column_types", "numeric_types", "result_format",
+        "buffer", "done", "rows_read", "bytes_read", "_row_overhead", "_converter",
+    )
+
+    def __init__(self, cursor, result_format: str = "rows") -> None:
+        self.cursor = cursor
+        self.columns = [c[0] for c in cursor.description]
+        self.column_types = [getattr(c[1], "__name__", None) for c in cursor.description]
+        self.numeric_types = [numeric_type(c) for c in cursor.description]
+        self.result_format = result_format
+        self._converter = RowBatchConverter(
+            cursor.description, typed=result_format != "rows" or _typed_rows()
+        )
+        self.buffer: deque = deque()
+        self.done = False
+        self.rows_read = 0
+        self.bytes_read = 0
+        # brackets/commas per row, plus "name": per column for dict rows
+        self._row_overhead = len(self.columns) + 2
+        if result_format == "rows":
+            self._row_overhead += sum(len(c) + 3 for c in self.columns)
+
+    def _fill(self, size: int) -> bool:
+        if not self.buffer and not self.done:
+            _check_cancelled()
+            try:
+                batch = self.cursor.fetchmany(size)
+            except _backend.Error as exc:
+                _translate_interrupt(exc)
+                raise
+            if batch:
+                self.buffer.extend(batch)
+            else:
+                self.done = True
+        return bool(self.buffer)
+
+    def read(self, max_rows: int, max_bytes: int) -> List[List[Any]]:
+        """Return up to ``max_rows`` converted rows totalling roughly ``max_bytes``.
+
+        At least one row is returned even if it alone exceeds ``max_bytes``.
+        """
+        with tracing.span("db.fetch") as span:
+            bytes_before = self.bytes_read
+            rows = self._read(max_rows, max_bytes)
+            span.set_attribute("db.rows", len(rows))
+            span.set_attribute("db.bytes", self.bytes_read - bytes_before)
+        return rows
+
+    def _read(self, max_rows: int, max_bytes: int) -> List[List[Any]]:
+        rows: List[List[Any]] = []
+        size = 2
+        overhead = self._row_overhead
+        while len(rows) < max_rows:
+            # +1 so the batch that completes the page also answers has_more()
+            if not self._fill(min(max_rows - len(rows) + 1, FETCH_BATCH_SIZE)):
+                break
+            take = min(len(self.buffer), max_rows - len(rows))
+            if take == len(self.buffer):
+                raw = list(self.buffer)
+                self.buffer.clear()
+            else:
+                raw = [self.buffer.popleft() for _ in range(take)]
+            values, sizes = self._converter.convert(raw)
+            # how many of these rows still fit under max_bytes
+            ends = list(itertools.accumulate(s + overhead for s in sizes))
+            fit = bisect.bisect_right(ends, max_bytes - size) or (0 if rows else 1)
+            if fit:
+                rows.extend(values[:fit])
+                size += ends[fit - 1]
+            if fit < take:
+                self.buffer.extendleft(reversed(raw[fit:]))
+                break
+        self.rows_read += len(rows)
+        self.bytes_read += size
+        return rows
+
+    def shape(self, rows: List[List[Any]]) -> Dict[str, Any]:
+        """Lay rows out in the reader's result format."""
+        if self.result_format == "rows":
+            keys = tuple(self.columns)
+            return {"columns": self.columns, "rows": [dict(zip(keys, values)) for values in rows]}
+        payload: Dict[str, Any] = {
+            "format": self.result_format,
+            "columns": self.columns,
+            "column_types": self.column_types,
+        }
+        if self.result_format == "arrays":
+            payload["rows"] = rows
+        else:
+            payload["values"] = [list(col) for col in zip(*rows)] if rows else [
+                [] for _ in self.columns
+            ]
+        return payload
+
+    def has_more(self) -> bool:
+        """Whether unread rows remain (may fetch one row of look-ahead)."""
+        return self._fill(1)
+
+
+class _HeldCursor:
+    """A server-side cursor kept open between execute_sql and fetch_more."""
+
+    __slots__ = ("pooled", "reader", "expires_at")
+
+    def __init__(self, pooled: _PooledConnection, reader: _ResultReader) -> None:
+        self.pooled = pooled
+        self.reader = reader
+        self.expires_at = 0.0
+
+    @property
+    def cursor(self):
+        return self.reader.cursor
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.reader.has_more()
+
+
+class CursorStore:
+    """Open cursors addressed by opaque continuation tokens.
+
+    Each entry pins a pooled connection, so entries are evicted (and their
+    connection returned) after ``ttl`` seconds without a ``fetch_more`` and
+    the oldest entry is dropped once ``max_open`` cursors are held.
+    """
+
+    def __init__(self, pool: ConnectionPool, *, ttl: float, max_open: int) -> None:
+        self._pool = pool
+        self.ttl = ttl
+        self.max_open = max(1, max_open)
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, _HeldCursor] = {}  # insertion order == age
+        self._evicted = 0
+        self._sweeper: Optional[threading.Thread] = None
+
+    def _close(self, held: _HeldCursor) -> None:
+        try:
+            held.cursor.close()
+        except Exception:  # noqa: BLE001
+            pass
+        self._pool.release(held.pooled)
+
+    def put(self, held: _HeldCursor) -> str:
+        """Park a cursor and return its continuation token."""
+        token = secrets.token_urlsafe(16)
+        held.expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._cursors[token] = held
+            overflow = []
+            while len(self._cursors) > self.max_open:
+                oldest = next(iter(self._cursors))
+                overflow.append(self._cursors.pop(oldest))
+            self._evicted += len(overflow)
+        for old in overflow:
+            logging.info("Evicting oldest paged cursor to stay under max_open")
+            self._close(old)
+        self._ensure_sweeper()
+        return token
+
+    def take(self, token: str) -> _HeldCursor:
+        """Remove a cursor from the store so one caller can read from it."""
+        with self._lock:
+            held = self._cursors.pop(token, None)
+        if held is None:
+            raise ValueError("Unknown or expired continuation token")
+        if held.expires_at < time.monotonic():
+            self._close(held)
+            raise ValueError("Unknown or expired continuation token")
+        return held
+
+    def release(self, held: _HeldCursor) -> Optional[str]:
+        """Close an exhausted cursor or park it again under a fresh token."""
+        if held.exhausted:
+            self._close(held)
+            return None
+        return self.put(held)
+
+    def discard(self, held: _HeldCursor) -> None:
+        """Close a cursor whose connection may be in a bad state."""
+        try:
+            held.cursor.close()
+        except Exception:  # noqa: BLE001
+            pass
+        self._pool.release(held.pooled, discard=True)
+
+    def sweep(self) -> int:
+        """Close cursors whose TTL has passed; returns how many were closed."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [t for t, held in self._cursors.items() if held.expires_at < now]
+            stale = [self._cursors.pop(t) for t in expired]
+            self._evicted += len(stale)
+        for held in stale:
+            self._close(held)
+        return len(stale)
+
+    def _ensure_sweeper(self) -> None:
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(
+                target=self._sweep_forever, name="cursor-sweeper", daemon=True
+            )
+        self._sweeper.start()
+
+    def _sweep_forever(self) -> None:
+        interval = max(1.0, min(self.ttl / 2, 30.0))
+        while True:
+            time.sleep(interval)
+            try:
+                self.sweep()
+            except Exception as exc:  # noqa: BLE001
+                logging.warning("Cursor sweep failed: %s", exc)
+
+    def close_all(self) -> None:
+        with self._lock:
+            held = list(self._cursors.values())
+            self._cursors.clear()
+        for h in held:
+            self._close(h)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": len(self._cursors),
+                "max_open": self.max_open,
+                "ttl_sec": self.ttl,
+                "evicted": self._evicted,
+            }
+
+
+def _create_cursor_store(pool: ConnectionPool) -> CursorStore:
+    return CursorStore(
+        pool,
+        ttl=_env_int("MSSQL_CURSOR_TTL", DEFAULT_CURSOR_CONFIG["ttl_sec"]),
+        max_open=_env_int("MSSQL_CURSOR_MAX_OPEN", DEFAULT_CURSOR_CONFIG["max_open"]),
+    )
+
+
+_cursors = _create_cursor_store(_pool)
+
+
+def _page_response(held: _HeldCursor, page_size: int) -> Dict[str, Any]:
+    """Read one page from a held cursor and hand it back (or close it)."""
+    max_rows, max_bytes = _result_limits()
+    try:
+        _track_statement(held.cursor, "fetch_more")
+        rows = held.reader.read(min(page_size, max_rows), max_bytes)
+        held.reader.has_more()  # settle the look-ahead while errors can still discard
+    except Exception:
+        _cursors.discard(held)
+        raise
+    token = _cursors.release(held)
+    return {
+        "type": "select",
+        **held.reader.shape(rows),
+        "row_count": len(rows),
+        "rows_sent": held.reader.rows_read,
+        "has_more": token is not None,
+        "continuation_token": token,
+    }
+
+
+# Statement types that can change table or column definitions
+_DDL_TYPES = {"CREATE", "ALTER", "DROP", "EXEC", "EXECUTE"}
+
+class SchemaCache:
+    """In-process cache of list_tables/describe_table results.
+
+    Entries are keyed by ``(schema, table)`` (``"tables"`` for the table
+    list).  Every ``check_interval`` seconds the backend's cheap schema-version
+    probe is compared with the previous one and the cache is cleared on change.
+    """
+
+    def __init__(self, *, enabled: bool, check_interval: float) -> None:
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._entries: Dict[Any, Any] = {}
+        # bumped whenever entries are cleared; loads that straddle a clear are not stored
+        self._generation = 0
+        self._version: Optional[Tuple[Any, ...]] = None
+        self._checked_at = float("-inf")
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def _probe(self) -> Tuple[Any, ...]:
+        with _get_connection() as conn:
+            return _backend.schema_version(conn)
+
+    def _revalidate(self) -> None:
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        # one probe at a time; other callers keep using the current entries
+        if not self._probe_lock.acquire(blocking=False):
+            return
+        try:
+            version = self._probe()
+            with self._lock:
+                if self._version is not None and version != self._version:
+                    logging.info("Schema change detected; clearing schema cache")
+                    self._clear_entries_locked()
+                    self._invalidations += 1
+                self._version = version
+                self._checked_at = time.monotonic()
+        finally:
+            self._probe_lock.release()
+
+    def lookup(self, key: Any, load: Callable[[Any], Any]) -> Any:
+        """Return the cached value for ``key`` or ``load(conn)`` it."""
+        return self.lookup_many([key], lambda conn, missing: {key: load(conn)})[key]
+
+    def lookup_many(
+        self, keys: List[Any], load_many: Callable[[Any, List[Any]], Dict[Any, Any]]
+    ) -> Dict[Any, Any]:
+        """Return values for ``keys``, loading all misses with one ``load_many`` call."""
+        if not self.enabled:
+            with _get_connection() as conn:
+                return load_many(conn, list(keys))
+        self._revalidate()
+        found: Dict[Any, Any] = {}
+        with self._lock:
+            generation = self._generation
+            for key in keys:
+                if key in self._entries:
+                    found[key] = self._entries[key]
+            missing = [key for key in keys if key not in found]
+            self._hits += len(found)
+            self._misses += len(missing)
+        if missing:
+            with _get_connection() as conn:
+                loaded = load_many(conn, missing)
+            with self._lock:
+                if generation == self._generation:
+                    self._entries.update(loaded)
+            found.update(loaded)
+        return found
+
+    def _clear_entries_locked(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry and force a fresh probe on next use."""
+        with self._lock:
+            self._clear_entries_locked()
+            self._version = None
+            self._checked_at = float("-inf")
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "check_interval_sec": self.check_interval,
+            }
+
+
+class SharedSchemaCache(SchemaCache):
+    """SchemaCache whose entries live in the workers' :class:`SharedCacheStore`.
+
+    Each worker still probes for schema changes itself; a change seen by
+    any of them clears the entries for all.
+    """
+
+    def __init__(self, store: SharedCacheStore, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._store = store
+
+    def lookup_many(
+        self, keys: List[Any], load_many: Callable[[Any, List[Any]], Dict[Any, Any]]
+    ) -> Dict[Any, Any]:
+        if not self.enabled:
+            return super().lookup_many(keys, load_many)
+        self._revalidate()
+        # taken before reading, so a clear by any worker during the load shows
+        generation = self._store.generation("schema")
+        found = self._store.get_many("schema", keys)
+        missing = [key for key in keys if key not in found]
+        with self._lock:
+            self._hits += len(found)
+            self._misses += len(missing)
+        if missing:
+            with _get_connection() as conn:
+                loaded = load_many(conn, missing)
+            # stale if the schema changed (or was refreshed) mid-load
+            self._store.put_many("schema", loaded, generation=generation)
+            found.update(loaded)
+        return found
+
+    def _clear_entries_locked(self) -> None:
+        self._store.clear("schema")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "entries": self._store.stats("schema")["entries"], "shared": True}
+
+
+def _create_schema_cache(store: Optional[SharedCacheStore] = None) -> SchemaCache:
+    settings = dict(
+        enabled=_env_flag("MSSQL_SCHEMA_CACHE", DEFAULT_SCHEMA_CACHE_CONFIG["enabled"]),
+        check_interval=_env_int(
+            "MSSQL_SCHEMA_CACHE_INTERVAL", DEFAULT_SCHEMA_CACHE_CONFIG["check_interval_sec"]
+        ),
+    )
+    return SharedSchemaCache(store, **settings) if store is not None else SchemaCache(**settings)
+
+
+_schema_cache = _create_schema_cache()
+
+
+def _split_table_name(table_name: str) -> Tuple[Optional[str], str]:
+    """Split ``[schema].[table]`` / ``schema.table`` / ``table`` into parts."""
+    parts = [p.strip().strip("[]") for p in table_name.split(".")]
+    if len(parts) >= 2:
+        return parts[-2], parts[-1]
+    return None, parts[0]
+
+
+# describe_tables sends a few parameters per name; SQL Server allows 2100
+MAX_DESCRIBE_TABLES = 200
 
 
 @mcp.tool(structured_output=True)
-def list_tables() -> List[Dict[str, str]]:
+async def list_tables() -> List[Dict[str, str]]:
     """List all tables in the database."""
     try:
-        with _get_connection() as conn:
-            logging.info("Listing all tables in database")
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT TABLE_SCHEMA, TABLE_NAME, TABLE_TYPE
-                FROM INFORMATION_SCHEMA.TABLES 
-                WHERE TABLE_TYPE = 'BASE TABLE'
-                ORDER BY TABLE_SCHEMA, TABLE_NAME       
-            """)
-
-            rows = cur.fetchall()
-            return [
-                {
-                    "schema": row[0],    # TABLE_SCHEMA
-                    "table": row[1],     # TABLE_NAME  
-                    "type": row[2]       # TABLE_TYPE
-                } 
-                for row in rows
-            ]
+        return await _db.run(
+            _schema_cache.lookup, "tables", _backend.list_tables, timeout=_query_timeout()
+        )
     except Exception as exc:  # noqa: BLE001
         logging.exception("Failed to list tables: %s", exc)
         raise
 
 
+def _describe_table(table_name: str) -> Dict[str, Any]:
+    key = schema_key(*_split_table_name(table_name))
+    columns = _schema_cache.lookup_many([key], _backend.describe_columns)[key]
+    return {"table_name": table_name, "columns": columns}
+
+
 @mcp.tool(structured_output=True)
-def describe_table(table_name: str) -> Dict[str, Any]:
-    """Get the schema of a specific table including columns, types, and constraints."""
+async def describe_table(table_name: str) -> Dict[str, Any]:
+    """Get the schema of a specific table including columns, types, and constraints.
+
+    ``table_name`` may be schema-qualified, e.g. ``dbo.Orders``.
+    """
     try:
-        with _get_connection() as conn:
-            logging.info("Describing table: %s", table_name)
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT 
-                    c.COLUMN_NAME,
-                    c.DATA_TYPE,
-                    c.CHARACTER_MAXIMUM_LENGTH,
-                    c.NUMERIC_PRECISION,
-                    c.NUMERIC_SCALE,
-                    c.IS_NULLABLE,
-                    c.COLUMN_DEFAULT,
-                    c.ORDINAL_POSITION
-                FROM INFORMATION_SCHEMA.COLUMNS c
-                WHERE c.TABLE_NAME = ?
-                ORDER BY c.ORDINAL_POSITION
-            """, table_name)
-            
-            columns = []
-            for row in cur.fetchall():
-                col_info = {
-                    "name": row[0],
-                    "type": row[1],
-                    "max_length": row[2],
-                    "precision": row[3],
-                    "scale": row[4],
-                    "nullable": row[5] == "YES",
-                    "default": row[6],
-                    "position": row[7]
-                }
-                columns.append(col_info)
-            return {"table_name": table_name, "columns": columns}
+        return await _db.run(_describe_table, table_name, timeout=_query_timeout())
     except Exception as exc:  # noqa: BLE001
         logging.exception("Failed to describe table %s: %s", table_name, exc)
         raise
 
 
+def _describe_tables(table_names: List[str], include_keys: bool) -> Dict[str, Any]:
+    keys = {name: schema_key(*_split_table_name(name)) for name in table_names}
+    unique_keys = list(dict.fromkeys(keys.values()))
+    columns = _schema_cache.lookup_many(unique_keys, _backend.describe_columns)
+    constraints: Dict[Any, Any] = {}
+    if include_keys:
+        found = [key for key in unique_keys if columns[key]]
+        if found:
+            constraints = _schema_cache.lookup_many(
+                [("constraints",) + key for key in found],
+                lambda conn, missing: _backend.describe_constraints(conn, [k[1:] for k in missing]),
+            )
+
+    tables, not_found = [], []
+    for name, key in keys.items():
+        if not columns[key]:
+            not_found.append(name)
+            continue
+        table_info: Dict[str, Any] = {"table_name": name, "columns": columns[key]}
+        if include_keys:
+            table_info.update(constraints[("constraints",) + key])
+        tables.append(table_info)
+    return {"tables": tables, "not_found": not_found}
+
+
 @mcp.tool(structured_output=True)
-def execute_sql(query: str) -> Dict[str, Any]:
-    """Execute any SQL query (SELECT, INSERT, UPDATE, DELETE, etc.)."""
+async def describe_tables(table_names: List[str], include_keys: bool = False) -> Dict[str, Any]:
+    """Describe several tables at once – one round trip instead of one per table.
+
+    Set ``include_keys`` to also get primary/foreign/unique keys and indexes.
+    Names may be schema-qualified; unknown tables are listed in ``not_found``.
+    """
+    if len(table_names) > MAX_DESCRIBE_TABLES:
+        raise ValueError(f"describe_tables accepts at most {MAX_DESCRIBE_TABLES} tables per call")
     try:
-        with _get_connection() as conn:
-            logging.info("Executing SQL query: %s", query)
-            cur = conn.cursor()
-            
-            # Determine query type
-            query_type = query.strip().split()[0].upper()
-            
-            if query_type == "SELECT":
-                cur.execute(query)
-                columns = [c[0] for c in cur.description]
-                rows = [dict(zip(columns, [str(val) if val is not None else None for val in row])) 
-                       for row in cur.fetchall()]
-                return {
-                    "type": "select",
-                    "columns": columns,
-                    "rows": rows,
-                    "row_count": len(rows)
-                }
+        return await _db.run(
+            _describe_tables, table_names, include_keys, timeout=_query_timeout()
+        )
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("Failed to describe tables %s: %s", table_names, exc)
+        raise
+
+
+@mcp.tool(structured_output=True)
+def refresh_schema_cache() -> Dict[str, Any]:
+    """Discard cached table and column metadata so the next lookups re-read it."""
+    _schema_cache.invalidate()
+    logging.info("Schema cache cleared on request")
+    return _schema_cache.stats()
+
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+# Anything that writes
+_WRITES = re.compile(
+    r"\b(?:INSERT|UPDATE|DELETE|MERGE|INTO|EXEC|EXECUTE|CREATE|ALTER|DROP|TRUNCATE|"
+    r"GRANT|REVOKE|DENY|BACKUP|RESTORE|DBCC|SET)\b",
+    re.IGNORECASE,
+)
+# Reads whose result depends on when (or where) they run
+_VOLATILE = re.compile(
+    r"\b(?:OPENROWSET|OPENQUERY|"
+    r"GETDATE|GETUTCDATE|SYSDATETIME|SYSUTCDATETIME|SYSDATETIMEOFFSET|"
+    r"CURRENT_TIMESTAMP|NEWID|NEWSEQUENTIALID|RAND|CRYPT_GEN_RANDOM)\b",
+    re.IGNORECASE,
+)
+
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace and case outside string literals for cache keys."""
+    parts, last = [], 0
+    for literal in _STRING_LITERAL.finditer(query):
+        parts.append(" ".join(query[last:literal.start()].split()).lower())
+        parts.append(literal.group())
+        last = literal.end()
+    parts.append(" ".join(query[last:].split()).lower())
+    return " ".join(p for p in parts if p).rstrip("; ")
+
+
+def _returns_rows(query: str) -> bool:
+    """A SELECT, or a CTE feeding a SELECT rather than a write."""
+    words = query.split(None, 1)
+    if not words or words[0].upper() not in ("SELECT", "WITH"):
+        return False
+    return words[0].upper() == "SELECT" or _WRITES.search(_STRING_LITERAL.sub("''", query)) is None
+
+
+def _is_read_only(query: str) -> bool:
+    """Conservatively classify a statement as a deterministic (cacheable) read."""
+    if not _returns_rows(query):
+        return False
+    code = _STRING_LITERAL.sub("''", query)
+    return _WRITES.search(code) is None and _VOLATILE.search(code) is None
+
+
+class ResultCache:
+    """LRU/TTL cache of read-only execute_sql results, bounded in bytes.
+
+    Any write statement executed through this server clears the cache; a
+    generation counter stops reads that raced with a write from
+    repopulating it with stale rows.
+    """
+
+    def __init__(self, *, enabled: bool, ttl: float, max_bytes: int) -> None:
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop_locked(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def put(self, key: Any, value: Dict[str, Any], size: int, generation: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return  # a write happened while this result was being read
+            if key in self._entries:
+                self._drop_locked(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop_locked(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _drop_locked(self, key: Any) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+class SharedResultCache(ResultCache):
+    """ResultCache kept in the workers' :class:`SharedCacheStore`.
+
+    TTL, the byte bound (LRU by last use) and the write generation are all
+    shared, so a write through any worker invalidates the cache for all.
+    Hit and miss counters stay per worker.
+    """
+
+    def __init__(self, store: SharedCacheStore, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._store = store
+
+    @property
+    def generation(self) -> int:
+        return self._store.generation("results")
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        value = self._store.get("results", key, touch=True)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def put(self, key: Any, value: Dict[str, Any], size: int, generation: int) -> None:
+        if size > self.max_bytes:
+            return
+        evicted = self._store.put(
+            "results", key, value, size=size, ttl=self.ttl, max_bytes=self.max_bytes,
+            generation=generation,
+        )
+        if evicted > 0:
+            with self._lock:
+                self._evictions += evicted
+
+    def invalidate(self) -> None:
+        self._store.clear("results")
+        with self._lock:
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), **self._store.stats("results"), "shared": True}
+
+
+def _create_result_cache(store: Optional[SharedCacheStore] = None) -> ResultCache:
+    settings = dict(
+        enabled=_env_flag("MSSQL_RESULT_CACHE", DEFAULT_RESULT_CACHE_CONFIG["enabled"]),
+        ttl=_env_int("MSSQL_RESULT_CACHE_TTL", DEFAULT_RESULT_CACHE_CONFIG["ttl_sec"]),
+        max_bytes=_env_int("MSSQL_RESULT_CACHE_MAX_BYTES", DEFAULT_RESULT_CACHE_CONFIG["max_bytes"]),
+    )
+    return SharedResultCache(store, **settings) if store is not None else ResultCache(**settings)
+
+
+_result_cache = _create_result_cache()
+
+
+class _StoredResult:
+    """One parked SELECT result: typed rows in memory or pickled on disk."""
+
+    __slots__ = (
+        "columns", "column_types", "numeric_types", "rows", "path", "size",
+        "row_count", "truncated", "query", "created_at", "expires_at",
+    )
+
+    def __init__(self, reader: "_ResultReader", rows: List[List[Any]], truncated: bool, query: str) -> None:
+        self.columns = reader.columns
+        self.column_types = reader.column_types
+        self.numeric_types = reader.numeric_types
+        self.rows: Optional[List[List[Any]]] = rows
+        self.path: Optional[str] = None
+        self.size = reader.bytes_read
+        self.row_count = len(rows)
+        self.truncated = truncated
+        self.query = query
+        self.created_at = time.time()
+        self.expires_at = 0.0
+
+
+# Result-store handles ("res_" + token_urlsafe); checked before any file access
+_RESULT_HANDLE = re.compile(r"^res_[A-Za-z0-9_-]+$")
+
+
+class ResultStore:
+    """Query results kept on the server and addressed by opaque handles.
+
+    Results live in memory until ``max_memory_bytes`` is exceeded, then the
+    least recently used ones are pickled to ``spill_dir`` and read back on
+    demand. Entries expire ``ttl`` seconds after their last use.
+
+    With ``shared_dir`` (multi-worker mode) every result is also published
+    there, so a handle created by one worker process can be read by any
+    other; those files expire ``ttl`` seconds after their last use by any
+    worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float,
+        max_memory_bytes: int,
+        spill_dir: Optional[str] = None,
+        shared_dir: Optional[str] = None,
+    ) -> None:
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self._spill_dir = spill_dir
+        self.shared_dir = shared_dir
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _StoredResult]" = OrderedDict()  # LRU order
+        self._memory_bytes = 0
+        self._spills = 0
+        self._expired = 0
+
+    def _spill_path(self, handle: str) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="mssql-results-")
+        return os.path.join(self._spill_dir, f"{handle}.pickle")
+
+    def _remove_file(self, entry: _StoredResult) -> None:
+        if entry.path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(entry.path)
+
+    def _expire_locked(self) -> List[_StoredResult]:
+        now = time.monotonic()
+        expired = [h for h, e in self._entries.items() if e.expires_at < now]
+        dropped = [self._pop_locked(h) for h in expired]
+        self._expired += len(dropped)
+        return dropped
+
+    def _pop_locked(self, handle: str) -> _StoredResult:
+        entry = self._entries.pop(handle)
+        if entry.rows is not None:
+            self._memory_bytes -= entry.size
+        return entry
+
+    def put(self, entry: _StoredResult) -> str:
+        """Store a result and return its handle, spilling results to stay under budget."""
+        handle = "res_" + secrets.token_urlsafe(12)
+        if self.shared_dir is not None:
+            self._sweep_shared()
+            self._publish(handle, entry)
+        self._insert(handle, entry)
+        return handle
+
+    def _insert(self, handle: str, entry: _StoredResult) -> None:
+        entry.expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            dropped = self._expire_locked()
+            self._entries[handle] = entry
+            self._memory_bytes += entry.size
+            # pick victims under the lock, but write them to disk outside it;
+            # a path marks a spill in progress so concurrent puts skip it.
+            # Least recently used first, ending with the new entry – unless
+            # it can never fit, in which case it goes straight to disk.
+            to_spill = []
+            excess = self._memory_bytes - self.max_memory_bytes
+            victims: Any = self._entries.items()
+            if entry.size > self.max_memory_bytes:
+                victims = itertools.chain([(handle, entry)], victims)
+            for old_handle, old in victims:
+                if excess <= 0:
+                    break
+                if old.rows is not None and old.path is None:
+                    old.path = self._spill_path(old_handle)
+                    to_spill.append((old_handle, old, old.rows))
+                    excess -= old.size
+        for entry_gone in dropped:
+            self._remove_file(entry_gone)
+        for old_handle, old, rows in to_spill:
+            with open(old.path, "wb") as fh:
+                pickle.dump(rows, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                if self._entries.get(old_handle) is old:
+                    old.rows = None
+                    self._memory_bytes -= old.size
+                    self._spills += 1
+                    still_stored = True
+                else:
+                    still_stored = False
+            if still_stored:
+                logging.info("Spilled stored result %s (%d rows) to %s", old_handle, old.row_count, old.path)
             else:
-                # For non-SELECT queries
-                cur.execute(query)
-                conn.commit()
-                return {
-                    "type": query_type.lower(),
-                    "rows_affected": cur.rowcount,
-                    "message": f"{query_type} executed successfully"
-                }
+                self._remove_file(old)
+
+    def _shared_path(self, handle: str) -> str:
+        if not _RESULT_HANDLE.match(handle):
+            raise ValueError(f"Unknown or expired result handle {handle!r}")
+        return os.path.join(self.shared_dir, f"{handle}.result")
+
+    def _publish(self, handle: str, entry: _StoredResult) -> None:
+        """Write a result where the other workers can load it."""
+        path = self._shared_path(handle)
+        state = {name: getattr(entry, name) for name in _StoredResult.__slots__ if name != "path"}
+        partial = f"{path}.{os.getpid()}.partial"
+        with open(partial, "wb") as fh:
+            pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, path)
+
+    def _load_shared(self, handle: str) -> Tuple[_StoredResult, List[List[Any]]]:
+        """Adopt a result another worker published."""
+        path = self._shared_path(handle)
+        try:
+            fresh = os.path.getmtime(path) + self.ttl >= time.time()
+            with open(path, "rb") as fh:
+                state = pickle.load(fh) if fresh else None
+        except OSError:
+            state = None
+        if state is None:
+            raise ValueError(f"Unknown or expired result handle {handle!r}")
+        entry = _StoredResult.__new__(_StoredResult)
+        for name, value in state.items():
+            setattr(entry, name, value)
+        entry.path = None
+        rows = entry.rows
+        self._insert(handle, entry)
+        return entry, rows
+
+    def _touch_shared(self, handle: str) -> bool:
+        """Renew a published result; False once any worker dropped or expired it."""
+        try:
+            os.utime(self._shared_path(handle))
+        except OSError:
+            return False
+        return True
+
+    def _sweep_shared(self) -> None:
+        cutoff = time.time() - self.ttl
+        with contextlib.suppress(OSError):
+            for entry in os.scandir(self.shared_dir):
+                if entry.name.endswith(".result") and entry.stat().st_mtime < cutoff:
+                    with contextlib.suppress(OSError):
+                        os.remove(entry.path)
+
+    def get(self, handle: str) -> Tuple[_StoredResult, List[List[Any]]]:
+        """Return a stored result and its rows, renewing its TTL."""
+        with self._lock:
+            dropped = self._expire_locked()
+            entry = self._entries.get(handle)
+            if entry is not None:
+                self._entries.move_to_end(handle)
+                entry.expires_at = time.monotonic() + self.ttl
+                rows = entry.rows
+        for entry_gone in dropped:
+            self._remove_file(entry_gone)
+        if self.shared_dir is not None:
+            if entry is None:
+                return self._load_shared(handle)
+            if not self._touch_shared(handle):
+                self.drop(handle)
+                entry = None
+        if entry is None:
+            raise ValueError(f"Unknown or expired result handle {handle!r}")
+        if rows is None:
+            with open(entry.path, "rb") as fh:
+                rows = pickle.load(fh)
+        return entry, rows
+
+    def drop(self, handle: str) -> bool:
+        with self._lock:
+            entry = self._pop_locked(handle) if handle in self._entries else None
+        shared = False
+        if self.shared_dir is not None and _RESULT_HANDLE.match(handle):
+            with contextlib.suppress(OSError):
+                os.remove(self._shared_path(handle))
+                shared = True
+        if entry is None:
+            return shared
+        self._remove_file(entry)
+        return True
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._memory_bytes = 0
+        for entry in entries:
+            self._remove_file(entry)
+        if self._spill_dir is not None:
+            with contextlib.suppress(OSError):
+                os.rmdir(self._spill_dir)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            dropped = self._expire_locked()
+            spilled = sum(1 for e in self._entries.values() if e.rows is None)
+            result = {
+                "results": len(self._entries),
+                "spilled": spilled,
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "ttl_sec": self.ttl,
+                "spills": self._spills,
+                "expired": self._expired,
+                "shared_dir": self.shared_dir,
+            }
+        for entry in dropped:
+            self._remove_file(entry)
+        return result
+
+
+def _create_result_store(shared_dir: Optional[str] = None) -> ResultStore:
+    return ResultStore(
+        ttl=_env_int("MSSQL_RESULT_STORE_TTL", DEFAULT_RESULT_STORE_CONFIG["ttl_sec"]),
+        max_memory_bytes=_env_int(
+            "MSSQL_RESULT_STORE_MAX_MEMORY", DEFAULT_RESULT_STORE_CONFIG["max_memory_bytes"]
+        ),
+        spill_dir=os.getenv("MSSQL_RESULT_STORE_DIR") or None,
+        shared_dir=shared_dir,
+    )
+
+
+_result_store = _create_result_store()
+
+
+def _execute_stored(query: str, timeout_seconds: int) -> Dict[str, Any]:
+    """Run a SELECT, park its full (typed) result and return a handle plus preview."""
+    max_rows = _env_int("MSSQL_RESULT_STORE_MAX_ROWS", DEFAULT_RESULT_STORE_CONFIG["max_rows"])
+    with _get_connection(timeout_seconds) as conn:
+        logging.info("Executing SQL query into result store: %s", query)
+        cur = conn.cursor()
+        statement = query
+        if _env_flag("MSSQL_INJECT_TOP", DEFAULT_RESULT_LIMITS["inject_top"]):
+            statement, _ = _backend.limit_query(query, max_rows + 1)
+        started = time.perf_counter()
+        _execute_tracked(cur, statement)
+        reader = _ResultReader(cur, "arrays")
+        rows = reader.read(max_rows, float("inf"))
+        truncated = reader.has_more()
+        _log_if_slow(statement, started, len(rows), reader.bytes_read, truncated)
+    entry = _StoredResult(reader, rows, truncated, query)
+    handle = _result_store.put(entry)
+    preview = rows[:_env_int("MSSQL_RESULT_STORE_PREVIEW_ROWS", DEFAULT_RESULT_STORE_CONFIG["preview_rows"])]
+    return {
+        "type": "stored",
+        "handle": handle,
+        "columns": entry.columns,
+        "column_types": entry.column_types,
+        "row_count": entry.row_count,
+        "truncated": truncated,
+        "preview": preview,
+        "message": (
+            f"{entry.row_count} rows stored as {handle}; use read_result, "
+            "aggregate_result or export_result to work with them."
+        ),
+    }
+
+
+# Operators accepted in read_result filters
+_FILTER_OPS = ("=", "!=", "<", "<=", ">", ">=", "in", "contains", "startswith", "is_null", "not_null")
+
+
+def _as_decimal(value: Any) -> Optional[decimal.Decimal]:
+    """Numeric view of a stored value (wide decimals are stored as strings)."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return decimal.Decimal(str(value))
+    if isinstance(value, str):
+        try:
+            return decimal.Decimal(value)
+        except decimal.InvalidOperation:
+            return None
+    return None
+
+
+def _compare_key(value: Any, other: Any) -> Tuple[Any, Any]:
+    """Comparable pair: numeric when both sides are numbers, else text."""
+    a, b = _as_decimal(value), _as_decimal(other)
+    if a is not None and b is not None and a.is_finite() and b.is_finite():
+        return a, b
+    return str(value), str(other)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    """Total order over stored values: numbers before text."""
+    number = _as_decimal(value)
+    if number is not None and number.is_finite():
+        return 0, number
+    return 1, str(value)
+
+
+def _column_index(entry: _StoredResult, column: str) -> int:
+    try:
+        return entry.columns.index(column)
+    except ValueError:
+        lowered = [c.lower() for c in entry.columns]
+        if column.lower() in lowered:
+            return lowered.index(column.lower())
+        raise ValueError(f"Unknown column {column!r}; result has {', '.join(entry.columns)}") from None
+
+
+def _row_predicate(entry: _StoredResult, filters: List[Dict[str, Any]]) -> Callable[[List[Any]], bool]:
+    """Compile read_result filters into one row predicate (all must match)."""
+    tests: List[Callable[[List[Any]], bool]] = []
+    for spec in filters:
+        op = str(spec.get("op", "=")).lower()
+        if op not in _FILTER_OPS:
+            raise ValueError(f"Unknown filter op {op!r}; expected one of {', '.join(_FILTER_OPS)}")
+        idx, target = _column_index(entry, str(spec.get("column", ""))), spec.get("value")
+
+        def test(row, idx=idx, op=op, target=target) -> bool:
+            value = row[idx]
+            if op == "is_null":
+                return value is None
+            if op == "not_null":
+                return value is not None
+            if value is None:
+                return False
+            if op == "in":
+                return any(a == b for a, b in (_compare_key(value, t) for t in target or []))
+            if op == "contains":
+                return str(target).lower() in str(value).lower()
+            if op == "startswith":
+                return str(value).lower().startswith(str(target).lower())
+            a, b = _compare_key(value, target)
+            return {
+                "=": a == b, "!=": a != b, "<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b,
+            }[op]
+
+        tests.append(test)
+    return lambda row: all(t(row) for t in tests)
+
+
+def _select_rows(
+    entry: _StoredResult,
+    rows: List[List[Any]],
+    filters: Optional[List[Dict[str, Any]]],
+    order_by: Optional[str],
+    descending: bool,
+) -> List[List[Any]]:
+    if filters:
+        matches = _row_predicate(entry, filters)
+        rows = [row for row in rows if matches(row)]
+    if order_by:
+        idx = _column_index(entry, order_by)
+        # NULLs sort first ascending / last descending, as in SQL Server
+        rows = sorted(
+            rows,
+            key=lambda r: (False, (0, 0)) if r[idx] is None else (True, _sort_key(r[idx])),
+            reverse=descending,
+        )
+    return rows
+
+
+def _read_result(
+    handle: str,
+    offset: int,
+    limit: int,
+    columns: Optional[List[str]],
+    filters: Optional[List[Dict[str, Any]]],
+    order_by: Optional[str],
+    descending: bool,
+    result_format: str,
+) -> Dict[str, Any]:
+    entry, rows = _result_store.get(handle)
+    rows = _select_rows(entry, rows, filters, order_by, descending)
+    max_rows, max_bytes = _result_limits()
+    page = rows[offset:offset + min(limit, max_rows)]
+    names = entry.columns
+    if columns:
+        picked = [_column_index(entry, c) for c in columns]
+        names = [entry.columns[i] for i in picked]
+        page = [[row[i] for i in picked] for row in page]
+    # hold the page to the byte cap like any other response
+    size, kept = 2, 0
+    for row in page:
+        size += len(row) + 2 + sum(json_size(v) for v in row)
+        if kept and size > max_bytes:
+            break
+        kept += 1
+    page = page[:kept]
+    if result_format == "rows":
+        shaped: Dict[str, Any] = {
+            "columns": names,
+            "rows": [
+                dict(zip(names, row if _typed_rows() else _row_values(row))) for row in page
+            ],
+        }
+    elif result_format == "arrays":
+        shaped = {"format": "arrays", "columns": names, "rows": page}
+    else:
+        shaped = {
+            "format": "columns",
+            "columns": names,
+            "values": [list(col) for col in zip(*page)] if page else [[] for _ in names],
+        }
+    next_offset = offset + len(page)
+    return {
+        "type": "select",
+        "handle": handle,
+        **shaped,
+        "row_count": len(page),
+        "matched_row_count": len(rows),
+        "has_more": next_offset < len(rows),
+        "next_offset": next_offset if next_offset < len(rows) else None,
+    }
+
+
+_AGGREGATE = re.compile(r"^\s*(count|count_distinct|sum|avg|min|max)\s*\(\s*(\*|[^()]+?)\s*\)\s*$", re.IGNORECASE)
+
+
+def _sum_type(entry: _StoredResult, rows: List[List[Any]], idx: int) -> type:
+    """One JSON type for a column's sums across every group.
+
+    Taken from the column's type code (see ``numeric_type``); without one,
+    sums are ints only if every stored value is an int.
+    """
+    kind = entry.numeric_types[idx]
+    if kind is None:
+        values = (r[idx] for r in rows if r[idx] is not None)
+        kind = int if all(type(v) is int for v in values) else float
+    return kind
+
+
+def _aggregate_result(
+    handle: str,
+    aggregates: List[str],
+    group_by: Optional[List[str]],
+    filters: Optional[List[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    entry, rows = _result_store.get(handle)
+    rows = _select_rows(entry, rows, filters, None, False)
+    specs = []
+    for text in aggregates:
+        match = _AGGREGATE.match(text)
+        if match is None:
+            raise ValueError(
+                f"Bad aggregate {text!r}; use count(*), count(col), count_distinct(col), "
+                "sum(col), avg(col), min(col) or max(col)"
+            )
+        func, column = match.group(1).lower(), match.group(2)
+        if column == "*" and func != "count":
+            raise ValueError(f"{func}(*) is not supported")
+        idx = None if column == "*" else _column_index(entry, column)
+        kind = _sum_type(entry, rows, idx) if func in ("sum", "avg") else None
+        specs.append((text.strip(), func, idx, kind))
+    keys = [_column_index(entry, c) for c in group_by or []]
+
+    groups: "OrderedDict[Tuple[Any, ...], List[List[Any]]]" = OrderedDict()
+    for row in rows:
+        groups.setdefault(tuple(row[i] for i in keys), []).append(row)
+    if not keys and not groups:
+        groups[()] = []
+
+    out_rows = []
+    for key, members in groups.items():
+        out = list(key)
+        for _, func, idx, kind in specs:
+            if idx is None:
+                out.append(len(members))
+                continue
+            values = [r[idx] for r in members if r[idx] is not None]
+            if func == "count":
+                out.append(len(values))
+            elif func == "count_distinct":
+                out.append(len(set(values)))
+            elif func in ("min", "max"):
+                pick = min if func == "min" else max
+                out.append(pick(values, key=_sort_key) if values else None)
+            else:
+                numbers = [_as_decimal(v) for v in values]
+                numbers = [n for n in numbers if n is not None]
+                if not numbers:
+                    out.append(None)
+                elif func == "sum":
+                    out.append(kind(sum(numbers)))
+                else:
+                    out.append((str if kind is str else float)(sum(numbers) / len(numbers)))
+        out_rows.append(out)
+    return {
+        "type": "select",
+        "handle": handle,
+        "format": "arrays",
+        "columns": [entry.columns[i] for i in keys] + [text for text, _, _, _ in specs],
+        "rows": out_rows,
+        "row_count": len(out_rows),
+        "input_row_count": len(rows),
+    }
+
+
+# Formats export_result can write
+RESULT_EXPORT_FORMATS = ("csv", "jsonl")
+
+
+def _export_path(file_name: str) -> str:
+    """Resolve ``file_name`` inside the export directory, refusing to escape it."""
+    root = os.path.realpath(os.getenv("MSSQL_EXPORT_DIR", DEFAULT_EXPORT_DIR))
+    path = os.path.realpath(os.path.join(root, file_name))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"Export path must be a file name inside {root}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _export_result(
+    handle: str, file_name: str, file_format: str, filters: Optional[List[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    if file_format not in RESULT_EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown format {file_format!r}; expected one of {', '.join(RESULT_EXPORT_FORMATS)}"
+        )
+    entry, rows = _result_store.get(handle)
+    rows = _select_rows(entry, rows, filters, None, False)
+    path = _export_path(file_name)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        if file_format == "csv":
+            writer = csv.writer(fh)
+            writer.writerow(entry.columns)
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                fh.write(json.dumps(dict(zip(entry.columns, row))) + "\n")
+    logging.info("Exported %d rows of %s to %s", len(rows), handle, path)
+    return {"path": path, "format": file_format, "row_count": len(rows), "bytes": os.path.getsize(path)}
+
+
+# Formats export_query can write; parquet and arrow need pyarrow
+QUERY_EXPORT_FORMATS = ("parquet", "arrow", "csv")
+
+
+def _binary_as_text(val: Any) -> Any:
+    """Binary values as base64, as in JSON results; anything else unchanged."""
+    return json_value(val) if isinstance(val, (bytes, bytearray)) else val
+
+
+def _value_type(values: List[Any]) -> Any:
+    """The type code a driver would report for ``values``; ``None`` if they mix types."""
+    kinds = {type(v) for v in values if v is not None}
+    if kinds == {int, float}:
+        return float
+    return kinds.pop() if len(kinds) == 1 else None
+
+
+def _arrow_column(description) -> Tuple[Any, Callable[[Any], Any]]:
+    """Arrow type for a cursor.description entry, plus a value converter."""
+    name, type_code, _, _, precision, scale, _ = description
+    same = lambda v: v  # noqa: E731
+    if type_code is bool:
+        return pyarrow.bool_(), same
+    if type_code is int:
+        return pyarrow.int64(), same
+    if type_code is float:
+        return pyarrow.float64(), same
+    if type_code is decimal.Decimal and precision and 0 < precision <= 38:
+        return pyarrow.decimal128(precision, scale or 0), same
+    if type_code is datetime.datetime:
+        return pyarrow.timestamp("us"), same
+    if type_code is datetime.date:
+        return pyarrow.date32(), same
+    if type_code is datetime.time:
+        return pyarrow.time64("us"), same
+    if type_code in (bytes, bytearray):
+        return pyarrow.binary(), same
+    return pyarrow.string(), lambda v: None if v is None else str(_binary_as_text(v))
+
+
+class _ArrowExportWriter:
+    """Writes fetchmany batches as Arrow record batches (Parquet or IPC file).
+
+    The file is opened on the first batch: columns the driver reports no
+    type code for (SQLite reports none) take their type from that batch's
+    values, and a later value of another type fails the export.
+    """
+
+    def __init__(self, path: str, file_format: str, description) -> None:
+        self._path = path
+        self._file_format = file_format
+        self._description = description
+        self._writer: Any = None
+
+    def _open(self, rows: List[Any]) -> None:
+        columns = []
+        for i, d in enumerate(self._description):
+            if d[1] is None:
+                d = (d[0], _value_type([row[i] for row in rows]), *d[2:])
+            columns.append(_arrow_column(d))
+        self._converters = [convert for _, convert in columns]
+        self._schema = pyarrow.schema(
+            [pyarrow.field(d[0], arrow_type) for d, (arrow_type, _) in zip(self._description, columns)]
+        )
+        if self._file_format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self._path, self._schema)
+        else:
+            self._writer = pyarrow.ipc.new_file(self._path, self._schema)
+
+    def write(self, rows: List[Any]) -> None:
+        if self._writer is None:
+            self._open(rows)
+        arrays = [
+            pyarrow.array([convert(row[i]) for row in rows], type=field.type)
+            for i, (field, convert) in enumerate(zip(self._schema, self._converters))
+        ]
+        self._writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        if self._writer is None:
+            self._open([])  # no rows: an empty file with the reported types
+        self._writer.close()
+
+
+class _CsvExportWriter:
+    """Writes fetchmany batches as CSV; needs nothing beyond the stdlib."""
+
+    def __init__(self, path: str, description) -> None:
+        self._fh = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow([d[0] for d in description])
+        # binary columns, and untyped ones that may hold binary values
+        self._binary = [i for i, d in enumerate(description) if d[1] in (bytes, bytearray, None)]
+
+    def write(self, rows: List[Any]) -> None:
+        if not self._binary:
+            self._writer.writerows(rows)
+            return
+        for row in rows:  # base64 instead of Python's bytes repr
+            values = list(row)
+            for i in self._binary:
+                values[i] = _binary_as_text(values[i])
+            self._writer.writerow(values)
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def _export_query(query: str, file_name: str, file_format: str, timeout_seconds: int) -> Dict[str, Any]:
+    """Stream a SELECT straight to a file, one fetchmany batch at a time."""
+    path = _export_path(file_name)
+    partial = f"{path}.partial"
+    started = time.perf_counter()
+    row_count = 0
+    with _get_connection(timeout_seconds) as conn:
+        logging.info("Exporting SQL query to %s (%s): %s", path, file_format, query)
+        cur = conn.cursor()
+        _execute_tracked(cur, query)
+        if cur.description is None:
+            raise ValueError("export_query needs a statement that returns rows")
+        if file_format == "csv":
+            writer: Any = _CsvExportWriter(partial, cur.description)
+        else:
+            writer = _ArrowExportWriter(partial, file_format, cur.description)
+        try:
+            while True:
+                _check_cancelled()
+                try:
+                    batch = cur.fetchmany(EXPORT_BATCH_SIZE)
+                except _backend.Error as exc:
+                    _translate_interrupt(exc)
+                    raise
+                if not batch:
+                    break
+                writer.write(batch)
+                row_count += len(batch)
+            writer.close()
+        except BaseException:
+            with contextlib.suppress(Exception):
+                writer.close()
+            with contextlib.suppress(OSError):
+                os.remove(partial)
+            raise
+    os.replace(partial, path)
+    elapsed = time.perf_counter() - started
+    logging.info("Exported %d rows to %s in %.1fs", row_count, path, elapsed)
+    return {
+        "path": path,
+        "format": file_format,
+        "row_count": row_count,
+        "bytes": os.path.getsize(path),
+        "elapsed_sec": round(elapsed, 3),
+    }
+
+
+def _execute_sql(
+    query: str,
+    page_size: Optional[int],
+    result_format: str,
+    timeout_seconds: int,
+    store: bool = False,
+) -> Dict[str, Any]:
+    # Determine query type
+    query_type = query.strip().split()[0].upper()
+    if query_type == "WITH" and _returns_rows(query):
+        query_type = "SELECT"  # a CTE feeding a plain SELECT returns rows
+
+    if store:
+        if query_type != "SELECT":
+            raise ValueError("store=True only applies to SELECT queries")
+        if page_size is not None:
+            raise ValueError("store and page_size cannot be combined; page the stored result with read_result")
+        return _execute_stored(query, timeout_seconds)
+
+    if query_type == "SELECT" and page_size is not None:
+        return _execute_paged(query, page_size, result_format, timeout_seconds)
+
+    max_rows, max_bytes = _result_limits()
+    cache_key, generation = None, 0
+    if query_type == "SELECT" and _result_cache.enabled and _is_read_only(query):
+        cache_key = (_normalize_query(query), result_format, max_rows, max_bytes)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            logging.info("Result cache hit: %s", query)
+            return {**cached, "cached": True}
+        generation = _result_cache.generation
+
+    with _get_connection(timeout_seconds) as conn:
+        logging.info("Executing SQL query: %s", query)
+        cur = conn.cursor()
+
+        if query_type == "SELECT":
+            if _env_flag("MSSQL_INJECT_TOP", DEFAULT_RESULT_LIMITS["inject_top"]):
+                # one extra row tells us whether the cap truncated the result
+                query, _ = _backend.limit_query(query, max_rows + 1)
+            started = time.perf_counter()
+            _execute_tracked(cur, query)
+            reader = _ResultReader(cur, result_format)
+            rows = reader.read(max_rows, max_bytes)
+            truncated = reader.has_more()
+            _log_if_slow(query, started, len(rows), reader.bytes_read, truncated)
+            result = {
+                "type": "select",
+                **reader.shape(rows),
+                "row_count": len(rows),
+                "truncated": truncated,
+                # only known for free when we read to the end
+                "total_row_count": None if truncated else len(rows),
+            }
+            if truncated:
+                result["message"] = (
+                    f"Result truncated after {len(rows)} rows (limits: {max_rows} rows, "
+                    f"{max_bytes} bytes). Add filters/aggregation or use page_size."
+                )
+            if cache_key is not None:
+                _result_cache.put(cache_key, result, reader.bytes_read, generation)
+            return result
+        else:
+            # For non-SELECT queries
+            started = time.perf_counter()
+            _execute_tracked(cur, query)
+            _check_cancelled()  # don't commit work the client has given up on
+            conn.commit()
+            rows_affected = cur.rowcount
+            _log_if_slow(query, started, rows_affected)
+            _result_cache.invalidate()
+            if query_type in _DDL_TYPES:
+                _schema_cache.invalidate()
+            return {
+                "type": query_type.lower(),
+                "rows_affected": rows_affected,
+                "message": f"{query_type} executed successfully"
+            }
+
+
+def _execute_paged(
+    query: str, page_size: int, result_format: str, timeout_seconds: int
+) -> Dict[str, Any]:
+    """Run a SELECT on a connection that stays checked out for fetch_more."""
+    if page_size < 1:
+        raise ValueError("page_size must be a positive integer")
+    if _result_store.shared_dir is not None:
+        # worker processes cannot share an open cursor, so page a stored result
+        stored = _execute_stored(query, timeout_seconds)
+        return _stored_page(stored["handle"], 0, page_size, result_format)
+    pooled = _checkout(timeout_seconds)
+    try:
+        logging.info("Executing paged SQL query (page_size=%d): %s", page_size, query)
+        cur = pooled.conn.cursor()
+        _execute_tracked(cur, query)
+        held = _HeldCursor(pooled, _ResultReader(cur, result_format))
+    except Exception as exc:
+        _checkin(pooled, exc)
+        raise
+    return _page_response(held, page_size)
+
+
+@mcp.tool(structured_output=True)
+async def execute_sql(
+    query: str,
+    page_size: Optional[int] = None,
+    result_format: str = "rows",
+    timeout_seconds: Optional[int] = None,
+    store: bool = False,
+) -> Dict[str, Any]:
+    """Execute any SQL query (SELECT, INSERT, UPDATE, DELETE, etc.).
+
+    Pass ``page_size`` to page through a large SELECT: only the first page is
+    returned, together with a ``continuation_token`` for ``fetch_more``.
+
+    Pass ``store=True`` to keep a SELECT's full result on the server: the
+    response is a ``handle`` plus a short preview, and ``read_result``,
+    ``aggregate_result`` and ``export_result`` work on it without re-running
+    the query.
+
+    ``result_format`` controls SELECT output: "rows" (list of objects),
+    "arrays" (one array per row) or "columns" (one array per column). The
+    compact formats name each column once. Values are JSON-typed: numbers,
+    ISO dates, base64 binary, and decimals as strings only when a float
+    could not hold them exactly.
+
+    ``timeout_seconds`` overrides the server's default statement timeout;
+    queries that overrun it are cancelled on the server.
+    """
+    _check_result_format(result_format)
+    timeout = _query_timeout(timeout_seconds)
+    try:
+        return await _db.run(
+            _execute_sql, query, page_size, result_format, timeout, store, timeout=timeout
+        )
     except Exception as exc:  # noqa: BLE001
         logging.exception("SQL execution failed: %s", exc)
         raise
 
 
+# Continuation token of a page served from the result store: handle.offset.format
+_STORED_PAGE_TOKEN = re.compile(r"^(res_[A-Za-z0-9_-]+)\.(\d+)\.(rows|arrays|columns)$")
+
+
+def _stored_page(handle: str, offset: int, page_size: int, result_format: str) -> Dict[str, Any]:
+    """One execute_sql/fetch_more page read from a stored result."""
+    page = _read_result(handle, offset, page_size, None, None, None, False, result_format)
+    next_offset = page.pop("next_offset")
+    del page["handle"], page["matched_row_count"]
+    if page["has_more"]:
+        token = f"{handle}.{next_offset}.{result_format}"
+    else:
+        token = None
+        _result_store.drop(handle)
+    return {**page, "rows_sent": offset + page["row_count"], "continuation_token": token}
+
+
+def _fetch_more(continuation_token: str, page_size: int) -> Dict[str, Any]:
+    stored = _STORED_PAGE_TOKEN.match(continuation_token)
+    if stored is not None:
+        handle, offset, result_format = stored.groups()
+        return _stored_page(handle, int(offset), page_size, result_format)
+    # take() inside the worker so a request cancelled while queued leaves the cursor parked
+    return _page_response(_cursors.take(continuation_token), page_size)
+
+
+@mcp.tool(structured_output=True)
+async def fetch_more(continuation_token: str, page_size: Optional[int] = None) -> Dict[str, Any]:
+    """Fetch the next page of a paged execute_sql result.
+
+    The response carries a new ``continuation_token`` while ``has_more`` is
+    true; tokens expire if unused for a few minutes. Pages use the
+    ``result_format`` of the original execute_sql call.
+    """
+    if page_size is None:
+        page_size = _env_int("MSSQL_CURSOR_PAGE_SIZE", DEFAULT_CURSOR_CONFIG["page_size"])
+    if page_size < 1:
+        raise ValueError("page_size must be a positive integer")
+    try:
+        return await _db.run(_fetch_more, continuation_token, page_size, timeout=_query_timeout())
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("Failed to fetch more rows: %s", exc)
+        raise
+
+
+@mcp.tool(structured_output=True)
+async def read_result(
+    handle: str,
+    offset: int = 0,
+    limit: int = 100,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[Dict[str, Any]]] = None,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    result_format: str = "arrays",
+) -> Dict[str, Any]:
+    """Read rows from a result stored with execute_sql(store=True).
+
+    ``filters`` is a list of ``{"column", "op", "value"}`` conditions that must
+    all hold; ``op`` is one of =, !=, <, <=, >, >=, in, contains, startswith,
+    is_null, not_null. ``columns`` picks a subset of columns and ``order_by``
+    sorts before ``offset``/``limit`` are applied. While ``has_more`` is true,
+    pass ``next_offset`` as ``offset`` to continue.
+    """
+    _check_result_format(result_format)
+    if offset < 0 or limit < 1:
+        raise ValueError("offset must be >= 0 and limit positive")
+    return await asyncio.to_thread(
+        _read_result, handle, offset, limit, columns, filters, order_by, descending, result_format
+    )
+
+
+@mcp.tool(structured_output=True)
+async def aggregate_result(
+    handle: str,
+    aggregates: List[str],
+    group_by: Optional[List[str]] = None,
+    filters: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Aggregate a stored result, optionally grouped and filtered.
+
+    ``aggregates`` are expressions such as ``"count(*)"``, ``"sum(Amount)"``,
+    ``"avg(Amount)"``, ``"min(OrderDate)"``, ``"max(OrderDate)"`` or
+    ``"count_distinct(CustomerID)"``; ``filters`` work as in read_result.
+    A column's sums have one type in every group: numbers, or exact strings
+    for decimals too wide for a float (their averages too).
+    """
+    if not aggregates:
+        raise ValueError("aggregates must name at least one aggregate")
+    return await asyncio.to_thread(_aggregate_result, handle, aggregates, group_by, filters)
+
+
+@mcp.tool(structured_output=True)
+async def export_result(
+    handle: str,
+    file_name: str,
+    format: str = "csv",
+    filters: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Write a stored result to ``file_name`` in the server's export directory.
+
+    ``format`` is "csv" or "jsonl". Returns the file path, row count and size.
+    """
+    return await asyncio.to_thread(_export_result, handle, file_name, format, filters)
+
+
+@mcp.tool(structured_output=True)
+async def export_query(
+    query: str,
+    file_name: str,
+    format: Optional[str] = None,
+    timeout_seconds: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Run a SELECT and stream its full result to a file on the server.
+
+    Rows never pass through the conversation: they are fetched in batches and
+    written to ``file_name`` inside the server's export directory as
+    "parquet", "arrow" (Arrow IPC file) or "csv". The default is parquet when
+    pyarrow is installed, else csv. Returns the path, row count and file size.
+    """
+    file_format = format or ("parquet" if pyarrow is not None else "csv")
+    if file_format not in QUERY_EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown format {file_format!r}; expected one of {', '.join(QUERY_EXPORT_FORMATS)}"
+        )
+    if file_format != "csv" and pyarrow is None:
+        raise ValueError(f"format {file_format!r} needs pyarrow on the server; use format='csv'")
+    words = query.split(None, 1)
+    if not words or words[0].upper() not in ("SELECT", "WITH"):
+        raise ValueError("export_query only runs SELECT (or WITH … SELECT) queries")
+    timeout = _query_timeout(timeout_seconds)
+    try:
+        return await _db.run(_export_query, query, file_name, file_format, timeout, timeout=timeout)
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("Export failed: %s", exc)
+        raise
+
+
+@mcp.tool(structured_output=True)
+def drop_result(handle: str) -> Dict[str, Any]:
+    """Discard a stored result before its TTL expires."""
+    return {"handle": handle, "dropped": _result_store.drop(handle)}
+
+
+@mcp.tool(structured_output=True)
+async def slow_queries(
+    top_n: int = 10, sort_by: str = "total_ms", include_plans: bool = False
+) -> Dict[str, Any]:
+    """List the most expensive query shapes from the slow-query log.
+
+    Queries are grouped by shape – normalized text with literals replaced
+    by ``?`` – and ranked by ``sort_by``: "total_ms" (default), "max_ms",
+    "mean_ms" or "calls". Each shape reports calls, timings, mean rows and
+    bytes, and its slowest query. ``include_plans=True`` adds the latest
+    estimated plan captured for the shape.
+    """
+    if _slow_log is None:
+        return {
+            "enabled": False,
+            "queries": [],
+            "message": "The slow-query log is off; set MSSQL_SLOW_QUERY_LOG on the server to enable it.",
+        }
+    if top_n < 1:
+        raise ValueError("top_n must be a positive integer")
+    queries = await asyncio.to_thread(_slow_log.top, top_n, sort_by, include_plans)
+    return {
+        "enabled": True,
+        "threshold_ms": _slow_log.threshold_ms,
+        "plan_threshold_ms": _slow_log.plan_threshold_ms,
+        "queries": queries,
+    }
+
+
+# Worker process identity in multi-worker mode (index is None otherwise)
+_process: Dict[str, Any] = {"worker": None, "workers": 1}
+# Where workers leave metric snapshots for each other (multi-worker mode only)
+_metrics_dir: Optional[str] = None
+
+
+def _record_tool_call(
+    tool: str,
+    started: float,
+    result: Any = None,
+    error: Optional[BaseException] = None,
+    span: Any = tracing.NOOP_SPAN,
+) -> None:
+    _tool_seconds.observe(time.perf_counter() - started, tool=tool)
+    if error is not None:
+        _tool_calls.inc(tool=tool, outcome="error")
+        # FastMCP wraps tool exceptions in ToolError
+        _tool_errors.inc(tool=tool, error=type(error.__cause__ or error).__name__)
+        return
+    _tool_calls.inc(tool=tool, outcome="ok")
+    # structured tools return (content blocks, structured content)
+    content, structured = result if isinstance(result, tuple) else (result, None)
+    if isinstance(content, (list, tuple)):
+        size = sum(len(block.text.encode()) for block in content if getattr(block, "text", None))
+        _tool_bytes.inc(size, tool=tool)
+        span.set_attribute("mcp.response_bytes", size)
+    if isinstance(structured, dict):
+        structured = structured.get("result", structured)
+        if isinstance(structured, dict) and isinstance(structured.get("row_count"), int):
+            _tool_rows.inc(structured["row_count"], tool=tool)
+            span.set_attribute("db.rows", structured["row_count"])
+
+
+def _component_metrics() -> List[metrics.Family]:
+    """Gauges and running totals read from the pool, executor and caches."""
+    pool, calls, workers = _pool.stats(), _call_limiter.stats(), _db.stats()
+    store = _result_store.stats()
+    families = [
+        metrics.gauge("mcp_db_pool_connections", "Pooled connections by state.", pool["in_use"], state="in_use"),
+        metrics.gauge("mcp_db_pool_connections", "Pooled connections by state.", pool["idle"], state="idle"),
+        metrics.gauge("mcp_db_pool_max_connections", "Connection pool size limit.", pool["max_size"]),
+        metrics.counter("mcp_db_pool_checkouts_total", "Connections handed out by the pool.", pool["checkouts"]),
+        metrics.counter("mcp_db_pool_opened_total", "Connections opened by the pool.", pool["opened"]),
+        metrics.counter("mcp_db_pool_waits_total", "Checkouts that waited for a free connection.", pool["waits"]),
+        metrics.counter(
+            "mcp_db_pool_wait_seconds_total", "Time spent waiting for a free connection.", pool["wait_time_sec"]
+        ),
+        metrics.gauge("mcp_db_workers_busy", "Database worker threads running a call.", workers["in_flight"]),
+        metrics.gauge("mcp_db_workers", "Database worker threads.", workers["max_workers"]),
+        metrics.counter(
+            "mcp_db_queries_cancelled_total", "Statements stopped by timeout or cancellation.", workers["cancelled"]
+        ),
+        metrics.gauge("mcp_tool_calls_in_flight", "Tool calls holding a concurrency slot.", calls["in_flight"]),
+        metrics.gauge("mcp_tool_calls_waiting", "Tool calls queued for a concurrency slot.", calls["waiting"]),
+        metrics.gauge("mcp_open_cursors", "Paged cursors parked for fetch_more.", _cursors.stats()["open"]),
+        metrics.gauge("mcp_result_store_results", "Results held in the result store.", store["results"]),
+        metrics.gauge(
+            "mcp_result_store_memory_bytes", "Result store rows held in memory.", store["memory_bytes"]
+        ),
+    ]
+    for cache, stats in (("schema", _schema_cache.stats()), ("result", _result_cache.stats())):
+        families += [
+            metrics.counter("mcp_cache_hits_total", "Lookups answered from cache.", stats["hits"], cache=cache),
+            metrics.counter("mcp_cache_misses_total", "Lookups that went to the database.", stats["misses"], cache=cache),
+            metrics.gauge("mcp_cache_entries", "Entries currently cached.", stats["entries"], cache=cache),
+        ]
+    return families
+
+
+_metrics.add_collector(_component_metrics)
+
+
+def _metric_families() -> List[metrics.Family]:
+    """This process's metrics, or every worker's in multi-worker mode."""
+    own = _metrics.collect()
+    if _metrics_dir is None:
+        return own
+    by_worker = {str(_process["worker"]): own}
+    with contextlib.suppress(OSError):
+        for entry in os.scandir(_metrics_dir):
+            worker = entry.name[len("worker-"):-len(".json")]
+            if not entry.name.startswith("worker-") or not entry.name.endswith(".json") or worker in by_worker:
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as fh:
+                    by_worker[worker] = json.load(fh)
+            except (OSError, ValueError):
+                continue  # a worker is rewriting its snapshot
+    return metrics.merge(by_worker, "worker")
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint (HTTP transports only)."""
+    text = await asyncio.to_thread(lambda: metrics.render(_metric_families()))
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
+def _write_atomically(path: str, text: str) -> None:
+    partial = f"{path}.{os.getpid()}.partial"
+    with open(partial, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(partial, path)
+
+
+def _metrics_writer(path: Optional[str], interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            if _metrics_dir is not None:
+                _write_atomically(
+                    os.path.join(_metrics_dir, f"worker-{_process['worker']}.json"),
+                    json.dumps(_metrics.collect()),
+                )
+            # in multi-worker mode worker 0 writes the combined file
+            if path and _process["worker"] in (None, 0):
+                _write_atomically(path, metrics.render(_metric_families()))
+        except Exception:  # noqa: BLE001
+            logging.exception("Failed to write metrics")
+
+
+def _start_metrics_writer() -> None:
+    """Write metrics to MSSQL_METRICS_FILE and/or share them between workers."""
+    path = os.getenv("MSSQL_METRICS_FILE") or DEFAULT_METRICS_CONFIG["file"]
+    if path is None and _metrics_dir is None:
+        return
+    interval = _env_int("MSSQL_METRICS_INTERVAL", DEFAULT_METRICS_CONFIG["interval_sec"])
+    threading.Thread(
+        target=_metrics_writer, args=(path, interval), name="metrics-writer", daemon=True
+    ).start()
+
+
+@mcp.tool(structured_output=True)
+def server_stats() -> Dict[str, Any]:
+    """Report server internals: database backend, connection pool, workers, open cursors and cache counters."""
+    return {
+        "process": {"pid": os.getpid(), **_process},
+        "backend": _backend.describe(),
+        "calls": _call_limiter.stats(),
+        "pool": _pool.stats(),
+        "workers": _db.stats(),
+        "cursors": _cursors.stats(),
+        "schema_cache": _schema_cache.stats(),
+        "result_cache": _result_cache.stats(),
+        "result_store": _result_store.stats(),
+        "slow_query_log": _slow_log.stats() if _slow_log is not None else {"enabled": False},
+    }
+
+
+def _env_list(name: str, default: List[str]) -> List[str]:
+    """Read a comma-separated setting from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _transport_security(host: str) -> TransportSecuritySettings:
+    """DNS-rebinding protection for a server listening on a non-local ``host``."""
+    allowed_hosts = _env_list("MSSQL_ALLOWED_HOSTS", DEFAULT_TRANSPORT_CONFIG["allowed_hosts"])
+    if not allowed_hosts:
+        if host in ("0.0.0.0", "::", ""):
+            # a wildcard address is not what clients put in Host
+            logging.warning(
+                "Listening on all interfaces: set MSSQL_ALLOWED_HOSTS to the names clients "
+                "use to reach this server, or their requests are rejected (HTTP 421)"
+            )
+            allowed_hosts = ["127.0.0.1:*", "localhost:*", "[::1]:*"]
+        else:
+            name = f"[{host}]" if ":" in host else host
+            allowed_hosts = [name, f"{name}:*"]  # Host has no port on 80/443
+    allowed_origins = _env_list("MSSQL_ALLOWED_ORIGINS", DEFAULT_TRANSPORT_CONFIG["allowed_origins"]) or [
+        f"{scheme}://{allowed}" for allowed in allowed_hosts for scheme in ("http", "https")
+    ]
+    return TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=allowed_hosts,
+        allowed_origins=allowed_origins,
+    )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SQL MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=os.getenv("MSSQL_TRANSPORT", DEFAULT_TRANSPORT_CONFIG["transport"]),
+        help="stdio for a single spawned client, or a network transport shared by many clients",
+    )
+    parser.add_argument("--host", default=os.getenv("MSSQL_HOST", DEFAULT_TRANSPORT_CONFIG["host"]))
+    parser.add_argument(
+        "--port", type=int, default=_env_int("MSSQL_PORT", DEFAULT_TRANSPORT_CONFIG["port"])
+    )
+    parser.add_argument(
+        "--max-concurrent-calls",
+        type=int,
+        default=_call_limiter.limit,
+        help="tool calls run at once across all clients; extra calls wait (0 = no limit)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=_env_int("MSSQL_WORKERS", DEFAULT_TRANSPORT_CONFIG["workers"]),
+        help="server processes sharing the listener and caches (streamable-http only)",
+    )
+    args = parser.parse_args()
+    if args.workers > 1 and args.transport != "streamable-http":
+        parser.error("--workers above 1 needs --transport streamable-http")
+    return args
+
+
+def _share_state(shared_dir: str, workers: int) -> None:
+    """Switch the caches and result store to storage every worker can see."""
+    global _schema_cache, _result_cache, _result_store, _metrics_dir
+    os.makedirs(os.path.join(shared_dir, "results"), exist_ok=True)
+    _metrics_dir = os.path.join(shared_dir, "metrics")
+    os.makedirs(_metrics_dir, exist_ok=True)
+    store = SharedCacheStore(os.path.join(shared_dir, "cache.sqlite"))
+    _schema_cache = _create_schema_cache(store)
+    _result_cache = _create_result_cache(store)
+    _result_store = _create_result_store(os.path.join(shared_dir, "results"))
+    _process["workers"] = workers
+    # any worker may serve any request, so no MCP session state is kept
+    mcp.settings.stateless_http = True
+
+
+def _start_worker(index: int) -> None:
+    """Give a freshly forked worker its own connections and threads."""
+    global _pool, _db, _cursors, _slow_log
+    _process["worker"] = index
+    _pool = _create_pool()
+    _prewarm_pool()
+    _db = _create_executor(_pool)
+    _cursors = _create_cursor_store(_pool)
+    if _slow_log is not None:
+        _slow_log.close()
+        _slow_log = _create_slow_query_log(index)
+    _start_metrics_writer()
+
+
+def _shutdown() -> None:
+    _db.shutdown()
+    _cursors.close_all()
+    _result_store.close_all()
+    if _slow_log is not None:
+        _slow_log.close()
+    _pool.close()
+
+
+def _serve_workers(args: argparse.Namespace) -> None:
+    shared_dir = os.getenv("MSSQL_SHARED_DIR")
+    owned = shared_dir is None
+    if owned:
+        shared_dir = tempfile.mkdtemp(prefix="mssql-mcp-")
+    _share_state(shared_dir, args.workers)
+    # the import-time pool must not leak its connections into the workers
+    _pool.close()
+    try:
+        prefork.serve(
+            mcp.streamable_http_app,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            log_level=mcp.settings.log_level,
+            on_worker_start=_start_worker,
+            on_worker_stop=_shutdown,
+        )
+    finally:
+        if owned:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+
 if __name__ == "__main__":
+    args = _parse_args()
+    _call_limiter.limit = args.max_concurrent_calls
+    where = "stdio"
+    if args.transport != "stdio":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        if args.host not in _LOCAL_HOSTS:
+            # FastMCP's default guard only admits localhost Host headers
+            mcp.settings.transport_security = _transport_security(args.host)
+        path = mcp.settings.sse_path if args.transport == "sse" else mcp.settings.streamable_http_path
+        where = f"http://{args.host}:{args.port}{path}"
     # Make it easy to launch manually in a terminal
-    logging.info("🗄️  MSSQL MCP server starting – press Ctrl-C to stop …")
+    logging.info("🗄️  MSSQL MCP server starting on %s – press Ctrl-C to stop …", where)
     try:
-        mcp.run()
+        if args.workers > 1:
+            _serve_workers(args)
+        else:
+            _prewarm_pool()
+            _start_metrics_writer()
+            mcp.run(args.transport)
     except KeyboardInterrupt:
-        logging.info("Server stopped by user.") 
\ No newline at end of file
+        logging.info("Server stopped by user.")
+    finally:
+        _shutdown() 
\ No newline at end of file
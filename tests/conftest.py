@@ -0,0 +1,69 @@
+"""Shared fixtures: the server runs against a small SQLite database.
+
+The environment is set before any test module imports ``config`` (which
+exits without an API key, or without a password for SQL Server).
+"""
+
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="sql-agent-tests-")
+DB_PATH = os.path.join(_DB_DIR, "tests.db")
+
+os.environ.update({
+    "DB_BACKEND": "sqlite",
+    "SQLITE_PATH": DB_PATH,
+    "OPENAI_API_KEY": "test",
+})
+for name in ("MSSQL_SLOW_QUERY_LOG", "MSSQL_TRACE_FILE", "TRACE_FILE", "MSSQL_RESULT_CACHE"):
+    os.environ.pop(name, None)
+
+SCHEMA = """
+CREATE TABLE Customers (
+    CustomerID INTEGER PRIMARY KEY,
+    CustomerName TEXT NOT NULL UNIQUE,
+    Region TEXT NOT NULL
+);
+CREATE TABLE Orders (
+    OrderID INTEGER PRIMARY KEY,
+    CustomerID INTEGER NOT NULL REFERENCES Customers(CustomerID),
+    TotalAmount REAL NOT NULL,
+    Note
+);
+CREATE INDEX IX_Orders_Customer ON Orders(CustomerID, OrderID);
+"""
+
+
+def _build(path: str) -> None:
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(SCHEMA)
+        db.executemany(
+            "INSERT INTO Customers VALUES (?, ?, ?)",
+            [(i, f"Customer {i}", ("North", "South")[i % 2]) for i in range(1, 21)],
+        )
+        # Note holds text, integers and blobs, as SQLite allows
+        notes = ["first", 7, b"\x00\x01", None]
+        db.executemany(
+            "INSERT INTO Orders VALUES (?, ?, ?, ?)",
+            [(i, i % 20 + 1, i * 10.5, notes[i % 4]) for i in range(1, 101)],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+_build(DB_PATH)
+
+
+@pytest.fixture
+def server():
+    """The ``sql_mcp_server`` module with empty caches."""
+    import sql_mcp_server
+
+    sql_mcp_server._result_cache.invalidate()
+    sql_mcp_server._schema_cache.invalidate()
+    yield sql_mcp_server
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+import agent_console
+
+
+def _completion(content=None, tool_calls=()):
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls" if tool_calls else "stop",
+            "message": {
+                "role": "assistant",
+                "content": content,
+                "tool_calls": [
+                    {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+                    for call_id, name, args in tool_calls
+                ] or None,
+            },
+        }],
+    })
+
+
+class FakeOpenAI:
+    """Answers chat.completions.create with canned responses, in order."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.requests.append({**kwargs, "messages": list(kwargs["messages"])})
+        return self.responses.pop(0)
+
+
+class FakeTools:
+    """call_mcp_tool stand-in whose calls sleep ``delays[query]`` seconds."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.running = 0
+        self.most_running = 0
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+
+    async def __call__(self, func_name, arguments):
+        self.started.append(arguments["query"])
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await asyncio.sleep(self.delays[arguments["query"]])
+        except asyncio.CancelledError:
+            self.cancelled.append(arguments["query"])
+            raise
+        finally:
+            self.running -= 1
+        self.finished.append(arguments["query"])
+        return {"type": "insert", "affected_rows": 0, "query": arguments["query"]}
+
+
+@pytest.fixture
+def session_for(monkeypatch):
+    monkeypatch.setattr(agent_console, "format_tool_result", lambda name, result: None)
+
+    def make(delays, limit=4):
+        tools = FakeTools(delays)
+        monkeypatch.setattr(agent_console, "call_mcp_tool", tools)
+        monkeypatch.setattr(agent_console, "MAX_PARALLEL_TOOL_CALLS", limit)
+        calls = [(f"call_{i}", "execute_sql", {"query": query}) for i, query in enumerate(delays)]
+        client = FakeOpenAI([_completion(tool_calls=calls), _completion("done")])
+        return agent_console.ChatSession(client, []), client, tools
+
+    return make
+
+
+def _ask(session):
+    async def run():
+        started = time.monotonic()
+        answer = await session.ask("go")
+        return answer, time.monotonic() - started
+
+    return asyncio.run(run())
+
+
+def test_tool_calls_run_concurrently(session_for):
+    session, client, tools = session_for({"a": 0.2, "b": 0.2, "c": 0.2})
+    answer, elapsed = _ask(session)
+    assert answer == "done"
+    assert tools.most_running == 3
+    assert elapsed < 0.5  # not 3 x 0.2s
+    assert len(client.requests) == 2
+
+
+def test_tool_calls_respect_the_parallel_limit(session_for):
+    session, _, tools = session_for({q: 0.05 for q in "abcdef"}, limit=2)
+    _ask(session)
+    assert tools.most_running == 2
+    assert sorted(tools.finished) == list("abcdef")
+
+
+def test_tool_results_follow_the_models_order(session_for):
+    # the first call finishes last
+    session, client, tools = session_for({"slow": 0.3, "medium": 0.15, "fast": 0})
+    _ask(session)
+    assert tools.finished == ["fast", "medium", "slow"]
+    messages = client.requests[1]["messages"]
+    assistant, *results = messages[-4:]
+    assert [call["id"] for call in assistant["tool_calls"]] == ["call_0", "call_1", "call_2"]
+    assert [m["tool_call_id"] for m in results] == ["call_0", "call_1", "call_2"]
+    assert all(query in m["content"] for query, m in zip(["slow", "medium", "fast"], results))
+    assert session.history.messages[-1] == {"role": "assistant", "content": "done"}
+
+
+def test_a_failing_tool_call_becomes_an_error_result(session_for, monkeypatch):
+    session, client, _ = session_for({"a": 0, "b": 0})
+
+    async def fail(func_name, arguments):
+        if arguments["query"] == "b":
+            raise RuntimeError("MCP tool 'execute_sql' execution failure: boom")
+        return {"type": "insert", "affected_rows": 0}
+
+    monkeypatch.setattr(agent_console, "call_mcp_tool", fail)
+    _ask(session)
+    results = client.requests[1]["messages"][-2:]
+    assert [m["tool_call_id"] for m in results] == ["call_0", "call_1"]
+    assert json.loads(results[1]["content"]) == {"error": "MCP tool 'execute_sql' execution failure: boom"}
+
+
+def _chunk(content=None, tool_calls=None):
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "test",
+        "choices": [{"index": 0, "delta": {"content": content, "tool_calls": tool_calls}, "finish_reason": None}],
+    })
+
+
+def _tool_delta(index, call_id=None, name=None, arguments=None):
+    delta = {"index": index, "function": {}}
+    if call_id:
+        delta.update(id=call_id, type="function")
+    if name:
+        delta["function"]["name"] = name
+    if arguments:
+        delta["function"]["arguments"] = arguments
+    return delta
+
+
+async def _stream(*chunks):
+    """A streamed response; callables among ``chunks`` are awaited in between."""
+    for chunk in chunks:
+        if callable(chunk):
+            await chunk()
+        else:
+            yield chunk
+
+
+@pytest.fixture
+def streaming_session(monkeypatch):
+    monkeypatch.setattr(agent_console, "format_tool_result", lambda name, result: None)
+
+    def make(delays, *responses):
+        tools = FakeTools(delays)
+        monkeypatch.setattr(agent_console, "call_mcp_tool", tools)
+        client = FakeOpenAI(responses)
+        return agent_console.ChatSession(client, []), client, tools
+
+    return make
+
+
+def test_stream_assembles_tool_calls_and_starts_them_early(streaming_session):
+    seen = []
+
+    async def while_streaming():
+        await asyncio.sleep(0.05)
+        seen.append(list(tools.started))
+
+    session, client, tools = streaming_session(
+        {"a": 0, "b": 0},
+        _stream(
+            _chunk("Let me "),
+            _chunk("check."),
+            _chunk(tool_calls=[_tool_delta(0, "call_0", "execute_sql", '{"que')]),
+            _chunk(tool_calls=[_tool_delta(0, arguments='ry": "a"}')]),
+            _chunk(tool_calls=[_tool_delta(1, "call_1", "execute_sql")]),
+            _chunk(tool_calls=[_tool_delta(1, arguments='{"query": "b"}')]),
+            while_streaming,
+            ChatCompletionChunk.model_validate(  # usage-only chunk, no choices
+                {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "test", "choices": []}
+            ),
+        ),
+        _stream(_chunk("Done.")),
+    )
+    tokens = []
+    assert asyncio.run(session.ask("go", on_token=tokens.append)) == "Done."
+    assert tokens == ["Let me ", "check.", "Done."]
+    # call_0's arguments were complete once call_1 began, so it ran mid-stream
+    assert seen == [["a"]]
+    assert tools.finished == ["a", "b"]
+    assistant, *results = client.requests[1]["messages"][-3:]
+    assert assistant["content"] == "Let me check."
+    assert [(c["id"], c["function"]["name"], c["function"]["arguments"]) for c in assistant["tool_calls"]] == [
+        ("call_0", "execute_sql", '{"query": "a"}'),
+        ("call_1", "execute_sql", '{"query": "b"}'),
+    ]
+    assert [m["tool_call_id"] for m in results] == ["call_0", "call_1"]
+
+
+def _stream_with_a_running_tool(after):
+    return _stream(
+        _chunk(tool_calls=[_tool_delta(0, "call_0", "execute_sql", '{"query": "slow"}')]),
+        _chunk(tool_calls=[_tool_delta(1, "call_1", "execute_sql", '{"query": "slow"}')]),
+        after,
+    )
+
+
+def test_a_failed_stream_cancels_the_tools_it_started(streaming_session):
+    async def drop():
+        await asyncio.sleep(0.05)
+        raise ConnectionError("stream dropped")
+
+    session, _, tools = streaming_session({"slow": 30}, _stream_with_a_running_tool(drop))
+    with pytest.raises(ConnectionError):
+        asyncio.run(session.ask("go", on_token=lambda text: None))
+    assert tools.started == tools.cancelled == ["slow"]
+
+
+def test_cancelling_the_turn_cancels_tools_started_mid_stream(streaming_session):
+    async def stall():
+        await asyncio.sleep(30)
+
+    session, _, tools = streaming_session({"slow": 30}, _stream_with_a_running_tool(stall))
+
+    async def scenario():
+        turn = asyncio.create_task(session.ask("go", on_token=lambda text: None))
+        while not tools.started:
+            await asyncio.sleep(0.01)
+        turn.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await turn
+
+    asyncio.run(scenario())
+    assert tools.cancelled == ["slow"]
+
+
+def test_tool_status_lines_start_on_their_own_line(streaming_session, capsys):
+    session, _, _ = streaming_session(
+        {"a": 0},
+        _stream(_chunk("Let me check."), _chunk(tool_calls=[_tool_delta(0, "call_0", "execute_sql", '{"query": "a"}')])),
+        _stream(_chunk("There are "), _chunk("20.")),
+    )
+    printer = agent_console.StreamPrinter()
+    asyncio.run(session.ask("go", on_token=printer, on_status=printer.status))
+    printer.finish()
+    assert capsys.readouterr().out.splitlines() == [
+        "Assistant > Let me check.",
+        "▪ Executing execute_sql({'query': 'a'})",
+        "Assistant > There are 20.",
+        "",
+    ]
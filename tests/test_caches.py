@@ -0,0 +1,184 @@
+import contextlib
+
+import pytest
+
+from shared_cache import SharedCacheStore
+
+
+@pytest.fixture
+def schema_cache(server, monkeypatch):
+    """A SchemaCache whose sys.objects probe returns ``versions[-1]``."""
+    cache = server.SchemaCache(enabled=True, check_interval=0)
+    versions = [(2, "2024-01-01")]
+    monkeypatch.setattr(cache, "_probe", lambda: versions[-1])
+    monkeypatch.setattr(server, "_get_connection", lambda: contextlib.nullcontext("conn"))
+    return cache, versions
+
+
+def test_schema_cache_hit_and_miss(schema_cache):
+    cache, _ = schema_cache
+    loads = []
+
+    def load(conn):
+        loads.append(conn)
+        return ["Customers"]
+
+    assert cache.lookup("tables", load) == ["Customers"]
+    assert cache.lookup("tables", load) == ["Customers"]
+    assert loads == ["conn"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_schema_cache_clears_when_the_schema_changes(schema_cache):
+    cache, versions = schema_cache
+    cache.lookup("tables", lambda conn: ["Customers"])
+    versions.append((3, "2024-01-02"))  # a table was created
+    assert cache.lookup("tables", lambda conn: ["Customers", "Orders"]) == ["Customers", "Orders"]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_schema_cache_rechecks_only_after_the_interval(schema_cache):
+    cache, versions = schema_cache
+    cache.check_interval = 3600
+    cache.lookup("tables", lambda conn: ["Customers"])
+    versions.append((3, "2024-01-02"))
+    assert cache.lookup("tables", lambda conn: ["Orders"]) == ["Customers"]
+    cache.invalidate()
+    assert cache.lookup("tables", lambda conn: ["Orders"]) == ["Orders"]
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_schema_cache_drops_loads_that_straddle_a_clear(server, monkeypatch, tmp_path, shared):
+    def make():
+        if shared:
+            store = SharedCacheStore(str(tmp_path / "cache.sqlite"))
+            return server.SharedSchemaCache(store, enabled=True, check_interval=3600)
+        return server.SchemaCache(enabled=True, check_interval=3600)
+
+    cache = make()
+    # another worker's cache over the same store, or the same in-process cache
+    other = make() if shared else cache
+    for each in {cache, other}:
+        monkeypatch.setattr(each, "_probe", lambda: (1, "2024-01-01"))
+    monkeypatch.setattr(server, "_get_connection", lambda: contextlib.nullcontext("conn"))
+
+    def load(conn):
+        other.invalidate()  # a schema change seen while the old schema was read
+        return ["Customers"]
+
+    assert cache.lookup("tables", load) == ["Customers"]
+    assert cache.stats()["entries"] == 0
+    assert cache.lookup("tables", lambda conn: ["Orders"]) == ["Orders"]
+    assert cache.lookup("tables", lambda conn: ["Stale"]) == ["Orders"]
+
+
+def test_disabled_schema_cache_always_loads(schema_cache):
+    cache, _ = schema_cache
+    cache.enabled = False
+    cache.lookup("tables", lambda conn: 1)
+    assert cache.lookup("tables", lambda conn: 2) == 2
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.fixture(params=["local", "shared"])
+def cache(request, server, tmp_path):
+    settings = dict(enabled=True, ttl=60, max_bytes=100)
+    if request.param == "shared":
+        return server.SharedResultCache(SharedCacheStore(str(tmp_path / "cache.db")), **settings)
+    return server.ResultCache(**settings)
+
+
+def test_result_cache_hit_and_miss(cache):
+    assert cache.get("a") is None
+    cache.put("a", {"rows": [1]}, 10, cache.generation)
+    assert cache.get("a") == {"rows": [1]}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["entries"] == 1 and stats["bytes"] == 10
+
+
+def test_result_cache_evicts_least_recently_used(cache):
+    for key in "abc":
+        cache.put(key, key, 40, cache.generation)
+    # "a" went to make room for "c"
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+    assert cache.stats()["bytes"] <= 100
+
+
+def test_result_cache_skips_oversized_results(cache):
+    cache.put("big", "x", 101, cache.generation)
+    assert cache.get("big") is None
+
+
+def test_result_cache_expires_entries(cache):
+    cache.ttl = -1
+    cache.put("a", "a", 10, cache.generation)
+    assert cache.get("a") is None
+
+
+def test_result_cache_ignores_puts_that_raced_a_write(cache):
+    generation = cache.generation
+    cache.put("a", "a", 10, generation)
+    cache.invalidate()
+    assert cache.get("a") is None
+    cache.put("b", "b", 10, generation)  # read before the write finished
+    assert cache.get("b") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_shared_result_cache_is_shared_between_instances(server, tmp_path):
+    path = str(tmp_path / "cache.db")
+    settings = dict(enabled=True, ttl=60, max_bytes=100)
+    one = server.SharedResultCache(SharedCacheStore(path), **settings)
+    two = server.SharedResultCache(SharedCacheStore(path), **settings)
+    one.put("a", {"rows": [1]}, 10, one.generation)
+    assert two.get("a") == {"rows": [1]}
+    two.invalidate()
+    assert one.get("a") is None
+    assert one.generation == two.generation == 1
+
+
+def test_execute_sql_caches_reads_and_invalidates_on_write(server):
+    query = "SELECT CustomerID FROM Customers WHERE CustomerID <= 3 ORDER BY CustomerID"
+    first = server._execute_sql(query, None, "arrays", 30)
+    assert first["rows"] == [[1], [2], [3]]
+    assert server._execute_sql(query, None, "arrays", 30)["cached"] is True
+
+    update = server._execute_sql("UPDATE Customers SET Region = Region WHERE CustomerID = 1", None, "rows", 30)
+    assert update["type"] == "update" and update["rows_affected"] == 1
+    assert "cached" not in server._execute_sql(query, None, "arrays", 30)
+
+
+def test_is_read_only(server):
+    assert server._is_read_only("SELECT * FROM Customers")
+    assert server._is_read_only("with x as (select 1 as n) select n from x")
+    assert server._is_read_only("SELECT 'GETDATE()' AS label")
+    assert not server._is_read_only("SELECT GETDATE()")
+    assert not server._is_read_only("SELECT * INTO Copy FROM Customers")
+    assert not server._is_read_only("DELETE FROM Customers")
+
+
+def test_non_deterministic_cte_returns_rows_without_caching(server):
+    query = "WITH x AS (SELECT CURRENT_TIMESTAMP AS t) SELECT * FROM x"
+    cached = "SELECT CustomerID FROM Customers WHERE CustomerID = 1"
+    server._execute_sql(cached, None, "arrays", 30)
+    invalidations = server._result_cache.stats()["invalidations"]
+
+    result = server._execute_sql(query, None, "arrays", 30)
+    assert result["type"] == "select" and result["row_count"] == 1
+    assert "cached" not in server._execute_sql(query, None, "arrays", 30)
+    # a read, so neither cache was cleared
+    assert server._result_cache.stats()["invalidations"] == invalidations
+    assert server._execute_sql(cached, None, "arrays", 30)["cached"] is True
+
+
+def test_cte_feeding_a_write_takes_the_write_path(server):
+    invalidations = server._result_cache.stats()["invalidations"]
+    result = server._execute_sql(
+        "WITH x AS (SELECT 1 AS id) UPDATE Customers SET Region = Region WHERE CustomerID IN (SELECT id FROM x)",
+        None, "rows", 30,
+    )
+    assert result["type"] == "with"
+    assert server._result_cache.stats()["invalidations"] == invalidations + 1
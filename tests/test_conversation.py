@@ -0,0 +1,75 @@
+import json
+
+from conversation import ConversationHistory
+
+
+def _history(budget, threshold=50):
+    return ConversationHistory(
+        "system", token_budget=budget, elide_threshold=threshold, model="no-such-model"
+    )
+
+
+def _tool_round(history, call_id, payload):
+    history.append({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{"id": call_id, "type": "function", "function": {"name": "execute_sql", "arguments": "{}"}}],
+    })
+    history.append({"role": "tool", "tool_call_id": call_id, "content": json.dumps(payload)})
+
+
+def test_compact_is_a_no_op_under_budget():
+    history = _history(10_000)
+    history.append({"role": "user", "content": "hi"})
+    before = list(history.messages)
+    history.compact()
+    assert history.messages == before
+
+
+def test_compact_elides_old_tool_results_first():
+    history = _history(300)
+    history.append({"role": "user", "content": "first question"})
+    _tool_round(history, "a", {"type": "select", "row_count": 200, "rows": [[i] for i in range(200)]})
+    history.append({"role": "assistant", "content": "answer"})
+    history.append({"role": "user", "content": "second question"})
+    history.compact()
+    assert history.total_tokens <= 300
+    summary = json.loads(history.messages[3]["content"])
+    assert summary["elided"] is True
+    assert summary["row_count"] == 200 and summary["rows_count"] == 200
+    # the tool call and its answer stayed together
+    assert history.messages[2]["tool_calls"][0]["id"] == history.messages[3]["tool_call_id"]
+
+
+def test_compact_drops_oldest_groups_but_keeps_the_current_turn():
+    history = _history(60, threshold=10_000)
+    for n in range(5):
+        history.append({"role": "user", "content": f"question {n} " + "word " * 20})
+        history.append({"role": "assistant", "content": f"answer {n} " + "word " * 20})
+    history.compact()
+    assert history.messages[0]["role"] == "system"
+    assert history.messages[-2]["content"].startswith("question 4")
+    assert len(history.messages) < 11
+    assert len(history._tokens) == len(history.messages)
+
+
+def test_compact_elides_earlier_rounds_of_the_current_turn():
+    history = _history(400)
+    history.append({"role": "user", "content": "question"})
+    rows = {"type": "select", "row_count": 150, "rows": [[i] for i in range(150)]}
+    _tool_round(history, "a", rows)
+    _tool_round(history, "b", rows)
+    history.compact()
+    assert history.total_tokens <= 400
+    assert json.loads(history.messages[3]["content"])["elided"] is True
+    # the latest round stays whole
+    assert json.loads(history.messages[5]["content"]) == rows
+
+
+def test_compact_warns_when_the_latest_round_alone_is_over_budget(caplog):
+    history = _history(100)
+    history.append({"role": "user", "content": "question"})
+    _tool_round(history, "a", {"rows": [[i] for i in range(300)]})
+    history.compact()
+    assert "over its 100 token budget" in caplog.text
+    assert len(history.messages) == 4
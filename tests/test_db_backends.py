@@ -0,0 +1,87 @@
+import json
+import sqlite3
+
+import pytest
+
+from db_backends import SqliteBackend
+from tests.conftest import DB_PATH
+
+
+@pytest.fixture
+def backend():
+    return SqliteBackend(DB_PATH)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT * FROM Customers", "SELECT * FROM Customers\nLIMIT 11"),
+    ("SELECT * FROM Customers;  ", "SELECT * FROM Customers\nLIMIT 11"),
+    ("WITH x AS (SELECT 1) SELECT * FROM x", "WITH x AS (SELECT 1) SELECT * FROM x\nLIMIT 11"),
+    ("SELECT * FROM Customers -- all", "SELECT * FROM Customers -- all\nLIMIT 11"),
+])
+def test_limit_query_appends_limit(backend, query, expected):
+    assert backend.limit_query(query, 11) == (expected, True)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM Customers LIMIT 5",
+    "select * from Customers limit 5 offset 2",
+    "SELECT 1; SELECT 2",
+    "UPDATE Customers SET Region = 'x'",
+    "PRAGMA table_info(Customers)",
+])
+def test_limit_query_leaves_other_statements_alone(backend, query):
+    assert backend.limit_query(query, 11) == (query, False)
+
+
+def test_limited_query_runs(backend):
+    query, _ = backend.limit_query("SELECT CustomerID FROM Customers ORDER BY CustomerID", 3)
+    conn = backend.connect()
+    try:
+        assert conn.cursor().execute(query).fetchall() == [(1,), (2,), (3,)]
+    finally:
+        conn.close()
+
+
+def test_catalog(backend):
+    conn = backend.connect()
+    try:
+        tables = backend.list_tables(conn)
+        assert {t["table"] for t in tables} >= {"Customers", "Orders"}
+        columns = backend.describe_columns(conn, [("main", "customers")])
+    finally:
+        conn.close()
+    (described,) = columns.values()
+    assert [c["name"] for c in described] == ["CustomerID", "CustomerName", "Region"]
+
+
+def test_sqlite_cursor_reports_no_column_types(backend):
+    conn = backend.connect()
+    try:
+        cur = conn.cursor().execute("SELECT OrderID, Note FROM Orders")
+        assert [d[:2] for d in cur.description] == [("OrderID", None), ("Note", None)]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("result_format", ["rows", "arrays"])
+def test_mixed_type_column_serializes(server, result_format):
+    result = server._execute_sql(
+        "SELECT OrderID, Note FROM Orders WHERE OrderID <= 4 ORDER BY OrderID", None, result_format, 30
+    )
+    rows = result["rows"] if result_format == "arrays" else [list(r.values()) for r in result["rows"]]
+    # an integer first, then a blob (as base64), NULL and text
+    assert rows == [[1, 7], [2, "AAE="], [3, None], [4, "first"]]
+    json.dumps(result)
+
+
+def test_missing_database_file_is_not_created(tmp_path):
+    path = tmp_path / "typo.db"
+    with pytest.raises(SqliteBackend.Error, match="typo.db"):
+        SqliteBackend(str(path)).connect()
+    assert not path.exists()
+
+
+def test_path_with_uri_characters(tmp_path):
+    path = tmp_path / "odd?name#1.db"
+    sqlite3.connect(path).close()
+    SqliteBackend(str(path)).connect().close()
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+# never finishes on its own: only a cancel or a timeout stops it
+ENDLESS = "WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c) SELECT COUNT(*) FROM c"
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_a_slow_call_does_not_block_another(server):
+    pool = server._pool
+    discarded = pool.stats()["discarded"]
+
+    async def scenario():
+        slow = asyncio.create_task(server.execute_sql(ENDLESS, timeout_seconds=30))
+        await _wait_for(lambda: pool.stats()["in_use"] == 1)
+        fast = await server.execute_sql("SELECT COUNT(*) AS n FROM Customers", result_format="arrays")
+        assert fast["rows"] == [[20]]
+        assert not slow.done()
+
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        # the worker stops the statement and gives its connection up
+        await _wait_for(lambda: pool.stats()["in_use"] == 0)
+
+    asyncio.run(scenario())
+    assert pool.stats()["discarded"] == discarded + 1
+    assert server._db.stats()["recent_cancellations"][-1]["reason"] == "cancelled"
+
+
+def test_a_timed_out_query_is_cancelled_and_reported(server):
+    async def scenario():
+        started = time.monotonic()
+        with pytest.raises(TimeoutError, match="timed out|timeout"):
+            await server.execute_sql(ENDLESS, timeout_seconds=1)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(scenario())
+    assert elapsed < 1 + server.QUERY_DEADLINE_GRACE_SEC + 0.5
+
+    stats = server.server_stats()
+    assert stats["workers"]["cancelled"] >= 1
+    cancelled = stats["workers"]["recent_cancellations"][-1]
+    assert cancelled["reason"] == "timeout"
+    assert cancelled["query"].startswith("WITH RECURSIVE")
+    assert stats["pool"]["in_use"] == 0
+
+    # the pool still serves queries afterwards
+    result = asyncio.run(server.execute_sql("SELECT COUNT(*) AS n FROM Orders", result_format="arrays"))
+    assert result["rows"] == [[100]]
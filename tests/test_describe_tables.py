@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def column_queries(server, monkeypatch):
+    """Records the keys of every describe_columns round trip."""
+    calls = []
+    describe_columns = server._backend.describe_columns
+
+    def recording(conn, keys):
+        calls.append(list(keys))
+        return describe_columns(conn, keys)
+
+    monkeypatch.setattr(server._backend, "describe_columns", recording)
+    return calls
+
+
+def test_columns_for_many_tables_in_one_query(server, column_queries):
+    result = server._describe_tables(["Customers", "Orders", "orders"], False)
+    assert [t["table_name"] for t in result["tables"]] == ["Customers", "Orders", "orders"]
+    assert [c["name"] for c in result["tables"][1]["columns"]] == ["OrderID", "CustomerID", "TotalAmount", "Note"]
+    assert result["tables"][1]["columns"] == result["tables"][2]["columns"]
+    # one set-based query for both tables, then the schema cache answers
+    assert column_queries == [[("", "customers"), ("", "orders")]]
+    server._describe_tables(["Orders"], False)
+    assert len(column_queries) == 1
+
+
+def test_include_keys(server):
+    result = server._describe_tables(["Orders", "Customers"], True)
+    orders, customers = result["tables"]
+    assert [(k["type"], k["columns"]) for k in orders["keys"]] == [
+        ("PRIMARY KEY", ["OrderID"]), ("FOREIGN KEY", ["CustomerID"]),
+    ]
+    assert orders["keys"][1]["references"] == {"table": "main.Customers", "columns": ["CustomerID"]}
+    assert [(i["name"], i["columns"], i["unique"]) for i in orders["indexes"]] == [
+        ("IX_Orders_Customer", ["CustomerID", "OrderID"], False),
+    ]
+    assert [(k["type"], k["columns"]) for k in customers["keys"]] == [
+        ("PRIMARY KEY", ["CustomerID"]), ("UNIQUE", ["CustomerName"]),
+    ]
+    assert "keys" not in server._describe_tables(["Orders"], False)["tables"][0]
+
+
+def test_unknown_tables_are_listed_not_raised(server):
+    result = server._describe_tables(["Customers", "NoSuchTable"], True)
+    assert [t["table_name"] for t in result["tables"]] == ["Customers"]
+    assert result["not_found"] == ["NoSuchTable"]
+
+
+def test_schema_qualified_names(server):
+    result = server._describe_tables(["main.Customers", "[main].[Orders]", "other.Customers"], False)
+    assert [t["table_name"] for t in result["tables"]] == ["main.Customers", "[main].[Orders]"]
+    assert result["not_found"] == ["other.Customers"]
+
+
+def test_table_count_is_capped(server):
+    names = [f"Table{i}" for i in range(server.MAX_DESCRIBE_TABLES + 1)]
+    with pytest.raises(ValueError, match="at most"):
+        asyncio.run(server.describe_tables(names))
+    result = asyncio.run(server.describe_tables(names[1:]))
+    assert len(result["not_found"]) == server.MAX_DESCRIBE_TABLES
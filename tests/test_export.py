@@ -0,0 +1,74 @@
+import asyncio
+import base64
+import csv
+
+import pytest
+
+QUERY = "SELECT OrderID, TotalAmount, Note FROM Orders ORDER BY OrderID"
+NOTES = ["7", base64.b64encode(b"\x00\x01").decode("ascii"), None, "first"]
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("MSSQL_EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _export(server, file_name, file_format, query=QUERY):
+    return asyncio.run(server.export_query(query, file_name, format=file_format))
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_export_infers_arrow_types_from_values(server, export_dir, file_format):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    result = _export(server, f"orders.{file_format}", file_format)
+    assert result["row_count"] == 100
+    assert result["path"] == str(export_dir / f"orders.{file_format}")
+    if file_format == "parquet":
+        table = pyarrow.parquet.read_table(result["path"])
+    else:
+        table = pyarrow.ipc.open_file(result["path"]).read_all()
+    # SQLite reports no type codes; the first batch decides
+    assert table.schema.types == [pyarrow.int64(), pyarrow.float64(), pyarrow.string()]
+    assert table.column("OrderID").to_pylist() == list(range(1, 101))
+    assert table.column("TotalAmount").to_pylist()[:2] == [10.5, 21.0]
+    # a column of mixed values is text, its blobs base64
+    assert table.column("Note").to_pylist()[:4] == NOTES
+
+    blobs = _export(server, "blobs.parquet", "parquet", "SELECT Note FROM Orders WHERE OrderID % 4 = 2")
+    table = pyarrow.parquet.read_table(blobs["path"])
+    assert table.schema.types == [pyarrow.binary()]
+    assert set(table.column("Note").to_pylist()) == {b"\x00\x01"}
+
+
+def test_export_of_no_rows_writes_an_empty_file(server, export_dir):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    result = _export(server, "none.parquet", "parquet", "SELECT OrderID FROM Orders WHERE 0")
+    assert result["row_count"] == 0
+    assert pyarrow.parquet.read_table(result["path"]).num_rows == 0
+
+
+def test_export_csv_writes_binary_as_base64(server, export_dir):
+    result = _export(server, "nested/orders.csv", "csv")
+    assert result["path"] == str(export_dir / "nested" / "orders.csv")
+    with open(result["path"], newline="", encoding="utf-8") as fh:
+        rows = list(csv.reader(fh))
+    assert rows[0] == ["OrderID", "TotalAmount", "Note"]
+    assert len(rows) == 101
+    assert rows[1:5] == [
+        [str(i), str(i * 10.5), "" if note is None else note]
+        for i, note in zip(range(1, 5), NOTES)
+    ]
+    assert list(export_dir.glob("**/*.partial")) == []
+
+
+@pytest.mark.parametrize("file_name", ["../escaped.csv", "nested/../../escaped.csv", "/tmp/escaped.csv", "."])
+def test_export_refuses_paths_outside_the_export_dir(server, export_dir, file_name):
+    with pytest.raises(ValueError, match="inside"):
+        _export(server, file_name, "csv")
+    assert not (export_dir.parent / "escaped.csv").exists()
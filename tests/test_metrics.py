@@ -0,0 +1,99 @@
+import json
+
+import metrics
+
+
+def test_counter_exposition():
+    registry = metrics.Registry()
+    calls = registry.counter("calls_total", "Tool calls.", ("tool", "outcome"))
+    calls.inc(tool="execute_sql", outcome="ok")
+    calls.inc(2, tool="execute_sql", outcome="ok")
+    calls.inc(tool="list_tables", outcome="error")
+    registry.counter("idle_total", "Never incremented.")
+    assert metrics.render(registry.collect()) == (
+        "# HELP calls_total Tool calls.\n"
+        "# TYPE calls_total counter\n"
+        'calls_total{tool="execute_sql",outcome="ok"} 3\n'
+        'calls_total{tool="list_tables",outcome="error"} 1\n'
+        "# HELP idle_total Never incremented.\n"
+        "# TYPE idle_total counter\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = metrics.Registry()
+    seconds = registry.histogram("call_seconds", "Call time.", ("tool",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        seconds.observe(value, tool="q")
+    assert metrics.render(registry.collect()).splitlines() == [
+        "# HELP call_seconds Call time.",
+        "# TYPE call_seconds histogram",
+        'call_seconds_bucket{tool="q",le="0.1"} 2',  # bounds are inclusive
+        'call_seconds_bucket{tool="q",le="1.0"} 3',
+        'call_seconds_bucket{tool="q",le="+Inf"} 4',
+        'call_seconds_sum{tool="q"} 5.65',
+        'call_seconds_count{tool="q"} 4',
+    ]
+
+
+def test_label_values_and_help_are_escaped():
+    family = metrics.gauge("g", 'Help with a \\ and\na "quote".', 1.5, query='a\\b\n"c"')
+    assert metrics.render([family]).splitlines() == [
+        '# HELP g Help with a \\\\ and\\na "quote".',
+        "# TYPE g gauge",
+        'g{query="a\\\\b\\n\\"c\\""} 1.5',
+    ]
+
+
+def test_collector_families_and_empty_gauges():
+    registry = metrics.Registry()
+    registry.add_collector(lambda: [
+        metrics.gauge("pool", "Connections.", 2, state="in_use"),
+        metrics.gauge("pool", "Connections.", 3, state="idle"),
+        metrics.gauge("probe", "Unknown yet.", None),
+        metrics.counter("opened_total", "Opened.", 7),
+    ])
+    # one HELP/TYPE block per name; a gauge without a value has no sample
+    assert metrics.render(registry.collect()) == (
+        "# HELP pool Connections.\n"
+        "# TYPE pool gauge\n"
+        'pool{state="in_use"} 2\n'
+        'pool{state="idle"} 3\n'
+        "# HELP probe Unknown yet.\n"
+        "# TYPE probe gauge\n"
+        "# HELP opened_total Opened.\n"
+        "# TYPE opened_total counter\n"
+        "opened_total 7\n"
+    )
+
+
+def _snapshot(calls, seconds):
+    registry = metrics.Registry()
+    registry.counter("calls_total", "Tool calls.", ("tool",)).inc(calls, tool="q")
+    registry.histogram("call_seconds", "Call time.", buckets=(1.0,)).observe(seconds)
+    # workers hand their snapshots over as JSON
+    return json.loads(json.dumps(registry.collect()))
+
+
+def test_merge_tags_each_workers_samples():
+    text = metrics.render(metrics.merge({"0": _snapshot(2, 0.5), "1": _snapshot(5, 3.0)}, "worker"))
+    assert text.count("# TYPE calls_total counter") == 1
+    lines = text.splitlines()
+    assert 'calls_total{worker="0",tool="q"} 2' in lines
+    assert 'calls_total{worker="1",tool="q"} 5' in lines
+    assert 'call_seconds_bucket{worker="0",le="1.0"} 1' in lines
+    assert 'call_seconds_bucket{worker="1",le="1.0"} 0' in lines
+    assert 'call_seconds_count{worker="1"} 1' in lines
+
+
+def test_server_merges_worker_snapshots(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "_metrics_dir", str(tmp_path))
+    monkeypatch.setitem(server._process, "worker", 0)
+    (tmp_path / "worker-1.json").write_text(json.dumps(_snapshot(4, 0.2)))
+    (tmp_path / "worker-2.json").write_text("{partly written")  # skipped, not fatal
+    (tmp_path / "worker-0.json").write_text(json.dumps(_snapshot(99, 0.2)))  # stale: own values win
+    lines = metrics.render(server._metric_families()).splitlines()
+    assert 'calls_total{worker="1",tool="q"} 4' in lines
+    assert not any('worker="2"' in line for line in lines)
+    assert not any(line.startswith("calls_total") and 'worker="0"' in line for line in lines)
+    assert any(line.startswith('mcp_db_pool_max_connections{worker="0"}') for line in lines)
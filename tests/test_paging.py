@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+QUERY = "SELECT OrderID FROM Orders ORDER BY OrderID"
+
+
+def _page_through(server, page_size):
+    """execute_sql(page_size=...) then fetch_more until done; the pages and tokens seen."""
+    page = asyncio.run(server.execute_sql(QUERY, page_size=page_size, result_format="arrays"))
+    pages, tokens = [page], []
+    while page["has_more"]:
+        tokens.append(page["continuation_token"])
+        page = asyncio.run(server.fetch_more(tokens[-1], page_size=page_size))
+        pages.append(page)
+    assert page["continuation_token"] is None
+    return pages, tokens
+
+
+def test_paging_with_a_held_cursor(server):
+    pages, tokens = _page_through(server, 30)
+    assert [p["row_count"] for p in pages] == [30, 30, 30, 10]
+    assert [p["rows_sent"] for p in pages] == [30, 60, 90, 100]
+    assert [row[0] for p in pages for row in p["rows"]] == list(range(1, 101))
+    # the exhausted cursor gave its connection back
+    assert server._cursors.stats()["open"] == 0
+    assert server._pool.stats()["in_use"] == 0
+    with pytest.raises(ValueError, match="Unknown or expired"):
+        asyncio.run(server.fetch_more(tokens[0]))
+
+
+def test_unknown_and_expired_tokens(server, monkeypatch):
+    with pytest.raises(ValueError, match="Unknown or expired"):
+        asyncio.run(server.fetch_more("no-such-token"))
+
+    monkeypatch.setattr(server._cursors, "ttl", -1)
+    page = asyncio.run(server.execute_sql(QUERY, page_size=10))
+    assert server._pool.stats()["in_use"] == 1
+    assert server._cursors.sweep() == 1
+    assert server._pool.stats()["in_use"] == 0
+    with pytest.raises(ValueError, match="Unknown or expired"):
+        asyncio.run(server.fetch_more(page["continuation_token"]))
+
+
+def test_paging_falls_back_to_a_stored_result_across_workers(server, monkeypatch, tmp_path):
+    # with --workers a later fetch_more may reach another process, so no cursor is held
+    monkeypatch.setattr(server, "_result_store", server._create_result_store(str(tmp_path)))
+    pages, tokens = _page_through(server, 30)
+    assert [p["row_count"] for p in pages] == [30, 30, 30, 10]
+    assert [p["rows_sent"] for p in pages] == [30, 60, 90, 100]
+    assert [row[0] for p in pages for row in p["rows"]] == list(range(1, 101))
+    assert all(server._STORED_PAGE_TOKEN.match(token) for token in tokens)
+    assert server._cursors.stats()["open"] == 0
+    assert server._pool.stats()["in_use"] == 0
+    # the last page dropped the stored result
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(ValueError):
+        asyncio.run(server.fetch_more(tokens[-1]))
@@ -0,0 +1,172 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def pool(server):
+    pool = server.ConnectionPool(
+        server._backend.connect,
+        min_size=0,
+        max_size=2,
+        idle_timeout=60,
+        max_lifetime=3600,
+        acquire_timeout=0.2,
+    )
+    yield pool
+    pool.close()
+
+
+def test_pool_reuses_released_connections(pool):
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    assert second is first
+    pool.release(second)
+    stats = pool.stats()
+    assert stats["opened"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["idle"] == 1 and stats["in_use"] == 0
+
+
+def test_pool_times_out_when_exhausted(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    assert pool.stats()["waits"] == 1
+    for pooled in held:
+        pool.release(pooled)
+
+
+def test_pool_hands_a_released_connection_to_a_waiter(pool):
+    held = [pool.acquire(), pool.acquire()]
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    pool.release(held[0])
+    waiter.join(1)
+    assert got == [held[0]]
+    pool.release(held[1])
+    pool.release(got[0])
+
+
+def test_pool_replaces_dead_connections(pool):
+    pooled = pool.acquire()
+    pool.release(pooled)
+    pooled.conn.close()  # the ping on the next checkout fails
+    fresh = pool.acquire()
+    assert fresh is not pooled
+    assert pool.stats()["failed_pings"] == 1
+    pool.release(fresh)
+
+
+def test_pool_discard_and_close(pool):
+    pooled = pool.acquire()
+    pool.release(pooled, discard=True)
+    assert pool.stats()["size"] == 0
+    pool.release(pool.acquire())
+    pool.close()
+    assert pool.stats()["size"] == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_pool_rolls_back_on_release(pool):
+    pooled = pool.acquire()
+    pooled.conn.cursor().execute("DELETE FROM Orders")
+    pool.release(pooled)
+    pooled = pool.acquire()
+    cur = pooled.conn.cursor().execute("SELECT COUNT(*) FROM Orders")
+    assert cur.fetchone()[0] == 100
+    pool.release(pooled)
+
+
+def test_pool_rejects_empty_max_size(server):
+    with pytest.raises(ValueError):
+        server.ConnectionPool(
+            server._backend.connect, min_size=0, max_size=0,
+            idle_timeout=1, max_lifetime=1, acquire_timeout=1,
+        )
+
+
+def test_pool_prewarm_opens_min_size(server):
+    pool = server.ConnectionPool(
+        server._backend.connect, min_size=2, max_size=3,
+        idle_timeout=60, max_lifetime=3600, acquire_timeout=1,
+    )
+    assert pool.prewarm() == 2
+    assert pool.prewarm() == 0
+    stats = pool.stats()
+    assert (stats["opened"], stats["idle"], stats["in_use"]) == (2, 2, 0)
+    pool.close()
+
+
+@pytest.mark.parametrize("error", ["driver", "timeout", "cancelled"])
+def test_get_connection_discards_suspect_connections(server, error):
+    before = server._pool.stats()["discarded"]
+    with pytest.raises(Exception):
+        with server._get_connection() as conn:
+            if error == "driver":
+                conn.cursor().execute("SELECT * FROM NoSuchTable")
+            raise TimeoutError() if error == "timeout" else server.QueryCancelled()
+    stats = server._pool.stats()
+    assert stats["discarded"] == before + 1 and stats["in_use"] == 0
+
+
+def test_get_connection_keeps_the_connection_after_other_errors(server):
+    with server._get_connection() as conn:
+        pass
+    with pytest.raises(ValueError):
+        with server._get_connection() as again:
+            assert again is conn
+            raise ValueError("bad argument")
+    with server._get_connection() as again:
+        assert again is conn
+
+
+def _held_cursor(server, pool, query="SELECT CustomerID FROM Customers ORDER BY CustomerID"):
+    pooled = pool.acquire()
+    cur = pooled.conn.cursor()
+    cur.execute(query)
+    return server._HeldCursor(pooled, server._ResultReader(cur, "arrays"))
+
+
+@pytest.fixture
+def cursors(server, pool):
+    store = server.CursorStore(pool, ttl=60, max_open=1)
+    yield store
+    store.close_all()
+
+
+def test_cursor_store_round_trip(server, pool, cursors):
+    held = _held_cursor(server, pool)
+    token = cursors.put(held)
+    assert cursors.take(token) is held
+    with pytest.raises(ValueError):
+        cursors.take(token)  # a token is good for one fetch
+    assert held.reader.read(5, 10_000) == [[1], [2], [3], [4], [5]]
+    assert cursors.release(held) is not None  # rows remain
+
+
+def test_cursor_store_evicts_oldest_over_max_open(server, pool, cursors):
+    first = cursors.put(_held_cursor(server, pool))
+    cursors.put(_held_cursor(server, pool))
+    assert cursors.stats()["evicted"] == 1
+    with pytest.raises(ValueError):
+        cursors.take(first)
+    # the evicted cursor's connection went back to the pool
+    assert pool.stats()["in_use"] == 1
+
+
+def test_cursor_store_sweeps_expired(server, pool, cursors):
+    cursors.ttl = -1
+    cursors.put(_held_cursor(server, pool))
+    assert cursors.sweep() == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_cursor_store_closes_exhausted_cursors(server, pool, cursors):
+    held = _held_cursor(server, pool, "SELECT 1")
+    held.reader.read(10, 10_000)
+    assert cursors.release(held) is None
+    assert pool.stats()["in_use"] == 0
@@ -0,0 +1,112 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+import prefork
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork needs os.fork")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# serves each worker's pid; logs "start <index> <pid>" and "stop <pid>"
+SUPERVISOR = """
+import os, sys
+import prefork
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+log, port = sys.argv[1], int(sys.argv[2])
+
+def note(line):
+    with open(log, "a") as fh:
+        fh.write(line + "\\n")
+
+def make_app():
+    return Starlette(routes=[Route("/", lambda request: PlainTextResponse(str(os.getpid())))])
+
+prefork.RESTART_DELAY_SEC = 0.1
+prefork.serve(
+    make_app, host="127.0.0.1", port=port, workers=2, log_level="WARNING",
+    on_worker_start=lambda index: note(f"start {index} {os.getpid()}"),
+    on_worker_stop=lambda: note(f"stop {os.getpid()}"),
+)
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(condition, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        value = condition()
+        if value:
+            return value
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.05)
+
+
+def _lines(path, kind):
+    if not os.path.exists(path):
+        return []
+    with open(path) as fh:
+        return [line.split()[1:] for line in fh if line.startswith(kind)]
+
+
+def _get(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as response:
+            return int(response.read())
+    except OSError:
+        return None
+
+
+def test_bind_makes_an_inheritable_socket():
+    sock = prefork._bind("127.0.0.1", 0)
+    try:
+        assert sock.family == socket.AF_INET
+        assert sock.get_inheritable()
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR)
+    finally:
+        sock.close()
+
+
+def test_workers_serve_restart_and_stop(tmp_path):
+    log, port = str(tmp_path / "workers.log"), _free_port()
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    parent = subprocess.Popen([sys.executable, "-c", SUPERVISOR, log, str(port)], env=env, cwd=ROOT)
+    try:
+        started = _wait_for(lambda: len(_lines(log, "start")) == 2 and _lines(log, "start"))
+        pids = {int(index): int(pid) for index, pid in started}
+        assert sorted(pids) == [0, 1]
+        assert _wait_for(lambda: _get(port)) in pids.values()
+
+        # a worker that dies is replaced under the same index
+        os.kill(pids[0], signal.SIGKILL)
+        restarted = _wait_for(lambda: [s for s in _lines(log, "start")[2:]])
+        assert restarted[0][0] == "0" and int(restarted[0][1]) != pids[0]
+        live = {pids[1], int(restarted[0][1])}
+        assert _wait_for(lambda: _get(port)) in live
+
+        # SIGTERM stops every worker, each running its cleanup, then the parent
+        parent.send_signal(signal.SIGTERM)
+        assert parent.wait(timeout=15) == 0
+        assert {int(pid) for (pid,) in _lines(log, "stop")} == live
+        for pid in live:
+            with pytest.raises(ProcessLookupError):
+                os.kill(pid, 0)
+        assert _get(port) is None
+    finally:
+        if parent.poll() is None:
+            parent.kill()
+            parent.wait()
@@ -0,0 +1,56 @@
+import pytest
+
+from result_shaping import RESULT_TOOL_NAME, ResultShaper, column_stats, tabulate
+
+
+def _shaper(max_tokens=2000, style="csv"):
+    return ResultShaper(style=style, max_tokens=max_tokens, sample_rows=3, model="no-such-model")
+
+
+def _select(n):
+    return {
+        "type": "select",
+        "format": "arrays",
+        "columns": ["id", "name"],
+        "rows": [[i, f"name {i}"] for i in range(n)],
+        "row_count": n,
+    }
+
+
+def test_tabulate_understands_every_result_format():
+    arrays = _select(2)
+    rows = {"type": "select", "columns": ["id", "name"], "rows": [{"id": 0, "name": "name 0"}, {"id": 1, "name": "name 1"}]}
+    columns = {"type": "select", "format": "columns", "columns": ["id", "name"], "values": [[0, 1], ["name 0", "name 1"]]}
+    expected = (["id", "name"], [[0, "name 0"], [1, "name 1"]])
+    assert tabulate(arrays) == tabulate(rows) == tabulate(columns) == expected
+    assert tabulate({"type": "insert"}) is None
+
+
+def test_small_results_render_whole():
+    text = _shaper().render("execute_sql", _select(3))
+    assert text.splitlines() == ["execute_sql: 3 rows", "id,name", "0,name 0", "1,name 1", "2,name 2"]
+
+
+def test_large_results_are_sampled_and_archived():
+    shaper = _shaper(max_tokens=200)
+    text = shaper.render("execute_sql", _select(500))
+    assert "Showing first 3 and last 3 of 500 rows" in text
+    assert "494 rows omitted" in text
+    assert "Column summary" in text
+    page = shaper.retrieve({"result_id": "r1", "offset": 100, "limit": 2})
+    assert page.splitlines() == ["r1 rows 100-102 of 500:", "id,name", "100,name 100", "101,name 101"]
+    with pytest.raises(ValueError):
+        shaper.retrieve({"result_id": "r9"})
+    assert shaper.tool_spec()["function"]["name"] == RESULT_TOOL_NAME
+
+
+def test_json_style_passes_results_through():
+    assert _shaper(style="json").render("list_tables", [{"name": "t"}]) == '[{"name": "t"}]'
+    with pytest.raises(ValueError):
+        _shaper(style="xml")
+
+
+def test_column_stats():
+    stats = column_stats(["n", "s"], [[1, "a"], [3, "b"], [None, "a"]])
+    assert stats[0] == {"column": "n", "nulls": 1, "min": 1.0, "max": 3.0, "mean": 2.0}
+    assert stats[1]["distinct"] == 2
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def store(server, tmp_path):
+    store = server.ResultStore(ttl=60, max_memory_bytes=1000, spill_dir=str(tmp_path))
+    yield store
+    store.close_all()
+
+
+def _entry(server, size, rows=None):
+    class Reader:
+        columns = ["n"]
+        column_types = ["int"]
+        numeric_types = [int]
+        bytes_read = size
+
+    return server._StoredResult(Reader, rows if rows is not None else [[size]], False, "SELECT n")
+
+
+def test_result_store_round_trip(server, store):
+    handle = store.put(_entry(server, 100, [[1], [2]]))
+    entry, rows = store.get(handle)
+    assert rows == [[1], [2]]
+    assert entry.row_count == 2
+    assert store.drop(handle) is True
+    with pytest.raises(ValueError):
+        store.get(handle)
+
+
+def test_result_store_spills_least_recently_used(server, store):
+    first = store.put(_entry(server, 600))
+    second = store.put(_entry(server, 600))
+    stats = store.stats()
+    assert stats["spilled"] == 1 and stats["spills"] == 1
+    assert stats["memory_bytes"] <= store.max_memory_bytes
+    assert os.path.exists(store._entries[first].path)
+    # spilled rows are read back from disk
+    assert store.get(first)[1] == [[600]]
+    assert store.get(second)[1] == [[600]]
+
+
+def test_result_store_expires_and_removes_spill_files(server, store):
+    first = store.put(_entry(server, 600))
+    store.put(_entry(server, 600))
+    path = store._entries[first].path
+    for entry in store._entries.values():
+        entry.expires_at = 0
+    assert store.stats()["expired"] == 2
+    assert not os.path.exists(path)
+
+
+def test_result_store_shared_between_workers(server, tmp_path):
+    shared = str(tmp_path / "shared")
+    os.mkdir(shared)
+    one = server.ResultStore(ttl=60, max_memory_bytes=1000, shared_dir=shared)
+    two = server.ResultStore(ttl=60, max_memory_bytes=1000, shared_dir=shared)
+    handle = one.put(_entry(server, 10, [[1]]))
+    assert two.get(handle)[1] == [[1]]
+    two.drop(handle)
+    with pytest.raises(ValueError):
+        one.get(handle)
+    with pytest.raises(ValueError):
+        two.get("../etc/passwd")
+
+
+def test_execute_sql_store_and_read_result(server):
+    stored = server._execute_sql(
+        "SELECT CustomerID, Region FROM Customers ORDER BY CustomerID", None, "rows", 30, store=True
+    )
+    assert stored["row_count"] == 20
+    page = server._read_result(
+        stored["handle"], 0, 5, None, [{"column": "Region", "op": "=", "value": "North"}], None, False, "arrays"
+    )
+    assert page["rows"] == [[2, "North"], [4, "North"], [6, "North"], [8, "North"], [10, "North"]]
+    server._result_store.drop(stored["handle"])
+
+
+def test_result_store_spills_a_result_larger_than_the_budget(server, store):
+    small = store.put(_entry(server, 100))
+    large = store.put(_entry(server, 5000))
+    stats = store.stats()
+    assert stats["memory_bytes"] <= store.max_memory_bytes
+    assert store._entries[large].rows is None
+    assert store._entries[small].rows is not None  # nothing else needed to go
+    assert store.get(large)[1] == [[5000]]
+
+
+def test_aggregate_types_are_stable_across_groups(server):
+    # SQLite reports no column types; Orders 1 sums to 3150.0, 2 to 2152.5
+    stored = server._execute_sql(
+        "SELECT CustomerID, TotalAmount FROM Orders WHERE CustomerID <= 2 ORDER BY OrderID",
+        None, "arrays", 30, store=True,
+    )
+    result = server._aggregate_result(
+        stored["handle"], ["sum(TotalAmount)", "avg(TotalAmount)", "sum(CustomerID)"], ["CustomerID"], None
+    )
+    assert result["rows"] == [[2, 2152.5, 430.5, 10], [1, 3150.0, 630.0, 5]]
+    assert [type(v) for row in result["rows"] for v in row[1:]] == [float, float, int] * 2
+    server._result_store.drop(stored["handle"])
+
+
+def test_wide_decimal_aggregates_stay_exact_strings(server, store, monkeypatch):
+    class Reader:
+        columns = ["g", "amount"]
+        column_types = ["int", "Decimal"]
+        numeric_types = [int, str]  # DECIMAL(19, 2): too wide for a float
+        bytes_read = 100
+
+    rows = [[1, "1876.25"], [1, "1876.25"], [2, "1878.00"], [2, "1877.00"]]
+    monkeypatch.setattr(server, "_result_store", store)
+    handle = store.put(server._StoredResult(Reader, rows, False, "SELECT g, amount"))
+    result = server._aggregate_result(handle, ["sum(amount)", "avg(amount)"], ["g"], None)
+    assert result["rows"] == [[1, "3752.50", "1876.25"], [2, "3755.00", "1877.50"]]
@@ -0,0 +1,89 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from row_serialization import RowBatchConverter, json_value, make_row_converter, numeric_type
+
+
+def _description(*type_codes, precision=None, scale=None):
+    return [(f"c{i}", t, None, None, precision, scale, True) for i, t in enumerate(type_codes)]
+
+
+def test_batch_converter_maps_types_to_json():
+    description = _description(int, str, datetime.date, bytes, uuid.UUID, decimal.Decimal)
+    description[5] = ("c5", decimal.Decimal, None, None, 10, 2, True)
+    ident = uuid.UUID(int=1)
+    rows, sizes = RowBatchConverter(description).convert([
+        (1, "a", datetime.date(2024, 1, 2), b"\x00\x01", ident, decimal.Decimal("1.25")),
+        (None, None, None, None, None, None),
+    ])
+    assert rows == [
+        [1, "a", "2024-01-02", "AAE=", str(ident), 1.25],
+        [None, None, None, None, None, None],
+    ]
+    assert len(sizes) == 2 and all(s > 0 for s in sizes)
+
+
+def test_batch_converter_matches_per_row_converter():
+    description = _description(int, float, str, decimal.Decimal, precision=38, scale=10)
+    batch = [(i, i / 3, f"name {i}", decimal.Decimal(i) / 7) for i in range(50)]
+    rows, _ = RowBatchConverter(description).convert(batch)
+    convert = make_row_converter(description)
+    assert rows == [convert(row) for row in batch]
+
+
+def test_batch_converter_sizes_track_json_length():
+    description = _description(int, str, datetime.datetime)
+    batch = [(i, "x" * i, datetime.datetime(2024, 1, 1, 12)) for i in range(1, 20)]
+    rows, sizes = RowBatchConverter(description).convert(batch)
+    for row, size in zip(rows, sizes):
+        # the estimate leaves out only the row's brackets and separators
+        assert abs(len(json.dumps(row, separators=(",", ":"))) - size) <= len(row) + 2
+
+
+def test_untyped_converter_stringifies():
+    rows, _ = RowBatchConverter(_description(int, float), typed=False).convert([(1, 2.5), (None, 3.0)])
+    assert rows == [["1", "2.5"], [None, "3.0"]]
+
+
+def test_unknown_type_code_decides_per_value():
+    rows, sizes = RowBatchConverter(_description(None)).convert([("a",), (2,), (b"\x00",), (None,)])
+    assert rows == [["a"], [2], ["AA=="], [None]]
+    assert len(sizes) == 4
+
+
+def test_json_value():
+    assert json_value(decimal.Decimal("3.00")) == 3
+    assert json_value(decimal.Decimal("3.10")) == "3.10"
+    assert json_value(datetime.time(1, 2)) == "01:02:00"
+
+
+def test_text_column_with_non_text_values_is_sized():
+    # a driver reporting str for a column that also holds numbers and blobs
+    rows, sizes = RowBatchConverter(_description(str)).convert([("ab",), (12,), (b"\x00",), (None,)])
+    assert rows == [["ab"], [12], [b"\x00"], [None]]
+    assert len(sizes) == 4 and sizes[:2] == [4, 2]
+
+
+def test_reader_pages_respect_the_byte_cap(server):
+    conn = server._backend.connect()
+    try:
+        cur = conn.cursor().execute("SELECT CustomerID, CustomerName FROM Customers ORDER BY CustomerID")
+        reader = server._ResultReader(cur, "arrays")
+        first = reader.read(100, 60)
+        assert first and len(first) < 20
+        rest = reader.read(100, 10_000)
+        assert [r[0] for r in first + rest] == list(range(1, 21))
+        assert not reader.has_more()
+    finally:
+        conn.close()
+
+
+def test_numeric_type_follows_the_converter():
+    assert [numeric_type(d) for d in _description(int, bool, float, str, bytes, None)] == (
+        [int, int, float, None, None, None]
+    )
+    assert numeric_type(("d", decimal.Decimal, None, None, 18, 0, True)) is int
+    assert numeric_type(("d", decimal.Decimal, None, None, 10, 2, True)) is float
+    assert numeric_type(("d", decimal.Decimal, None, None, 19, 2, True)) is str
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+
+def _calls(server, tool):
+    return sum(value for _, labels, value in server._tool_calls.samples() if labels.get("tool") == tool)
+
+
+def test_call_tool_outside_a_request(server):
+    # direct calls have no request context, hence no _meta/traceparent
+    before = _calls(server, "server_stats")
+    assert asyncio.run(server.mcp.call_tool("server_stats", {})) is not None
+    assert _calls(server, "server_stats") == before + 1
+
+
+def test_slow_query_plan_is_captured_after_the_query(server, tmp_path, monkeypatch):
+    from slow_query_log import SlowQueryLog
+
+    log = SlowQueryLog(str(tmp_path / "slow.jsonl"), threshold_ms=0, plan_threshold_ms=1e-6, max_bytes=10**6, backups=1)
+    monkeypatch.setattr(server, "_slow_log", log)
+    server._execute_sql("SELECT * FROM Orders WHERE CustomerID = 3", None, "arrays", 30)
+    log._planner.shutdown(wait=True)
+    (entry,) = log.top(1, include_plans=True)
+    assert entry["shape"].startswith("select * from orders where customerid = ?")
+    assert "Orders" in entry["plan"]
+    assert server._pool.stats()["in_use"] == 0
+    log.close()
+
+
+def _guard(server, host):
+    from mcp.server.transport_security import TransportSecurityMiddleware
+
+    settings = server._transport_security(host)
+    assert settings.enable_dns_rebinding_protection
+    return TransportSecurityMiddleware(settings)
+
+
+def test_transport_security_defaults_to_the_listen_address(server, monkeypatch):
+    monkeypatch.delenv("MSSQL_ALLOWED_HOSTS", raising=False)
+    monkeypatch.delenv("MSSQL_ALLOWED_ORIGINS", raising=False)
+    guard = _guard(server, "10.0.0.5")
+    assert guard._validate_host("10.0.0.5:8000") and guard._validate_host("10.0.0.5")
+    assert not guard._validate_host("evil.example:8000")
+    assert guard._validate_origin("http://10.0.0.5:8000")
+    assert not guard._validate_origin("http://evil.example")
+
+
+def test_transport_security_from_config(server, monkeypatch):
+    monkeypatch.setenv("MSSQL_ALLOWED_HOSTS", "sql-agent.internal:8000, sql-agent:*")
+    monkeypatch.setenv("MSSQL_ALLOWED_ORIGINS", "https://console.internal")
+    guard = _guard(server, "0.0.0.0")
+    assert guard._validate_host("sql-agent.internal:8000") and guard._validate_host("sql-agent:9000")
+    assert not guard._validate_host("0.0.0.0:8000")
+    assert guard._validate_origin("https://console.internal")
+    assert not guard._validate_origin("http://sql-agent:9000")
+
+
+def test_failed_plan_capture_discards_its_connection(server, monkeypatch):
+    with server._get_connection() as conn:
+        pass  # the pool now holds one idle connection
+    used = []
+
+    def explain(conn, query):
+        used.append(conn)
+        raise ValueError("SET SHOWPLAN_XML OFF failed")
+
+    monkeypatch.setattr(server._backend, "explain", explain)
+    discarded = server._pool.stats()["discarded"]
+    with pytest.raises(ValueError):
+        server._explain("SELECT 1")
+    assert used == [conn]
+    assert server._pool.stats()["discarded"] == discarded + 1
+    with server._get_connection() as fresh:
+        assert fresh is not conn
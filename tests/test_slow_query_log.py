@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+
+from slow_query_log import SlowQueryLog, query_shape
+
+
+def _log(tmp_path, name="slow.jsonl", **kwargs):
+    settings = dict(threshold_ms=10, plan_threshold_ms=100, max_bytes=1_000_000, backups=2)
+    settings.update(kwargs)
+    return SlowQueryLog(str(tmp_path / name), **settings)
+
+
+def _entries(log):
+    entries = []
+    for path in log.files():
+        with open(path, encoding="utf-8") as fh:
+            entries.extend(json.loads(line) for line in fh)
+    return entries
+
+
+def test_query_shape():
+    assert query_shape("select * from t where id in (1, 2, 3) and name = n'x'") == (
+        "select * from t where id in (?, ...) and name = ?"
+    )
+
+
+def test_plans_are_captured_off_the_calling_thread(tmp_path):
+    log = _log(tmp_path)
+    release, callers = threading.Event(), []
+
+    def explain():
+        callers.append(threading.current_thread())
+        release.wait(5)
+        return "SCAN t"
+
+    log.record("SELECT 1", "select 1", 5, statement="SELECT", explain=explain)  # under threshold
+    log.record("SELECT 2", "select 2", 50, statement="SELECT", explain=explain)  # no plan wanted
+    log.record("SELECT 3", "select 3", 500, statement="SELECT", explain=explain)
+    # record() returned while the plan is still being fetched
+    assert [e["query"] for e in _entries(log)] == ["SELECT 2"]
+    release.set()
+    log._planner.shutdown(wait=True)
+    entries = _entries(log)
+    assert entries[-1]["query"] == "SELECT 3" and entries[-1]["plan"] == "SCAN t"
+    assert callers and callers[0] is not threading.current_thread()
+    assert log.stats()["plans_captured"] == 1
+    log.close()
+
+
+def test_plan_errors_are_logged_with_the_entry(tmp_path):
+    log = _log(tmp_path)
+
+    def explain():
+        raise RuntimeError("no plan")
+
+    log.record("SELECT 1", "select 1", 500, statement="SELECT", explain=explain)
+    log._planner.shutdown(wait=True)
+    (entry,) = _entries(log)
+    assert entry["plan_error"] == "RuntimeError: no plan"
+    log.close()
+
+
+def test_files_match_only_this_log(tmp_path):
+    for name in ("slow.jsonl", "slow.jsonl.1", "slow.worker0.jsonl", "slow.worker0.jsonl.2",
+                 "slow-other.jsonl", "slow.jsonl.bak", "slowest.jsonl", "slow.worker.jsonl"):
+        (tmp_path / name).write_text("")
+    log = _log(tmp_path, "slow.worker1.jsonl")
+    assert [os.path.basename(p) for p in log.files()] == [
+        "slow.jsonl", "slow.jsonl.1", "slow.worker0.jsonl", "slow.worker0.jsonl.2",
+    ]
+    log.close()
+
+
+def test_top_ranks_shapes(tmp_path):
+    log = _log(tmp_path)
+    for ms in (20, 30):
+        log.record(f"SELECT * FROM t WHERE id = {ms}", f"select * from t where id = {ms}", ms, statement="SELECT")
+    log.record("SELECT * FROM u", "select * from u", 40, statement="SELECT")
+    top = log.top(2)
+    assert [(g["shape"], g["calls"], g["total_ms"]) for g in top] == [
+        ("select * from t where id = ?", 2, 50.0),
+        ("select * from u", 1, 40.0),
+    ]
+    log.close()
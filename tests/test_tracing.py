@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+
+import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (f"00-{TRACE_ID}-{PARENT_ID}-01", (TRACE_ID, PARENT_ID)),
+    (f"00-{TRACE_ID}-{PARENT_ID}-00", (TRACE_ID, PARENT_ID)),
+    (f"01-{TRACE_ID}-{PARENT_ID}-01", None),  # unknown version
+    (f"00-{TRACE_ID.upper()}-{PARENT_ID}-01", None),
+    (f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_traceparent(value, expected):
+    assert tracing.parse_traceparent(value) == expected
+
+
+def test_inject_outside_and_inside_a_span(tmp_path):
+    assert tracing.inject() is None
+    assert tracing.inject({"progressToken": 1}) == {"progressToken": 1}
+    tracer = tracing.Tracer("test", str(tmp_path / "trace.jsonl"))
+    with tracer.span("root") as root:
+        with tracing.span("child") as child:
+            meta = tracing.inject({"progressToken": 1})
+    assert meta == {"progressToken": 1, "traceparent": child.traceparent}
+    assert tracing.parse_traceparent(meta["traceparent"]) == (root.trace_id, child.span_id)
+
+
+def test_a_disabled_tracer_hands_out_noop_spans():
+    tracer = tracing.Tracer("test", None)
+    with tracer.span("root") as root:
+        assert root is tracing.NOOP_SPAN
+        assert tracing.inject() is None
+
+
+def _exports(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_spans_are_written_as_otlp_json_lines(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = tracing.Tracer("sql-mcp-server", str(path))
+    with tracer.span(
+        "tools/call execute_sql", kind=tracing.SERVER, traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01",
+        attributes={"mcp.tool": "execute_sql", "mcp.worker": None},
+    ) as root:
+        with pytest.raises(ValueError):
+            with tracing.span("db.execute", attributes={"db.rows": 3, "db.cached": False, "ms": 1.5}):
+                raise ValueError("bad query")
+        # children wait for their local root, so a turn is one line
+        assert not path.exists()
+    (export,) = _exports(path)
+    (resource,) = export["resourceSpans"]
+    assert {"key": "service.name", "value": {"stringValue": "sql-mcp-server"}} in resource["resource"]["attributes"]
+    child, server = resource["scopeSpans"][0]["spans"]
+    # the server span continues the remote trace
+    assert (server["traceId"], server["parentSpanId"], server["kind"]) == (TRACE_ID, PARENT_ID, tracing.SERVER)
+    assert server["status"] == {"code": 1}
+    assert server["spanId"] == root.span_id
+    assert {a["key"] for a in server["attributes"]} == {"mcp.tool"}  # None values are dropped
+    assert child["traceId"] == TRACE_ID and child["parentSpanId"] == root.span_id
+    assert child["attributes"] == [
+        {"key": "db.rows", "value": {"intValue": "3"}},
+        {"key": "db.cached", "value": {"boolValue": False}},
+        {"key": "ms", "value": {"doubleValue": 1.5}},
+    ]
+    assert child["status"] == {"code": 2, "message": "ValueError: bad query"}
+    assert int(child["startTimeUnixNano"]) <= int(child["endTimeUnixNano"]) <= int(server["endTimeUnixNano"])
+
+    spans = tracing.load_trace(str(path), TRACE_ID)
+    assert [s["name"] for s in spans] == ["tools/call execute_sql", "db.execute"]
+    assert spans[1]["attributes"] == {"db.rows": 3, "db.cached": False, "ms": 1.5}
+
+
+def _span(span_id, parent_id, name, service, start_ms, end_ms, error=None):
+    return {
+        "span_id": span_id, "parent_id": parent_id, "name": name, "service": service,
+        "start_ns": start_ms * 1_000_000, "end_ns": end_ms * 1_000_000, "attributes": {}, "error": error,
+    }
+
+
+def test_waterfall_nests_spans_and_marks_services():
+    text = tracing.waterfall([
+        _span("a", None, "turn", "agent-console", 0, 100),
+        _span("b", "a", "model", "agent-console", 0, 40),
+        _span("c", "a", "mcp.call_tool execute_sql", "agent-console", 40, 100),
+        _span("d", "c", "tools/call execute_sql", "sql-mcp-server", 50, 90),
+        _span("e", "d", "db.execute", "sql-mcp-server", 60, 80, error="TimeoutError: too slow"),
+        _span("f", "missing", "orphan", "sql-mcp-server", 90, 100),
+    ], width=10)
+    header, *rows = text.splitlines()
+    assert header.split() == ["span", "start", "ms", "dur", "ms", "timeline", "(100.0", "ms)"]
+    columns = [row.split("|")[0] for row in rows]
+    assert [(len(c) - len(c.lstrip()), *c.split()[-2:]) for c in columns] == [
+        (0, "0.0", "100.0"),
+        (2, "0.0", "40.0"),
+        (2, "40.0", "60.0"),
+        (4, "50.0", "40.0"),
+        (6, "60.0", "20.0"),
+        (0, "90.0", "10.0"),  # parent not in the trace: shown at the top level
+    ]
+    bars = [row.split("|")[1] for row in rows]
+    assert bars[0] == "█" * 10
+    assert bars[3] == "     ████ "
+    assert rows[0].endswith("[agent-console]")
+    assert rows[3].endswith("[sql-mcp-server]")
+    assert not rows[1].endswith("]")
+    assert rows[4].endswith("✗ TimeoutError: too slow")
+
+
+def test_waterfall_of_no_spans():
+    assert tracing.waterfall([]) == "(no spans recorded for this trace)"
+
+
+def test_trace_crosses_the_mcp_call(server, monkeypatch, tmp_path):
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from mcp_client import MCPClient
+
+    path = str(tmp_path / "trace.jsonl")
+    monkeypatch.setattr(server, "_tracer", tracing.Tracer("sql-mcp-server", path))
+    console = tracing.Tracer("agent-console", path)
+
+    async def scenario():
+        async with create_connected_server_and_client_session(server.mcp) as session:
+            client = MCPClient()
+            client.session = session
+            with console.span("turn") as turn:
+                await client.call_tool("execute_sql", {"query": "SELECT COUNT(*) AS n FROM Orders"})
+            return turn.trace_id
+
+    trace_id = asyncio.run(scenario())
+    spans = {s["name"]: s for s in tracing.load_trace(path, trace_id)}
+    call = spans["mcp.call_tool execute_sql"]
+    handler = spans["tools/call execute_sql"]
+    assert call["service"] == "agent-console"
+    assert handler["service"] == "sql-mcp-server"
+    # _meta carried the client span's traceparent to the server
+    assert handler["parent_id"] == call["span_id"]
+    assert "[sql-mcp-server]" in tracing.waterfall(list(spans.values()))
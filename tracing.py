@@ -0,0 +1,337 @@
+"""Span tracing for one agent turn, from the model call down to the database.
+
+The agent console and the MCP server each own a :class:`Tracer`; both
+append finished spans to the same local file (``TRACE_FILE``) as
+OpenTelemetry OTLP/JSON, one ``{"resourceSpans": [...]}`` export per line –
+the layout of the OpenTelemetry Collector's file exporter, so the file can
+be replayed into Jaeger, Tempo or any OTLP backend. The trace crosses the
+MCP connection as a W3C ``traceparent`` in the request's ``_meta``.
+
+The current span lives in a context variable, so asyncio tasks and
+``asyncio.to_thread`` calls inherit it; :func:`span` opens a child of it
+(or does nothing when no trace is active). :func:`waterfall` renders one
+trace from the file as an indented timeline.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import re
+import secrets
+import threading
+import time
+
+# OTLP SpanKind values
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+# OTLP status codes
+_STATUS_OK, _STATUS_ERROR = 1, 2
+
+# Spans buffered before a write even if their local root is still open
+_FLUSH_AFTER = 256
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Any) -> Optional[Tuple[str, str]]:
+    """``(trace_id, parent_span_id)`` from a W3C traceparent, or None."""
+    match = _TRACEPARENT.match(value) if isinstance(value, str) else None
+    return (match.group(1), match.group(2)) if match else None
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}  # OTLP/JSON encodes int64 as a string
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _attribute_value(value: Dict[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    for kind in ("stringValue", "doubleValue", "boolValue"):
+        if kind in value:
+            return value[kind]
+    return None
+
+
+class Span:
+    """A timed operation; ended by :meth:`Tracer.span` or :meth:`end`."""
+
+    __slots__ = (
+        "tracer", "name", "kind", "trace_id", "span_id", "parent_id",
+        "local_root", "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        kind: int,
+        trace_id: str,
+        parent_id: Optional[str],
+        local_root: bool,
+        attributes: Optional[Dict[str, Any]],
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.local_root = local_root
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {k: v for k, v in (attributes or {}).items() if v is not None}
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": _STATUS_ERROR, "message": self.error} if self.error else {"code": _STATUS_OK},
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off, so call sites need no checks."""
+
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Creates spans for one service and appends them to ``path``.
+
+    With no ``path`` the tracer is disabled and hands out :data:`NOOP_SPAN`.
+    """
+
+    def __init__(self, service_name: str, path: Optional[str]) -> None:
+        self.service_name = service_name
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: List[Span] = []
+        if path:
+            atexit.register(self.flush)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def start_span(
+        self,
+        name: str,
+        *,
+        kind: int = INTERNAL,
+        traceparent: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Start (without activating) a child of the current span.
+
+        ``traceparent`` continues a remote trace instead; with neither, the
+        span starts a new trace.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current.get()
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            trace_id, parent_id = remote
+        elif isinstance(parent, Span):
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        local_root = remote is not None or not isinstance(parent, Span) or parent.tracer is not self
+        return Span(self, name, kind, trace_id, parent_id, local_root, attributes)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **kwargs: Any) -> Iterator[Any]:
+        """Run the block in a new current span, recording an escaping exception."""
+        started = self.start_span(name, **kwargs)
+        if started is NOOP_SPAN:
+            yield started
+            return
+        token = _current.set(started)
+        try:
+            yield started
+        except BaseException as exc:
+            started.record_error(exc)
+            raise
+        finally:
+            _current.reset(token)
+            started.end()
+
+    def _export(self, span: Span) -> None:
+        with self._lock:
+            self._pending.append(span)
+            if not span.local_root and len(self._pending) < _FLUSH_AFTER:
+                return
+            pending, self._pending = self._pending, []
+        self._write(pending)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            self._write(pending)
+
+    def _write(self, spans: List[Span]) -> None:
+        export = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    _attribute("service.name", self.service_name),
+                    _attribute("process.pid", os.getpid()),
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "sql-agent"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        line = (json.dumps(export, separators=(",", ":"), default=str) + "\n").encode()
+        # one O_APPEND write per export keeps lines whole when the agent and
+        # server processes share the file
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def span(name: str, **kwargs: Any):
+    """A child of the current span on its tracer; a no-op outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        return contextlib.nullcontext(NOOP_SPAN)
+    return parent.tracer.span(name, **kwargs)
+
+
+def inject(meta: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """``meta`` plus the current span's ``traceparent``; None if both are empty."""
+    parent = _current.get()
+    if parent is None:
+        return meta or None
+    return {**(meta or {}), "traceparent": parent.traceparent}
+
+
+def load_trace(path: str, trace_id: str) -> List[Dict[str, Any]]:
+    """Every span of ``trace_id`` in an OTLP/JSON lines file, oldest first."""
+    spans = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if trace_id not in line:
+                continue
+            try:
+                export = json.loads(line)
+            except ValueError:
+                continue  # a partly written line
+            for resource in export.get("resourceSpans", []):
+                service = next(
+                    (_attribute_value(a["value"]) for a in resource.get("resource", {}).get("attributes", [])
+                     if a["key"] == "service.name"),
+                    None,
+                )
+                for scope in resource.get("scopeSpans", []):
+                    for otlp in scope.get("spans", []):
+                        if otlp.get("traceId") != trace_id:
+                            continue
+                        spans.append({
+                            "span_id": otlp["spanId"],
+                            "parent_id": otlp.get("parentSpanId"),
+                            "name": otlp["name"],
+                            "service": service,
+                            "start_ns": int(otlp["startTimeUnixNano"]),
+                            "end_ns": int(otlp["endTimeUnixNano"]),
+                            "attributes": {a["key"]: _attribute_value(a["value"]) for a in otlp.get("attributes", [])},
+                            "error": (otlp.get("status") or {}).get("message"),
+                        })
+    spans.sort(key=lambda s: s["start_ns"])
+    return spans
+
+
+def waterfall(spans: List[Dict[str, Any]], width: int = 40) -> str:
+    """Indented timeline of a trace: offset, duration and a bar per span."""
+    if not spans:
+        return "(no spans recorded for this trace)"
+    by_id = {s["span_id"]: s for s in spans}
+    known = by_id.keys()
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        children.setdefault(s["parent_id"] if s["parent_id"] in known else None, []).append(s)
+    start = min(s["start_ns"] for s in spans)
+    total = max(max(s["end_ns"] for s in spans) - start, 1)
+
+    rows: List[Tuple[str, Dict[str, Any]]] = []
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for s in children.get(parent, []):
+            rows.append(("  " * depth + s["name"], s))
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    label_width = min(max(len(label) for label, _ in rows), 48)
+    lines = [f"{'span':<{label_width}} {'start ms':>9} {'dur ms':>9}  timeline ({total / 1e6:.1f} ms)"]
+    services = {s["service"] for s in spans}
+    for label, s in rows:
+        offset, duration = s["start_ns"] - start, s["end_ns"] - s["start_ns"]
+        left = int(offset * width / total)
+        bar = "█" * max(1, round(duration * width / total))
+        parent = by_id.get(s["parent_id"])
+        # name the service wherever the trace crosses a process boundary
+        crossed = parent is None or parent["service"] != s["service"]
+        note = f"  [{s['service']}]" if len(services) > 1 and crossed else ""
+        if s["error"]:
+            note += f"  ✗ {s['error'][:60]}"
+        lines.append(
+            f"{label[:label_width]:<{label_width}} {offset / 1e6:>9.1f} {duration / 1e6:>9.1f}  "
+            f"|{(' ' * left + bar)[:width]:<{width}}|{note}"
+        )
+    return "\n".join(lines)